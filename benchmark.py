@@ -0,0 +1,922 @@
+# benchmark.py
+# Offline benchmark for the audit, media, ingestion and bias-scoring paths.
+# Tavily, Gemini (generateContent / streamGenerateContent / vision), the news feeds and
+# Firestore are replaced by in-process fakes with configurable latency and payload size,
+# so runs need no network or credentials and can be diffed against each other:
+#
+#   python benchmark.py --requests 200 --concurrency 20 --output before.json
+#   python benchmark.py --requests 200 --concurrency 20 --output after.json
+#
+# Output is one JSON document: per scenario p50/p95/p99 latency, throughput and
+# per-stage timings (stages are timed by wrapping the pipeline functions in place).
+import argparse
+import asyncio
+import contextlib
+import datetime
+import functools
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+# The app modules build their clients at import; dummy keys keep that offline
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+os.environ.setdefault("API_KEY", "benchmark")
+
+
+# --- MEASUREMENT ---
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values: return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def summarize(samples, unit: str = "ms") -> dict:
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        f"mean_{unit}": round(sum(values) / len(values), 2),
+        f"p50_{unit}": round(percentile(values, 50), 2),
+        f"p95_{unit}": round(percentile(values, 95), 2),
+        f"p99_{unit}": round(percentile(values, 99), 2),
+        f"max_{unit}": round(values[-1], 2),
+        f"total_{unit}": round(sum(values), 2),
+    }
+
+class StageTimer:
+    """Collects per-stage durations from wrapped functions and fakes."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self._patched = []
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds * 1000)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    @contextlib.contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def wrap(self, module, name: str, stage: str = None):
+        """Replaces module.name with a timed version until restore() is called."""
+        original = getattr(module, name)
+        stage = stage or name
+        if asyncio.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                with self.span(stage):
+                    return await original(*args, **kwargs)
+        else:
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                with self.span(stage):
+                    return original(*args, **kwargs)
+        setattr(module, name, timed)
+        self._patched.append((module, name, original))
+
+    def restore(self):
+        for module, name, original in reversed(self._patched):
+            setattr(module, name, original)
+        self._patched.clear()
+
+    def report(self) -> dict:
+        return {
+            "stages": {stage: summarize(values) for stage, values in sorted(self.samples.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+class FakeQuota:
+    """Fixed one-second windows of `per_second` calls per key, like a per-minute quota
+    scaled down; 0 means unlimited. over() returns the Retry-After seconds or None."""
+
+    def __init__(self, per_second: float):
+        self.per_second = per_second
+        self.windows = {}  # key -> (window start, calls)
+
+    def over(self, key: str):
+        if self.per_second <= 0:
+            return None
+        now = time.monotonic()
+        start, calls = self.windows.get(key, (now, 0))
+        if now - start >= 1.0:
+            start, calls = now, 0
+        self.windows[key] = (start, calls + 1)
+        return None if calls < self.per_second else max(1.0 - (now - start), 0.05)
+
+def jittered(latency: float, rng: random.Random) -> float:
+    return latency * rng.uniform(0.8, 1.2) if latency > 0 else 0.0
+
+
+# --- FAKE UPSTREAMS ---
+
+AI_TEMPLATE = (
+    "[SUMMARY] {summary}\n"
+    "[COUNTER_SUMMARY] Opposition voices dispute parts of the claim.\n"
+    "[CLARIFICATION]\n- The viral post omits the date.\n- Official figures differ.\n"
+    "[AUDIT]\n- Cross-checked with PIB.\n- Compared two wire reports.\n"
+    "[LOGIC_AUDIT] Appeal to emotion in the original post.\n"
+    "[CONFIDENCE] 87"
+)
+
+def fake_ai_text(chars: int) -> str:
+    filler = "Independent reporting finds the claim partly accurate. "
+    return AI_TEMPLATE.format(summary=(filler * (chars // len(filler) + 1))[:max(chars, 1)])
+
+class FakeTavily:
+    """Stands in for AsyncTavilyClient.search, returning results on the requested domains."""
+
+    def __init__(self, timer: StageTimer, latency: float, results: int, content_chars: int, seed: int,
+                 golden_hit_rate: float = 0.5, basic_ratio: float = 0.5, quota: float = 0):
+        self.timer, self.latency, self.results, self.content_chars = timer, latency, results, content_chars
+        self.golden_hit_rate, self.basic_ratio = golden_hit_rate, basic_ratio
+        self.quota = FakeQuota(quota)
+        self.rng = random.Random(seed)
+
+    def _top_score(self, query: str, include_domains) -> float:
+        # A stable share of claims is "already fact-checked": strong golden-tier matches
+        from config import GOLDEN_DOMAINS
+        if include_domains == GOLDEN_DOMAINS:
+            bucket = int(hashlib.md5(query.encode()).hexdigest()[:4], 16) / 0xffff
+            return 0.95 if bucket < self.golden_hit_rate else 0.35
+        return 0.8
+
+    async def search(self, query, timeout=None, include_domains=None, max_results=5, search_depth="basic", **params):
+        if self.quota.over("tavily") is not None:
+            from tavily.errors import UsageLimitExceededError
+            self.timer.count("tavily_rate_limited")
+            raise UsageLimitExceededError("Rate limit exceeded (429)")
+        self.timer.count("tavily_calls")
+        # Tavily bills advanced searches at twice the basic rate
+        self.timer.count(f"tavily_calls_{search_depth}")
+        self.timer.count("tavily_credits", 2 if search_depth == "advanced" else 1)
+        top = self._top_score(query, include_domains)
+        with self.timer.span("tavily_search"):
+            await asyncio.sleep(jittered(self.latency * (1 if search_depth == "advanced" else self.basic_ratio), self.rng))
+        domains = include_domains or ["example-blog.com", "news-aggregator.net"]
+        body = ("Reported details about " + query + ". ") * (self.content_chars // (len(query) + 24) + 1)
+        return {"query": query, "results": [
+            {"url": f"https://{domains[i % len(domains)]}/{hashlib.md5(f'{query}{i}'.encode()).hexdigest()[:12]}",
+             "title": f"{query[:60]} ({i})", "content": body[:self.content_chars], "score": round(top - i / 20, 2)}
+            for i in range(min(max_results, self.results))
+        ]}
+
+    async def close(self):
+        pass
+
+class FakeGemini:
+    """httpx mock transport for generateContent and streamGenerateContent (alt=sse)."""
+
+    def __init__(self, timer: StageTimer, latency: float, chars: int, stream_chunks: int, seed: int, quota: float = 0):
+        self.timer, self.latency, self.stream_chunks = timer, latency, max(stream_chunks, 1)
+        self.quota = FakeQuota(quota)  # per model, like Gemini's per-model limits
+        self.text = fake_ai_text(chars)
+        self.rng = random.Random(seed)
+
+    def client(self):
+        import httpx
+        return httpx.AsyncClient(base_url="http://gemini.invalid", transport=httpx.MockTransport(self.handle))
+
+    async def handle(self, request):
+        import httpx
+        model = request.url.path.rsplit("/", 1)[-1].split(":")[0]
+        wait = self.quota.over(model)
+        if wait is not None:
+            self.timer.count("gemini_rate_limited")
+            return httpx.Response(429, headers={"Retry-After": f"{wait:.2f}"},
+                                  json={"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}})
+        self.timer.count(f"gemini_calls_{model}")
+        if ":streamGenerateContent" in request.url.path:
+            self.timer.count("gemini_stream_calls")
+            return httpx.Response(200, content=self._sse_body(), headers={"content-type": "text/event-stream"})
+        self.timer.count("gemini_generate_calls")
+        with self.timer.span("gemini_generate"):
+            await asyncio.sleep(jittered(self.latency, self.rng))
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": self.text}]}}]})
+
+    async def _sse_body(self):
+        # Half the latency before the first token, the rest spread over the chunks
+        total = jittered(self.latency, self.rng)
+        step = -(-len(self.text) // self.stream_chunks)
+        started = time.perf_counter()
+        await asyncio.sleep(total / 2)
+        for i in range(0, len(self.text), step):
+            chunk = {"candidates": [{"content": {"parts": [{"text": self.text[i:i + step]}]}}]}
+            yield f"data: {json.dumps(chunk)}\r\n\r\n".encode()
+            await asyncio.sleep(total / 2 / self.stream_chunks)
+        self.timer.record("gemini_stream", time.perf_counter() - started)
+
+class FakeVisionClient:
+    """Stands in for main.get_genai_client() (google-genai) on the vision call."""
+
+    def __init__(self, timer: StageTimer, latency: float, seed: int):
+        self.timer, self.latency = timer, latency
+        self.rng = random.Random(seed)
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self.generate_content))
+
+    async def generate_content(self, model, contents):
+        self.timer.count("vision_calls")
+        image = next(part for part in contents if not isinstance(part, str))
+        data = getattr(getattr(image, "inline_data", None), "data", b"") or b""
+        self.timer.count("vision_upload_bytes", len(data))
+        with self.timer.span("vision_generate"):
+            await asyncio.sleep(jittered(self.latency, self.rng))
+        label = hashlib.md5(data).hexdigest()[:6]
+        return SimpleNamespace(text=f"Does viral image {label} show flooding in sector {int(label, 16) % 997}?")
+
+class FakeFeedAdapter:
+    """requests transport adapter serving synthetic RSS and fact-check pages.
+
+    Honours If-None-Match, and between cycles each feed changes with probability
+    `change_rate`, prepending a few new items like a real publisher would. Fact-check
+    listings are paginated (`page_size` links per page, rel=next) and link to article
+    pages; two in three carry ClaimReview JSON-LD, the rest only "Claim:/Fact:" labels.
+    """
+
+    RATINGS = ("False", "Misleading", "Partly True", "True")
+
+    def __init__(self, timer: StageTimer, latency: float, items: int, change_rate: float, seed: int, page_size: int = 10):
+        self.timer, self.latency, self.items, self.change_rate = timer, latency, items, change_rate
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+        self.cycle = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def next_cycle(self):
+        with self._lock:
+            self.cycle += 1
+
+    def _version(self, url: str) -> int:
+        with self._lock:
+            seen = self._versions.get(url)
+            if seen is None or (seen[0] != self.cycle and self.rng.random() < self.change_rate):
+                seen = (self.cycle, (seen[1] + 1) if seen else 0)
+                self._versions[url] = seen
+            return seen[1]
+
+    def _rss(self, url: str, version: int) -> bytes:
+        newest = version * max(1, self.items // 5) + self.items
+        entries = "".join(
+            f"<item><title>Headline {n} from {url}</title><link>{url.rstrip('/')}/story-{n}</link>"
+            f"<description>Government officials said on Monday that policy {n} would be reviewed. "
+            f"Critics called it a shocking move.</description><pubDate>Mon, 06 Jan 2025 10:{n % 60:02d}:00 GMT</pubDate></item>"
+            for n in range(newest, newest - self.items, -1))
+        return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{url}</title>{entries}</channel></rss>'.encode()
+
+    @staticmethod
+    def _article_path(url: str, n: int) -> str:
+        # Shaped like each site's real article URLs, so the per-site link patterns apply
+        if "indiatoday" in url: return f"/fact-check/story/viral-claim-policy-{n}"
+        if "boomlive" in url: return f"/fact-check/viral-claim-policy-{n}"
+        return f"/viral-claim-policy-{n}/"
+
+    def _html(self, url: str, version: int) -> bytes:
+        base, _, query = url.partition("?")
+        page = int(query[len("page="):]) if query.startswith("page=") else 1
+        newest = version * max(1, self.items // 5) + self.items
+        top = newest - (page - 1) * self.page_size
+        origin = "/".join(base.split("/")[:3])
+        entries = "".join(f'<article><h2 class="entry-title"><a href="{origin}{self._article_path(base, n)}">'
+                          f"Viral claim about policy {n}</a></h2></article>"
+                          for n in range(top, max(top - self.page_size, 0), -1))
+        more = f'<link rel="next" href="{base}?page={page + 1}">' if top - self.page_size > 0 else ""
+        return f"<html><head>{more}</head><body>{entries}</body></html>".encode()
+
+    def _article(self, url: str) -> bytes:
+        n = int(url.rstrip("/").rsplit("-", 1)[1])
+        claim, verdict = f"Viral post says policy {n} was scrapped overnight", self.RATINGS[n % len(self.RATINGS)]
+        if n % 3:
+            review = {"@context": "https://schema.org", "@type": "ClaimReview", "claimReviewed": claim,
+                      "datePublished": "2025-01-06", "reviewRating": {"@type": "Rating", "alternateName": verdict},
+                      "itemReviewed": {"@type": "Claim", "author": {"@type": "Person", "name": "Social media users"}}}
+            head = f'<script type="application/ld+json">{json.dumps(review)}</script>'
+            body = "<p>Our investigation found the post recycles an old video.</p>"
+        else:
+            head, body = "", f"<p>Claim: {claim}</p><p>Fact: {verdict}. The order was never issued.</p>"
+        return (f'<html><head><meta property="og:title" content="Fact Check: policy {n}">{head}</head>'
+                f"<body><h1>Fact Check: policy {n}</h1>{body}</body></html>").encode()
+
+    def send(self, request, **kwargs):
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        self.timer.count("feed_requests")
+        time.sleep(jittered(self.latency, self.rng))
+        response = requests.Response()
+        response.url, response.request, response.encoding = request.url, request, "utf-8"
+        if request.url.endswith("/robots.txt"):
+            response.status_code, response._content = 404, b""
+            return response
+        if "viral-claim-policy-" in request.url:
+            self.timer.count("fact_check_article_requests")
+            response.status_code, response._content = 200, self._article(request.url)
+            return response
+        version = self._version(request.url.partition("?")[0])
+        etag = f'"{hashlib.md5(request.url.encode()).hexdigest()[:8]}-{version}"'
+        response.headers = CaseInsensitiveDict({"ETag": etag})
+        if request.headers.get("If-None-Match") == etag:
+            self.timer.count("feed_not_modified")
+            response.status_code, response._content = 304, b""
+        else:
+            response.status_code = 200
+            # RSS fetches advertise application/rss+xml, the fact-check scrapes do not
+            is_feed = "rss" in request.headers.get("Accept", "")
+            response._content = self._rss(request.url, version) if is_feed else self._html(request.url, version)
+        return response
+
+    def close(self):
+        pass
+
+class FakeFirestore:
+    """Just enough of the Firestore client for batch writes and paginated cursor reads."""
+
+    def __init__(self, timer: StageTimer, latency: float):
+        self.timer, self.latency = timer, latency
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def collection(self, name):
+        return _FakeRef(self, (name,))
+
+    def batch(self):
+        return _FakeBatch(self)
+
+    def seed(self, path: tuple, documents: dict):
+        with self.lock:
+            for doc_id, data in documents.items():
+                self.docs[path + (doc_id,)] = dict(data)
+
+class _FakeRef:
+    def __init__(self, db, path):
+        self.db, self.path = db, path
+        self.id = path[-1]
+
+    def collection(self, name): return _FakeRef(self.db, self.path + (name,))
+    def document(self, name): return _FakeRef(self.db, self.path + (name,))
+    def select(self, fields): return _FakeQuery(self.db, self.path)
+    def order_by(self, field): return _FakeQuery(self.db, self.path)
+    def where(self, *args, **kwargs): return _FakeQuery(self.db, self.path)
+    def limit(self, n): return _FakeQuery(self.db, self.path, limit=n)
+    def stream(self): return _FakeQuery(self.db, self.path).stream()
+
+class _FakeQuery:
+    def __init__(self, db, path, after=None, limit=None):
+        self.db, self.path, self.after, self.lim = db, path, after, limit
+
+    def select(self, fields): return self
+    def order_by(self, field): return self
+    def where(self, *args, **kwargs): return self
+    def limit(self, n): return _FakeQuery(self.db, self.path, self.after, n)
+    def start_after(self, values): return _FakeQuery(self.db, self.path, values["__name__"], self.lim)
+
+    def stream(self):
+        with self.db.timer.span("firestore_read"):
+            time.sleep(self.db.latency)
+            with self.db.lock:
+                ids = sorted(p[-1] for p in self.db.docs if p[:-1] == self.path and (self.after is None or p[-1] > self.after))
+                ids = ids[:self.lim] if self.lim else ids
+                snaps = [SimpleNamespace(id=i, reference=_FakeRef(self.db, self.path + (i,)),
+                                         to_dict=functools.partial(dict, self.db.docs[self.path + (i,)])) for i in ids]
+        self.db.timer.count("firestore_docs_read", len(snaps))
+        return iter(snaps)
+
+class _FakeBatch:
+    def __init__(self, db):
+        self.db, self.ops = db, []
+
+    def set(self, ref, data, merge=False): self.ops.append((ref.path, data))
+    def update(self, ref, data): self.ops.append((ref.path, data))
+
+    def commit(self):
+        if len(self.ops) > 500:
+            raise RuntimeError("maximum 500 writes allowed per request")
+        with self.db.timer.span("firestore_commit"):
+            time.sleep(self.db.latency)
+            with self.db.lock:
+                for path, data in self.ops:
+                    self.db.docs.setdefault(path, {}).update(data)
+        self.db.timer.count("firestore_writes", len(self.ops))
+
+
+# --- WIRING ---
+
+def install_firestore(db: FakeFirestore):
+    """Makes database_setup.get_db() hand out the fake."""
+    import database_setup
+    database_setup._db, database_setup._db_initialized = db, True
+
+def reset_app_state():
+    """Fresh caches and an empty local index, so scenarios do not leak into each other."""
+    import rag_engine, ingestion_pipeline, local_index, main
+    from claim_matcher import ClaimMatcher
+    from local_index import BM25Index
+    from trend_rollup import TrendRollup
+    from media_cache import MediaQueryCache
+    rag_engine.RESULT_CACHE.clear()
+    rag_engine.LOCAL_INDEX = ingestion_pipeline.LOCAL_INDEX = BM25Index()
+    rag_engine.CLAIM_MATCHER = ingestion_pipeline.CLAIM_MATCHER = local_index.CLAIM_MATCHER = ClaimMatcher()
+    rag_engine.TREND_ROLLUP = ingestion_pipeline.TREND_ROLLUP = TrendRollup()
+    main.MEDIA_CACHE = MediaQueryCache()
+
+def configure_scheduler(args):
+    """Client-side quotas from config.py, or none ("off") so only the fake upstream's
+    own 429s, the retries and the model fallback shape the run."""
+    import config
+    from upstream_scheduler import SCHEDULER
+    if args.scheduler_limits == "off":
+        SCHEDULER.api_limits, SCHEDULER.model_limits, SCHEDULER.default_model_limit = {}, {}, None
+    else:
+        SCHEDULER.api_limits, SCHEDULER.model_limits = config.UPSTREAM_RATE_LIMITS, config.MODEL_RATE_LIMITS
+        SCHEDULER.default_model_limit = config.DEFAULT_MODEL_RATE_LIMIT
+    SCHEDULER.reset()
+
+def make_queries(count: int, unique: int, seed: int):
+    """`count` queries drawn from `unique` distinct claims, so repeats exercise the cache."""
+    rng = random.Random(seed)
+    subjects = ["state government", "election commission", "central bank", "health ministry", "city council", "supreme court"]
+    actions = ["banned", "approved", "cancelled", "announced", "delayed", "raised"]
+    objects = ["fuel subsidy", "exam schedule", "metro fare", "vaccine drive", "water tax", "farm loans"]
+    pool = [f"Has the {rng.choice(subjects)} {rng.choice(actions)} the {rng.choice(objects)} scheme {i} in district {rng.randint(1, 700)}?"
+            for i in range(max(unique, 1))]
+    return [pool[rng.randrange(len(pool))] for _ in range(count)]
+
+def seed_fact_checks(queries, args) -> int:
+    """Stores rated fact-checks for `--claim-match-rate` of the distinct queries, worded as
+    the fact-checker would, plus `--stored-fact-checks` unrelated ones as haystack."""
+    import rag_engine
+    from config import FACT_CHECKS_COLLECTION
+    rng = random.Random(args.seed)
+    distinct = sorted(set(queries))
+    checked = rng.sample(distinct, int(len(distinct) * args.claim_match_rate))
+    items = [{"url": f"https://www.boomlive.in/fact-check/checked-{i}", "source": "BOOM Live", "rating": "False",
+              "verdict": "Fake", "claim": query.rstrip("?").replace("Has the", "The", 1)}
+             for i, query in enumerate(checked)]
+    filler = make_queries(args.stored_fact_checks, args.stored_fact_checks, args.seed + 1)
+    items += [{"url": f"https://factly.in/filler-{i}/", "source": "Factly", "rating": "Misleading",
+               "verdict": "Misleading", "claim": f"{claim} before {2000 + i % 25}"}
+              for i, claim in enumerate(filler)]
+    return rag_engine.CLAIM_MATCHER.add_items(FACT_CHECKS_COLLECTION, items)
+
+def make_images(count: int, size: int, seed: int):
+    """Distinct noisy JPEG screenshots of the given edge length."""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    images = []
+    for i in range(max(count, 1)):
+        image = Image.effect_noise((size, size), 40 + i % 30).convert("RGB")
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x, y = rng.randrange(size), rng.randrange(size)
+            draw.rectangle([x, y, x + size // 6, y + size // 12], fill=tuple(rng.randrange(256) for _ in range(3)))
+        out = io.BytesIO()
+        image.save(out, format="JPEG", quality=90)
+        images.append(out.getvalue())
+    return images
+
+def recompress(data: bytes, quality: int) -> bytes:
+    from PIL import Image
+    out = io.BytesIO()
+    Image.open(io.BytesIO(data)).save(out, format="JPEG", quality=quality)
+    return out.getvalue()
+
+async def drive(jobs, concurrency: int):
+    """Runs the coroutine factories with at most `concurrency` in flight; returns (latencies_ms, outcomes, wall_s)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, outcomes = [], []
+
+    async def one(job):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                outcome = await job()
+            except Exception as e:
+                outcome = f"error:{type(e).__name__}"
+            latencies.append((time.perf_counter() - started) * 1000)
+            outcomes.append(outcome)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(job) for job in jobs))
+    return latencies, outcomes, time.perf_counter() - started
+
+def scenario_report(latencies, outcomes, wall: float, timer: StageTimer, **extra) -> dict:
+    tally = defaultdict(int)
+    for outcome in outcomes:
+        tally[outcome] += 1
+    report = {"requests": len(latencies), "wall_s": round(wall, 3),
+              "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+              "latency": summarize(latencies), "outcomes": dict(sorted(tally.items()))}
+    report.update(timer.report())
+    report.update(extra)
+    return report
+
+def audit_outcome(result: dict) -> str:
+    if result.get("fail_safe"): return "fail_safe"
+    return str(result.get("status", "unknown")).lower()
+
+def wrap_audit_stages(timer: StageTimer):
+    import rag_engine
+    for name in ("match_stored_claim", "local_retrieval", "run_concurrent_retrieval_async", "assemble_context",
+                 "classify_sources", "build_audit_response"):
+        timer.wrap(rag_engine, name)
+
+def _gemini_and_tavily(args, timer: StageTimer):
+    import rag_engine
+    gemini = FakeGemini(timer, args.gemini_latency, args.gemini_chars, args.stream_chunks, args.seed, args.gemini_quota)
+    rag_engine._async_tavily = FakeTavily(timer, args.tavily_latency, args.tavily_results, args.tavily_chars, args.seed,
+                                          args.golden_hit_rate, args.tavily_basic_ratio, args.tavily_quota)
+    configure_scheduler(args)
+    rag_engine._gemini_http = gemini.client()
+
+
+# --- SCENARIOS ---
+
+async def bench_search(args) -> dict:
+    """POST /api/search through the ASGI app."""
+    import httpx, main, rag_engine
+    timer = StageTimer()
+    reset_app_state()
+    _gemini_and_tavily(args, timer)
+    wrap_audit_stages(timer)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as http:
+            async def request(query):
+                response = await http.post("/api/search", json={"query": query})
+                return audit_outcome(response.json()) if response.status_code == 200 else f"http_{response.status_code}"
+            queries = make_queries(args.requests, args.unique_queries, args.seed)
+            stored = seed_fact_checks(queries, args)
+            latencies, outcomes, wall = await drive([functools.partial(request, q) for q in queries], args.concurrency)
+    finally:
+        timer.restore()
+        await rag_engine.close_async_clients()
+    return scenario_report(latencies, outcomes, wall, timer, cache=rag_engine.RESULT_CACHE.stats(),
+                           coalescing=rag_engine.INFLIGHT_AUDITS.stats(), stored_fact_checks=stored)
+
+async def bench_search_stream(args) -> dict:
+    """The /api/search/stream event generator, timing first event and first section too."""
+    import main, rag_engine
+    timer = StageTimer()
+    reset_app_state()
+    _gemini_and_tavily(args, timer)
+    wrap_audit_stages(timer)
+    try:
+        async def request(query):
+            started, first_section = time.perf_counter(), None
+            async for frame in main._sse_events(query):
+                event = frame.split("\n", 1)[0][len("event: "):]
+                if event == "verified_sources":
+                    timer.record("first_event", time.perf_counter() - started)
+                elif first_section is None and event in rag_engine.SECTION_FIELDS.values():
+                    first_section = time.perf_counter()
+                    timer.record("first_section", first_section - started)
+                elif event == "error":
+                    return "fail_safe"
+            return "success"
+        queries = make_queries(args.requests, args.unique_queries, args.seed)
+        latencies, outcomes, wall = await drive([functools.partial(request, q) for q in queries], args.concurrency)
+    finally:
+        timer.restore()
+        await rag_engine.close_async_clients()
+    return scenario_report(latencies, outcomes, wall, timer, cache=rag_engine.RESULT_CACHE.stats())
+
+async def bench_batch(args) -> dict:
+    """One POST /api/search/batch of --batch-size claims (with repeats) streamed back as NDJSON."""
+    import httpx, main, rag_engine
+    timer = StageTimer()
+    reset_app_state()
+    _gemini_and_tavily(args, timer)
+    wrap_audit_stages(timer)
+    queries = make_queries(args.batch_size, args.unique_queries, args.seed + 1)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=None) as http:
+            started = time.perf_counter()
+            response = await http.post("/api/search/batch", json={"queries": queries})
+            wall = time.perf_counter() - started
+    finally:
+        timer.restore()
+        await rag_engine.close_async_clients()
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    outcomes = [audit_outcome(l["result"]) for l in lines if l.get("type") == "result"]
+    summary = next((l for l in lines if l.get("type") == "summary"), {})
+    report = scenario_report([wall * 1000], outcomes, wall, timer, batch=summary)
+    report["requests"] = len(queries)
+    report["throughput_rps"] = round(len(queries) / wall, 2) if wall else 0.0
+    return report
+
+async def bench_media(args) -> dict:
+    """POST /api/verify-media with a mix of fresh, repeated and recompressed uploads."""
+    import httpx, main, rag_engine
+    timer = StageTimer()
+    reset_app_state()
+    _gemini_and_tavily(args, timer)
+    wrap_audit_stages(timer)
+    original_client = main._genai_client
+    main._genai_client = FakeVisionClient(timer, args.vision_latency, args.seed)
+    timer.wrap(main, "prepare_image")
+    rng = random.Random(args.seed)
+    images = make_images(args.unique_images, args.image_size, args.seed)
+    uploads = []
+    for _ in range(args.media_requests):
+        data = images[rng.randrange(len(images))]
+        uploads.append(recompress(data, rng.randint(60, 80)) if rng.random() < args.media_recompress else data)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as http:
+            async def request(data):
+                response = await http.post("/api/verify-media", files={"file": ("upload.jpg", data, "image/jpeg")})
+                return audit_outcome(response.json()) if response.status_code == 200 else f"http_{response.status_code}"
+            latencies, outcomes, wall = await drive([functools.partial(request, d) for d in uploads], args.concurrency)
+    finally:
+        timer.restore()
+        main._genai_client = original_client
+        await rag_engine.close_async_clients()
+    return scenario_report(latencies, outcomes, wall, timer, media_cache=main.MEDIA_CACHE.stats(),
+                           upload_size=summarize([len(d) for d in uploads], "bytes"))
+
+def bench_ingest(args, workdir: str) -> dict:
+    """run_ingestion_cycle against fake feeds; the first cycle is cold, later ones mostly 304s."""
+    import requests
+    import fact_check_crawler
+    import ingestion_pipeline
+    from ingest_state import IngestState
+    timer = StageTimer()
+    reset_app_state()
+    install_firestore(FakeFirestore(timer, args.firestore_latency))
+    adapter = FakeFeedAdapter(timer, args.feed_latency, args.feed_items, args.feed_change_rate, args.seed,
+                              args.fact_check_page_size)
+    original_delay = fact_check_crawler.HOST_LIMITER.delay
+    fact_check_crawler.HOST_LIMITER.delay = args.crawl_host_delay
+    original_session = ingestion_pipeline.build_http_session
+
+    def fake_session(*a, **kw):
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    ingestion_pipeline.build_http_session = fake_session
+    timer.wrap(ingestion_pipeline, "fetch_source")
+    timer.wrap(ingestion_pipeline, "save_to_firestore")
+    state = IngestState(os.path.join(workdir, "ingest_state.db"))
+    cycles = []
+    try:
+        for _ in range(args.ingest_cycles):
+            adapter.next_cycle()
+            started = time.perf_counter()
+            reports = ingestion_pipeline.run_ingestion_cycle(state)
+            fact_checks = [item for r in reports if r["kind"] == "fact_check" for item in r["items"]]
+            cycles.append({"wall_ms": round((time.perf_counter() - started) * 1000, 2),
+                           "items": sum(len(r["items"]) for r in reports),
+                           "fact_checks": len(fact_checks),
+                           "fact_checks_rated": sum(item["rating"] != "Unrated" for item in fact_checks),
+                           "listing_pages": sum(r.get("crawl", {}).get("pages", 0) for r in reports),
+                           "not_modified": sum(r["status"] == "not_modified" for r in reports),
+                           "errors": sum(r["status"] == "error" for r in reports)})
+    finally:
+        timer.restore()
+        ingestion_pipeline.build_http_session = original_session
+        fact_check_crawler.HOST_LIMITER.delay = original_delay
+        state.close()
+    report = {"cycles": cycles, "cycle_latency": summarize([c["wall_ms"] for c in cycles]),
+              "trend_days": len(ingestion_pipeline.TREND_ROLLUP)}
+    report.update(timer.report())
+    return report
+
+def bench_bias(args, workdir: str) -> dict:
+    """score_stored_articles over a seeded fake corpus, plus the in-process scorer alone."""
+    import bias_scorer
+    from config import RAW_NEWS_COLLECTION
+    from ingest_state import IngestState
+    timer = StageTimer()
+    db = FakeFirestore(timer, args.firestore_latency)
+    install_firestore(db)
+    rng = random.Random(args.seed)
+    words = ["government", "policy", "shocking", "officials", "claimed", "report", "outrageous", "minister",
+             "budget", "allegedly", "district", "sources", "slammed", "farmers", "exposed", "court"]
+    articles = {f"{i:08d}": {"title": " ".join(rng.choice(words) for _ in range(10)),
+                             "summary_text": " ".join(rng.choice(words) for _ in range(args.bias_words))}
+                for i in range(args.bias_docs)}
+    db.seed(("artifacts", bias_scorer.app_id, "public", "data", RAW_NEWS_COLLECTION), articles)
+
+    texts = [f"{a['title']} {a['summary_text']}" for a in articles.values()]
+    started = time.perf_counter()
+    bias_scorer.calculate_bias_scores(texts)
+    scorer_s = time.perf_counter() - started
+
+    state = IngestState(os.path.join(workdir, "bias_state.db"))
+    timer.wrap(bias_scorer, "_commit_updates", "commit_batch")
+    try:
+        started = time.perf_counter()
+        bias_scorer.score_stored_articles(page_size=args.bias_page_size, workers=args.bias_workers, state=state)
+        job_s = time.perf_counter() - started
+    finally:
+        timer.restore()
+        state.close()
+    report = {"documents": len(articles), "job_wall_s": round(job_s, 3),
+              "job_docs_per_s": round(len(articles) / job_s, 1) if job_s else 0.0,
+              "scorer_only_docs_per_s": round(len(texts) / scorer_s, 1) if scorer_s else 0.0}
+    report.update(timer.report())
+    return report
+
+def bench_snapshot(args, workdir: str) -> dict:
+    """Worker bootstrap: local index from the corpus snapshot vs. from a Firestore read."""
+    import bias_scorer, corpus_snapshot
+    from config import FACT_CHECKS_COLLECTION, RAW_NEWS_COLLECTION
+    from local_index import BM25Index
+    timer = StageTimer()
+    db = FakeFirestore(timer, args.firestore_latency)
+    install_firestore(db)
+    rng = random.Random(args.seed)
+    words = ["government", "policy", "minister", "budget", "district", "farmers", "court", "election",
+             "fuel", "subsidy", "metro", "water", "school", "exam", "video", "flood"]
+    stamp = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    data = ("artifacts", bias_scorer.app_id, "public", "data")
+    db.seed(data + (RAW_NEWS_COLLECTION,), {f"{i:08d}": {
+        "title": " ".join(rng.choice(words) for _ in range(10)), "url": f"https://news.example/{i}",
+        "summary_text": " ".join(rng.choice(words) for _ in range(args.bias_words)), "source": "The Hindu",
+        "ingestion_date": stamp + datetime.timedelta(seconds=i), "bias_score": rng.random()} for i in range(args.snapshot_docs)})
+    db.seed(data + (FACT_CHECKS_COLLECTION,), {f"{i:08d}": {
+        "claim": " ".join(rng.choice(words) for _ in range(8)), "verdict": "False", "rating": "False",
+        "url": f"https://factly.in/{i}/", "source": "Factly", "ingestion_date": stamp} for i in range(args.snapshot_docs // 20)})
+    path = os.path.join(workdir, "corpus.snap")
+
+    started = time.perf_counter()
+    header = corpus_snapshot.export_snapshot(path, page_size=args.bias_page_size)
+    export_s = time.perf_counter() - started
+    started = time.perf_counter()
+    with corpus_snapshot.open_corpus(path) as corpus:
+        opened_ms = (time.perf_counter() - started) * 1000
+        decoded = sum(1 for _ in corpus.items())
+    decode_s = time.perf_counter() - started
+    started = time.perf_counter()
+    BM25Index().load_from_snapshot(path)
+    from_snapshot_s = time.perf_counter() - started
+    started = time.perf_counter()
+    BM25Index().load_from_firestore()
+    from_firestore_s = time.perf_counter() - started
+    report = {"documents": header["rows"], "snapshot_mb": round(os.path.getsize(path) / 1e6, 2),
+              "export_s": round(export_s, 3), "open_ms": round(opened_ms, 2), "decode_all_s": round(decode_s, 3),
+              "decoded": decoded, "index_from_snapshot_s": round(from_snapshot_s, 3),
+              "index_from_firestore_s": round(from_firestore_s, 3)}
+    report.update(timer.report())
+    return report
+
+COLD_START_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+def bench_cold_start(args) -> dict:
+    """Fresh-interpreter `import main`, the cost every new serverless instance pays before serving."""
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    samples, imports = [], {}
+    for _ in range(max(args.cold_start_runs, 1)):
+        done = subprocess.run([sys.executable, "-X", "importtime", "-c", COLD_START_SNIPPET],
+                              cwd=cwd, env=env, capture_output=True, text=True, timeout=120)
+        if done.returncode != 0:
+            return {"error": done.stderr.strip().splitlines()[-1:]}
+        samples.append(float(done.stdout.strip().splitlines()[-1]) * 1000)
+        # -X importtime lines are "self_us | cumulative_us | <2 spaces per level>module", children
+        # listed before their parent; keep the direct children of the top-level `main` entry
+        children = []
+        for line in done.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) != 3 or not parts[1].strip().isdigit():
+                continue
+            depth = (len(parts[2]) - len(parts[2].lstrip()) - 1) // 2
+            if depth == 1:
+                children.append((parts[2].strip(), int(parts[1]) / 1000))
+            elif depth == 0:
+                if parts[2].strip() == "main":
+                    for name, ms in children:
+                        imports.setdefault(name, []).append(ms)
+                children = []
+    slowest = sorted(((name, sum(v) / len(v)) for name, v in imports.items()), key=lambda kv: kv[1], reverse=True)
+    return {"import_main": summarize(samples),
+            "slowest_direct_imports": [{"module": name, "cumulative_ms": round(ms, 1)} for name, ms in slowest[:args.cold_start_top]]}
+
+
+# --- MAIN ---
+
+SCENARIOS = ("cold_start", "search", "search_stream", "batch", "media", "ingest", "bias", "snapshot")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline FairGPT benchmark (no network, fake upstreams).")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma list of {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own log output")
+    load = parser.add_argument_group("load")
+    load.add_argument("--requests", type=int, default=200)
+    load.add_argument("--concurrency", type=int, default=20)
+    load.add_argument("--unique-queries", type=int, default=120)
+    load.add_argument("--batch-size", type=int, default=200, help="claims in the batch scenario")
+    load.add_argument("--claim-match-rate", type=float, default=0.0,
+                      help="share of distinct search claims already stored as fact-checks (search scenario)")
+    load.add_argument("--stored-fact-checks", type=int, default=0, help="unrelated stored fact-checks for the matcher to sift")
+    upstream = parser.add_argument_group("fake upstreams")
+    upstream.add_argument("--tavily-latency", type=float, default=0.25, help="seconds per advanced search")
+    upstream.add_argument("--tavily-basic-ratio", type=float, default=0.5, help="basic-depth latency as a share of advanced")
+    upstream.add_argument("--tavily-results", type=int, default=4)
+    upstream.add_argument("--tavily-chars", type=int, default=600, help="content length per result")
+    upstream.add_argument("--golden-hit-rate", type=float, default=0.5, help="share of claims the fact-checker tier answers strongly")
+    upstream.add_argument("--gemini-latency", type=float, default=1.2, help="seconds per generation")
+    upstream.add_argument("--gemini-chars", type=int, default=800, help="summary length of the generated text")
+    upstream.add_argument("--stream-chunks", type=int, default=20)
+    upstream.add_argument("--vision-latency", type=float, default=1.5)
+    upstream.add_argument("--firestore-latency", type=float, default=0.03, help="seconds per batch commit or page read")
+    upstream.add_argument("--feed-latency", type=float, default=0.2)
+    upstream.add_argument("--gemini-quota", type=float, default=0, help="calls per second per model before 429s (0: unlimited)")
+    upstream.add_argument("--tavily-quota", type=float, default=0, help="searches per second before 429s (0: unlimited)")
+    upstream.add_argument("--scheduler-limits", choices=("off", "config"), default="off",
+                          help="client-side token buckets: none, or the UPSTREAM/MODEL_RATE_LIMITS from config.py")
+    media = parser.add_argument_group("media")
+    media.add_argument("--media-requests", type=int, default=60)
+    media.add_argument("--unique-images", type=int, default=20)
+    media.add_argument("--image-size", type=int, default=1200, help="edge length in pixels")
+    media.add_argument("--media-recompress", type=float, default=0.3, help="fraction of uploads recompressed copies")
+    ingest = parser.add_argument_group("ingestion and bias scoring")
+    ingest.add_argument("--ingest-cycles", type=int, default=3)
+    ingest.add_argument("--feed-items", type=int, default=50)
+    ingest.add_argument("--feed-change-rate", type=float, default=0.3)
+    ingest.add_argument("--fact-check-page-size", type=int, default=10, help="article links per fact-check listing page")
+    ingest.add_argument("--crawl-host-delay", type=float, default=0.02,
+                        help="per-host spacing of crawler requests (config.py uses FACT_CHECK_HOST_DELAY)")
+    ingest.add_argument("--bias-docs", type=int, default=5000)
+    ingest.add_argument("--bias-words", type=int, default=60)
+    ingest.add_argument("--bias-page-size", type=int, default=500)
+    ingest.add_argument("--bias-workers", type=int, default=2)
+    ingest.add_argument("--snapshot-docs", type=int, default=20000, help="articles in the corpus snapshot scenario")
+    cold = parser.add_argument_group("cold start")
+    cold.add_argument("--cold-start-runs", type=int, default=3)
+    cold.add_argument("--cold-start-top", type=int, default=10, help="slowest imports of main to list")
+    return parser.parse_args(argv)
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+def run(args) -> dict:
+    chosen = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(chosen) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    report = {"meta": {"revision": git_revision(), "python": platform.python_version(),
+                       "started": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args)},
+              "scenarios": {}}
+    with quiet, tempfile.TemporaryDirectory(prefix="fairgpt-bench-") as workdir:
+        install_firestore(FakeFirestore(StageTimer(), args.firestore_latency))
+        for name in chosen:
+            print(f"⏱️ {name}...", file=sys.stderr)
+            if name == "cold_start":
+                result = bench_cold_start(args)
+            elif name == "search":
+                result = asyncio.run(bench_search(args))
+            elif name == "search_stream":
+                result = asyncio.run(bench_search_stream(args))
+            elif name == "batch":
+                result = asyncio.run(bench_batch(args))
+            elif name == "media":
+                result = asyncio.run(bench_media(args))
+            elif name == "ingest":
+                result = bench_ingest(args, workdir)
+            elif name == "snapshot":
+                result = bench_snapshot(args, workdir)
+            else:
+                result = bench_bias(args, workdir)
+            report["scenarios"][name] = result
+    return report
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    output = json.dumps(run(arguments), indent=2, sort_keys=True)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Benchmark report written to {arguments.output}", file=sys.stderr)
+    else:
+        print(output)
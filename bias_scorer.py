@@ -1,48 +1,174 @@
 import os
-from database_setup import DB
-from config import LOADED_WORDS, RAW_NEWS_COLLECTION
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List
+from database_setup import get_db
+from ingest_state import IngestState
+from config import (
+    LOADED_WORDS, RAW_NEWS_COLLECTION, BIAS_SCORER_VERSION, RESCORE_PAGE_SIZE, RESCORE_WORKERS,
+    FIRESTORE_BATCH_SIZE, FIRESTORE_WRITE_WORKERS
+)
 
 app_id = os.getenv('APP_ID', 'default_app_id')
+RESCORE_JOB = "bias_rescore"
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Regex for a set of terms with shared prefixes factored out (a character trie),
+    so the engine tests each position against one branch per letter rather than
+    against every term. Spaces inside phrases match any run of whitespace."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end-of-term marker
+
+    def build(node) -> str:
+        branches = [(r"\s+" if ch == " " else re.escape(ch)) + build(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches: return ""
+        ends_here = "" in node
+        body = branches[0] if len(branches) == 1 and not ends_here else "(?:" + "|".join(branches) + ")"
+        # Optional continuation is greedy, so a longer term wins over its prefix
+        return body + ("?" if ends_here else "")
+
+    return build(trie)
+
+class LoadedTermMatcher:
+    """All LOADED_WORDS terms compiled into one regex, matched in a single linear pass.
+
+    Single words match at a word start and may carry a suffix ("scam" -> "scams").
+    Multi-word terms such as "sources claim" match across whitespace but only as whole
+    words: "may be" must not count "may benefit", nor "could lead to" "could lead towns".
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.categories = list(categories)
+        self._category_of = {}
+        for category, terms in categories.items():
+            for term in terms:
+                self._category_of.setdefault(" ".join(term.lower().split()), category)
+        phrases = [term for term in self._category_of if " " in term]
+        words = [term for term in self._category_of if " " not in term]
+        # Group 1: a whole phrase; group 2: a single word, its suffix left outside the group
+        self._pattern = re.compile(r"\b(?:(" + (_trie_pattern(phrases) or "(?!)") + r")\b|("
+                                   + (_trie_pattern(words) or "(?!)") + r")\w*)", re.IGNORECASE)
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Per-category hit counts for one text."""
+        counts = dict.fromkeys(self.categories, 0)
+        if not text: return counts
+        for match in self._pattern.finditer(text):
+            counts[self._category_of[" ".join((match.group(1) or match.group(2)).lower().split())]] += 1
+        return counts
+
+    def analyze(self, text: str) -> Dict:
+        counts = self.count(text)
+        return {"hits": sum(counts.values()), "words": len(text.split()) if text else 0, "categories": counts}
+
+    def analyze_many(self, texts: Iterable[str]) -> List[Dict]:
+        return [self.analyze(text) for text in texts]
+
+LOADED_TERM_MATCHER = LoadedTermMatcher(LOADED_WORDS)
+
+def _density_score(analysis: Dict) -> float:
+    if analysis["words"] == 0: return 0.0
+    # Return ratio of loaded words to total words
+    return round(analysis["hits"] / analysis["words"], 4)
 
 def calculate_bias_score(text: str) -> float:
     """Calculates a normalized score based on the density of loaded words."""
     if not text: return 0.0
-    
-    words = text.lower().split()
-    total_words = len(words)
-    if total_words == 0: return 0.0
-    
-    # Flatten the LOADED_WORDS dictionary for easy counting
-    all_loaded_terms = [item for sublist in LOADED_WORDS.values() for item in sublist]
-    
-    found_count = sum(1 for word in words if any(term in word for term in all_loaded_terms))
-    
-    # Return ratio of loaded words to total words
-    return round(found_count / total_words, 4)
+    return _density_score(LOADED_TERM_MATCHER.analyze(text))
+
+def calculate_bias_scores(texts: Iterable[str]) -> List[float]:
+    """Batch form of calculate_bias_score for scoring thousands of texts in one call."""
+    return [_density_score(analysis) for analysis in LOADED_TERM_MATCHER.analyze_many(texts)]
+
+def _commit_updates(updates: List) -> bool:
+    batch = get_db().batch()
+    for doc_ref, fields in updates:
+        batch.update(doc_ref, fields)
+    try:
+        batch.commit()
+        return True
+    except Exception as e:
+        print(f"❌ Error during bias batch update ({len(updates)} docs): {e}")
+        return False
 
-def score_stored_articles():
-    """Iterates through Firestore and updates articles with their bias scores."""
-    if not DB: return
+def _needs_scoring(data: Dict) -> bool:
+    return "bias_score" not in data or data.get("bias_scorer_version", 0) < BIAS_SCORER_VERSION
+
+def score_stored_articles(page_size: int = RESCORE_PAGE_SIZE, workers: int = RESCORE_WORKERS, state: IngestState = None):
+    """Streams raw_news_articles page by page and scores only documents that are
+    unscored or were scored by an older BIAS_SCORER_VERSION.
+
+    Pages are read with a document-id cursor, scored in a process pool and written in
+    <=500-operation batches. The cursor is checkpointed after every page, so an
+    interrupted run resumes where it stopped instead of starting over.
+    """
+    db = get_db()
+    if not db: return
+    own_state = state is None
+    state = state or IngestState()
 
     # artifacts -> {app_id} -> public -> data -> raw_news_articles
-    collection_ref = DB.collection('artifacts').document(app_id).collection('public') \
+    collection_ref = db.collection('artifacts').document(app_id).collection('public') \
                        .document('data').collection(RAW_NEWS_COLLECTION)
-    
-    docs = collection_ref.get()
-    print(f"🔎 Analyzing {len(docs)} articles for bias...")
-    
-    batch = DB.batch()
-    for doc in docs:
-        data = doc.to_dict()
-        # Analyze both title and summary
-        full_text = f"{data.get('title', '')} {data.get('summary_text', '')}"
-        score = calculate_bias_score(full_text)
-        
-        # Update the document with the new score
-        batch.update(doc.reference, {"bias_score": score})
-        
-    batch.commit()
-    print("✅ Bias scoring complete. Firestore updated.")
+    base_query = collection_ref.select(["title", "summary_text", "bias_score", "bias_scorer_version"]) \
+                               .order_by("__name__").limit(page_size)
+
+    cursor = state.get_checkpoint(RESCORE_JOB)
+    if cursor:
+        print(f"↩️ Resuming bias scoring after document {cursor}")
+    print(f"🔎 Streaming articles for bias scoring (scorer v{BIAS_SCORER_VERSION}, {workers} workers)...")
+
+    scanned = scored = failed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            query = base_query.start_after({"__name__": cursor}) if cursor else base_query
+            docs = list(query.stream())
+            if not docs: break
+            scanned += len(docs)
+
+            pending = [doc for doc in docs if _needs_scoring(doc.to_dict())]
+            if pending:
+                # Analyze both title and summary
+                texts = [f"{d.get('title') or ''} {d.get('summary_text') or ''}" for d in (doc.to_dict() for doc in pending)]
+                chunk = max(1, -(-len(texts) // workers))
+                scores = [score for part in pool.map(calculate_bias_scores, [texts[i:i + chunk] for i in range(0, len(texts), chunk)])
+                          for score in part]
+
+                # Update the documents with the new scores, in parallel chunked batches
+                updates = [(doc.reference, {"bias_score": score, "bias_scorer_version": BIAS_SCORER_VERSION})
+                           for doc, score in zip(pending, scores)]
+                chunks = [updates[i:i + FIRESTORE_BATCH_SIZE] for i in range(0, len(updates), FIRESTORE_BATCH_SIZE)]
+                with ThreadPoolExecutor(max_workers=min(FIRESTORE_WRITE_WORKERS, len(chunks))) as writers:
+                    for part, ok in zip(chunks, writers.map(_commit_updates, chunks)):
+                        if ok:
+                            scored += len(part)
+                        else:
+                            failed += len(part)
+                if failed:
+                    print("❌ Stopping: a batch failed. Re-run to resume from the last checkpoint.")
+                    break
+
+            cursor = docs[-1].id
+            state.save_checkpoint(RESCORE_JOB, cursor)
+            elapsed = time.perf_counter() - started
+            print(f"   ...{scanned} scanned, {scored} scored ({scanned / elapsed:.0f} docs/sec)")
+            if len(docs) < page_size: break
+
+    elapsed = time.perf_counter() - started
+    if not failed:
+        # Finished a full pass; the next run starts from the beginning again
+        state.clear_checkpoint(RESCORE_JOB)
+    print(f"✅ Bias scoring complete: {scanned} scanned, {scored} scored, {scanned - scored - failed} already current, "
+          f"{failed} failed in {elapsed:.1f}s ({scanned / max(elapsed, 1e-9):.0f} docs/sec).")
+    if own_state:
+        state.close()
 
 if __name__ == "__main__":
     score_stored_articles()
\ No newline at end of file
@@ -0,0 +1,102 @@
+# claim_matcher.py
+# In-process index over stored fact-check claims, so a query that is an
+# already-checked viral claim (reworded, re-punctuated, re-tensed) is answered from the
+# publisher's verdict without Tavily or Gemini.
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from config import FACT_CHECKS_COLLECTION, CLAIM_MATCH_JACCARD, CLAIM_MATCH_MIN_TERMS
+from text_utils import same_order, stem_terms
+
+# How people ask about a claim rather than part of it ("is it true that ...", "fact check: ...")
+_FRAMING = frozenset({"true", "fact", "check", "verify", "whether", "rumour", "rumor"})
+
+# Fields kept per claim; everything the fast-path response needs and nothing else
+_KEPT_FIELDS = ("url", "source", "claim", "verdict", "rating", "headline", "claimant", "published_date")
+
+
+def claim_terms(text: str) -> List[str]:
+    """stem_terms() without the framing words of a question about the claim."""
+    return [term for term in stem_terms(text) if term not in _FRAMING]
+
+
+def claim_shingles(terms: List[str]) -> Set[int]:
+    """Single words plus adjacent pairs: "india beat pakistan" and "pakistan beat india"
+    share every word but no pair, so they stay apart."""
+    grams = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+    return {zlib.crc32(g.encode()) for g in grams}
+
+
+class ClaimMatcher:
+    """Stored claim -> fact-check, looked up by similarity.
+
+    A match must use exactly the same content terms as the query, after stemming: one
+    swapped entity ("Punjab" / "Haryana"), verb ("announced" / "denied"), number or
+    negation makes it a different claim however high the overlap, so only stopwords,
+    inflection and framing may differ. Claims are therefore indexed by their content
+    term set, and the few claims sharing the query's set are checked for word order
+    and the Jaccard of their shingle sets (repeated words and pairs still count).
+    Only rated fact-checks are indexed: an "Unrated" verdict is no answer. Doc ids
+    follow save_to_firestore (url-keyed), so a re-crawled article replaces its old entry.
+    """
+
+    def __init__(self, threshold: float = CLAIM_MATCH_JACCARD, min_terms: int = CLAIM_MATCH_MIN_TERMS):
+        self.threshold, self.min_terms = threshold, min_terms
+        self._by_content: Dict[FrozenSet[str], Set[str]] = defaultdict(set)
+        self._claims: Dict[str, dict] = {}  # doc_id -> {"fact_check", "terms", "content", "shingles"}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._claims)
+
+    def _remove(self, doc_id: str):
+        entry = self._claims.pop(doc_id, None)
+        if entry is None: return
+        members = self._by_content.get(entry["content"])
+        if members is not None:
+            members.discard(doc_id)
+            if not members:
+                del self._by_content[entry["content"]]
+
+    def add_fact_check(self, doc_id: str, item: dict) -> bool:
+        """Adds or replaces one fact-check; returns False when it is not matchable."""
+        terms = claim_terms(item.get('claim') or "")
+        with self._lock:
+            self._remove(doc_id)
+            if len(terms) < self.min_terms or item.get('rating', "Unrated") == "Unrated":
+                return False
+            content = frozenset(terms)
+            self._claims[doc_id] = {"fact_check": {f: item.get(f) for f in _KEPT_FIELDS}, "terms": terms,
+                                    "content": content, "shingles": claim_shingles(terms)}
+            self._by_content[content].add(doc_id)
+        return True
+
+    def add_items(self, collection_name: str, items: Iterable[dict]) -> int:
+        """Indexes ingested items; only the fact-check collection holds claims."""
+        if collection_name != FACT_CHECKS_COLLECTION:
+            return 0
+        return sum(self.add_fact_check(f"{collection_name}:{item['url']}", item)
+                   for item in items if item.get('url'))
+
+    def match(self, query: str) -> Optional[dict]:
+        """The stored fact-check closest to `query` at or above the threshold, with its
+        `similarity`, or None."""
+        terms = claim_terms(query)
+        if len(terms) < self.min_terms:
+            return None
+        shingles = claim_shingles(terms)
+        best = None
+        with self._lock:
+            for doc_id in self._by_content.get(frozenset(terms), ()):
+                entry = self._claims[doc_id]
+                similarity = len(shingles & entry["shingles"]) / len(shingles | entry["shingles"])
+                if similarity < self.threshold or (best is not None and similarity <= best[0]):
+                    continue
+                if same_order(terms, entry["terms"]):
+                    best = (similarity, entry["fact_check"])
+        return dict(best[1], similarity=round(best[0], 3)) if best else None
+
+
+CLAIM_MATCHER = ClaimMatcher()
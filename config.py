@@ -15,8 +15,73 @@ API_URL_BASE = "https://generativelanguage.googleapis.com"
 
 # Gemini API Model for Generation and Grounding
 MODEL_NAME = "gemini-2.5-flash-preview-09-2025"
-MAX_RETRIES = 3
-API_TIMEOUT = 60 # Seconds
+TEXT_MODELS: List[str] = [MODEL_NAME, "gemini-3-flash-preview"] # Audit generation, tried in order when a model is out of quota
+VISION_MODELS: List[str] = ["gemini-3-flash-preview", MODEL_NAME] # Image claim extraction, same fallback rule
+MAX_RETRIES = 3 # Retries per upstream call after the first attempt (rate limits, timeouts, 5xx)
+API_TIMEOUT = 60 # Seconds, total budget for one upstream call including throttling and retries
+TAVILY_TIMEOUT = 20 # Seconds, applied to each concurrent Tavily search
+GEMINI_TIMEOUT = 45 # Seconds, text generation request
+HTTP_POOL_SIZE = 20 # Keep-alive connections held open to API_URL_BASE per worker
+HTTP_KEEPALIVE_EXPIRY = 60 # Seconds an idle pooled connection is kept
+RETRIEVAL_POLICY = os.getenv("RETRIEVAL_POLICY", "adaptive") # "adaptive" (golden tier first, widen when weak) or "parallel" (all three searches at once)
+RETRIEVAL_EARLY_EXIT_SCORE = 0.75 # Mean Tavily score of the top golden results that is trusted without wider searches
+RETRIEVAL_EARLY_EXIT_RESULTS = 2 # Golden results averaged for that score (fewer results count as zeros)
+TIMING_HEADER = os.getenv("TIMING_HEADER", "0") == "1" # Add a Server-Timing header with per-stage durations to API responses
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "0") == "1" # Build Firestore/Tavily/Gemini clients in the background at startup
+
+# --- UPSTREAM QUOTAS (shared by every Gemini and Tavily call in a worker) ---
+# (requests per second, burst) token buckets; a Gemini call draws from both its API and its model bucket
+UPSTREAM_RATE_LIMITS: Dict[str, tuple] = {"tavily": (15.0, 30), "gemini": (15.0, 30)}
+MODEL_RATE_LIMITS: Dict[str, tuple] = {MODEL_NAME: (10.0, 20), "gemini-3-flash-preview": (5.0, 10)}
+DEFAULT_MODEL_RATE_LIMIT = (5.0, 10) # Models missing from MODEL_RATE_LIMITS
+LANE_HEADROOM: Dict[str, float] = {"interactive": 0.0, "batch": 0.3, "ingest": 0.5} # Share of each bucket kept back from lower lanes
+BACKOFF_BASE_SECONDS = 0.5 # First retry waits up to this long (full jitter), doubling per retry
+BACKOFF_MAX_SECONDS = 8 # Cap for one backoff step; Retry-After from the upstream wins over it
+MODEL_UNAVAILABLE_COOLDOWN = 600 # Seconds a model that answered 404 is skipped by the fallback order
+
+# --- RESULT CACHE ---
+RESULT_CACHE_TTL = 900 # Seconds a verdict is reused before re-auditing
+RESULT_CACHE_MAX_ENTRIES = 1024 # LRU bound per worker
+COALESCE_WAIT_TIMEOUT = 55 # Seconds a request waits on an identical in-flight audit
+
+# --- BATCH VERIFICATION (/api/search/batch) ---
+BATCH_MAX_CLAIMS = 500 # Claims accepted per request
+BATCH_CONCURRENCY = 8 # Audits in flight at once per batch; callers may ask for fewer
+BATCH_SHARE_SIMILARITY = 0.6 # Word-set Jaccard at which two claims share one retrieval
+
+# --- MEDIA UPLOADS (/api/verify-media) ---
+MEDIA_MAX_UPLOAD_BYTES = 10 * 1024 * 1024 # Larger uploads are rejected with 413
+MEDIA_MAX_DIMENSION = 1600 # Longest edge sent to the vision model
+MEDIA_REENCODE_BYTES = 1024 * 1024 # Images above this are re-encoded even if small enough
+MEDIA_JPEG_QUALITY = 85
+MEDIA_CACHE_TTL = 24 * 3600 # Seconds an image -> extracted query mapping is reused
+MEDIA_CACHE_MAX_ENTRIES = 2048
+MEDIA_PHASH_DISTANCE = 48 # Max differing bits (of 1024) for a cached image to be pixel-checked as the same one
+MEDIA_CONFIRM_SIZE = 128 # Edge of the grayscale thumbnail kept per cached image for that check
+MEDIA_CONFIRM_MAX_DIFF = 14 # Max grey levels any thumbnail pixel may move; one changed digit moves ~20
+
+# --- LOCAL INDEX (BM25 over ingested articles and fact-checks) ---
+LOCAL_TOP_K = 6 # Documents taken from the local tier per query
+LOCAL_MIN_COVERAGE = 0.6 # Share of (idf-weighted) query terms a local hit must contain
+LOCAL_MIN_HITS = 3 # Covering hits needed to skip web retrieval entirely
+LOCAL_INDEX_REFRESH_SECONDS = 300 # Incremental pull of newly ingested documents
+LOCAL_INDEX_COMPACT_MIN = 1024 # Replaced/removed slots kept before the index is compacted...
+LOCAL_INDEX_COMPACT_RATIO = 0.25 # ...once they are also this share of all slots
+INGEST_UPDATES_LOCAL_INDEX = os.getenv("INGEST_UPDATES_LOCAL_INDEX", "0") == "1" # Also add written documents to this process's index and claim matcher; only useful when ingestion runs inside the API process
+
+# --- PROMPT CONTEXT (passages sent to Gemini) ---
+CONTEXT_TOKEN_BUDGET = 3000 # Upper bound for the CONSENSUS + ALTERNATIVE sections together
+CONTEXT_ALTERNATIVE_SHARE = 0.3 # Most of the budget the ALTERNATIVE section may take
+CONTEXT_MAX_PASSAGE_TOKENS = 600 # One long page cannot crowd out the other sources
+CONTEXT_MIN_PASSAGE_TOKENS = 60 # A passage cut shorter than this is dropped instead
+CONTEXT_DUPLICATE_JACCARD = 0.6 # Estimated shingle overlap at which a passage counts as a syndicated copy
+CHARS_PER_TOKEN = 4 # Rough Gemini tokenizer ratio for English news text
+MINHASH_SHINGLE_SIZE = 5 # Words per shingle
+MINHASH_SKETCH_SIZE = 64 # Smallest shingle hashes kept per text
+
+# --- CLAIM MATCHING (stored fact-check verdicts answered without retrieval) ---
+CLAIM_MATCH_JACCARD = 0.8 # Word + word-pair overlap at which a query counts as a stored claim reworded (same content words required too)
+CLAIM_MATCH_MIN_TERMS = 4 # Shorter queries are too vague to pin to a single fact-check
 
 # --- AI SYSTEM INSTRUCTION (Core of P2.3) ---
 SYSTEM_INSTRUCTION = """
@@ -40,9 +105,15 @@ RULES:
 # --- GOLD STANDARD SOURCES (Based on Data Scientist's List) ---
 # NOTE: The Backend Developer must find active RSS feeds or web pages for these.
 
+# Domains ranked above ordinary web results. Matching is by domain suffix, so
+# subdomains (m.thehindu.com) count and URL paths never do.
+GOLDEN_DOMAINS: List[str] = ["pib.gov.in", "boomlive.in", "factly.in", "altnews.in"]
+CONSENSUS_DOMAINS: List[str] = ["thehindu.com", "indianexpress.com", "reuters.com", "apnews.com", "aniin.com"]
+
 # Database Collection Names
 RAW_NEWS_COLLECTION = "raw_news_articles"
 FACT_CHECKS_COLLECTION = "fact_checks_verdicts"
+TREND_ROLLUP_COLLECTION = "trend_rollups" # One document per day: compressed term -> mention counts
 
 # 1. RSS/Agency Sources (For bulk, neutral content scraping)
 # --- DIVERSIFIED RSS SOURCES (Balanced Perspective) ---
@@ -73,6 +144,44 @@ FACT_CHECK_SOURCES: Dict[str, str] = {
     "Factly": "https://factly.in/category/fact-check/"
     # Add other sources like 'Newschecker', 'Vishvas News' after prototyping
 }
+
+# --- FACT-CHECK CRAWLER (listing pages -> article pages) ---
+FACT_CHECK_MAX_PAGES = 5 # Listing pages followed per source per run when the last ingested article is not found sooner
+FACT_CHECK_MAX_ARTICLES = 100 # Article pages fetched per source per run
+FACT_CHECK_ARTICLE_WORKERS = 8 # Article pages fetched concurrently per source
+FACT_CHECK_PER_HOST = 2 # Requests in flight to one host at a time
+FACT_CHECK_HOST_DELAY = 0.5 # Seconds between request starts to one host (a longer robots.txt Crawl-delay wins)
+
+# --- INGESTION RUNTIME ---
+INGEST_MAX_WORKERS = 8 # Feeds fetched concurrently per cycle
+INGEST_POOL_PER_HOST = 4 # Keep-alive connections kept per feed host
+INGEST_TIMEOUT = 15 # Seconds per feed request
+RSS_PARSER = os.getenv("RSS_PARSER", "stream") # "stream" (lxml iterparse) or "soup" (BeautifulSoup full tree)
+FIRESTORE_BATCH_SIZE = 400 # Writes per batch commit (Firestore hard limit is 500)
+FIRESTORE_WRITE_WORKERS = 4 # Batches committed in parallel
+INGEST_STATE_DB = os.getenv("INGEST_STATE_DB", ".fairgpt_state/ingest_state.db") # Local ETag/seen-item state
+
+# --- CORPUS SNAPSHOT (python corpus_snapshot.py export | delta | compact | info) ---
+CORPUS_SNAPSHOT_PATH = os.getenv("CORPUS_SNAPSHOT_PATH", ".fairgpt_state/corpus.snap") # Columnar copy of both collections that workers bootstrap from
+CORPUS_SNAPSHOT_BLOCK_ROWS = 1024 # Rows per compressed text block; a random read decompresses one block
+CORPUS_SNAPSHOT_PAGE_SIZE = 1000 # Documents per Firestore page while exporting
+CORPUS_SNAPSHOT_MAX_DELTAS = 8 # Delta files kept before `delta` folds them into the base snapshot
+
+# --- INGESTION SCHEDULER (python ingest_scheduler.py) ---
+INGEST_INITIAL_INTERVAL = 900 # Seconds between polls of a feed with no history yet
+INGEST_MIN_INTERVAL = 120 # Fastest any feed is polled, however often it changes
+INGEST_MAX_INTERVAL = 6 * 3600 # Slowest a healthy feed is polled
+INGEST_SPEEDUP = 0.8 # Interval multiplier after a poll that found new items (with the slowdown, settles where about half the polls find news)
+INGEST_SLOWDOWN = 1.25 # Interval multiplier after a poll that found nothing new
+INGEST_FAILURE_BACKOFF_MAX = 12 * 3600 # Cap for the exponential backoff of a failing feed
+INGEST_JITTER = 0.15 # +/- share of every delay, so feeds drift apart instead of firing together
+INGEST_BATCH_WINDOW = 15 # Feeds due within this many seconds of each other are fetched in one cycle
+INGEST_STARTUP_SPREAD = 60 # Feeds overdue at startup (e.g. after downtime) are spread over this many seconds
+
+# --- TREND ROLLUPS (trend_history from per-day term counts kept at ingestion) ---
+TREND_DAYS = 7 # Days shown in a response's trend_history
+TREND_RETENTION_DAYS = 35 # Days of rollups kept locally and loaded by the API
+TREND_REFRESH_SECONDS = 600 # How often the API re-reads the recent rollups from Firestore
 # --- BIAS & SENSATIONALISM CONFIG ---
 LOADED_WORDS = {
     "sensationalist": ["shocking", "disaster", "historic", "shameful", "triumph", "miracle", "chaos", "brutal"],
@@ -80,4 +189,7 @@ LOADED_WORDS = {
     "speculative": ["may be", "could lead to", "rumored", "allegedly", "sources claim"]
 }
 
-BIAS_THRESHOLD = 0.25  # Articles above this score will be flagged
\ No newline at end of file
+BIAS_THRESHOLD = 0.25  # Articles above this score will be flagged
+BIAS_SCORER_VERSION = 3 # Bump when LOADED_WORDS or the scoring rule changes; older scores get recomputed
+RESCORE_PAGE_SIZE = 500 # Documents read per cursor page by the re-scoring job
+RESCORE_WORKERS = os.cpu_count() or 2 # Scoring processes
\ No newline at end of file
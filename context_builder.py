@@ -0,0 +1,122 @@
+# context_builder.py
+# Builds the CONSENSUS / ALTERNATIVE prompt sections from retrieved passages:
+# syndicated near-duplicates are dropped, the rest ranked by source tier and query
+# relevance, and the whole thing fitted to CONTEXT_TOKEN_BUDGET.
+from typing import Dict, List, Tuple
+
+from config import (
+    CONTEXT_TOKEN_BUDGET, CONTEXT_ALTERNATIVE_SHARE, CONTEXT_MAX_PASSAGE_TOKENS,
+    CONTEXT_MIN_PASSAGE_TOKENS, CONTEXT_DUPLICATE_JACCARD, CHARS_PER_TOKEN
+)
+from minhash import shingles, sketch, estimate_jaccard
+from source_reputation import SOURCE_REGISTRY
+from text_utils import tokenize
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def format_passage(url, content: str) -> str:
+    return f"SOURCE: {url}\n{content}"
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cuts at the last word boundary that fits, marking the cut with an ellipsis."""
+    limit = max(tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:max(limit - 1, 0)]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > limit // 2 else cut).rstrip() + "…"
+
+
+def _passages(results: List[dict], query_terms: set) -> List[Dict]:
+    passages = []
+    for order, r in enumerate(results):
+        content = (r.get('content') or "").strip()
+        if not content:
+            continue
+        # Only the part that can reach the prompt is compared and scored
+        head = content[:CONTEXT_MAX_PASSAGE_TOKENS * CHARS_PER_TOKEN]
+        words = set(tokenize(head))
+        rank, _ = SOURCE_REGISTRY.lookup(r.get('url') or "")
+        passages.append({
+            "url": r.get('url'),
+            "content": content,
+            "rank": rank,
+            "relevance": len(query_terms & words) / len(query_terms) if query_terms else 0.0,
+            "order": order,
+            "sketch": sketch(shingles(head)),
+        })
+    # Golden before consensus before the open web; within a tier, the closest match first
+    passages.sort(key=lambda p: (p["rank"], -p["relevance"], p["order"]))
+    return passages
+
+
+def _drop_duplicates(passages: List[Dict], kept: List[Dict]) -> Tuple[List[Dict], int]:
+    """Keeps a passage only if it is not a near-copy of a better-ranked one already kept."""
+    unique, dropped = [], 0
+    for p in passages:
+        if any(estimate_jaccard(p["sketch"], k["sketch"]) >= CONTEXT_DUPLICATE_JACCARD for k in kept):
+            dropped += 1
+            continue
+        kept.append(p)
+        unique.append(p)
+    return unique, dropped
+
+
+def _fit(passages: List[Dict], budget: int) -> Tuple[List[str], int, int]:
+    """Greedy fill in rank order. Returns (blocks, truncated, dropped_for_budget)."""
+    blocks, used, truncated, dropped = [], 0, 0, 0
+    for p in passages:
+        header_tokens = estimate_tokens(format_passage(p["url"], ""))
+        allowed = min(budget - used, CONTEXT_MAX_PASSAGE_TOKENS + header_tokens) - header_tokens
+        if allowed < CONTEXT_MIN_PASSAGE_TOKENS and estimate_tokens(p["content"]) > allowed:
+            dropped += 1
+            continue
+        content = truncate_to_tokens(p["content"], allowed)
+        truncated += content != p["content"]
+        block = format_passage(p["url"], content)
+        blocks.append(block)
+        used += estimate_tokens(block) + 1
+    return blocks, truncated, dropped
+
+
+def build_context(user_query: str, consensus_results: List[dict], alternative_results: List[dict],
+                  budget: int = CONTEXT_TOKEN_BUDGET) -> Tuple[str, str, Dict]:
+    """Returns (consensus_text, alternative_text, report).
+
+    Consensus passages win ties: an alternative passage that is a copy of a consensus
+    one is dropped, since it adds no opposing view. The alternative section gets at
+    most CONTEXT_ALTERNATIVE_SHARE of the budget; consensus gets whatever it leaves.
+    """
+    query_terms = set(tokenize(user_query))
+    consensus = _passages(consensus_results, query_terms)
+    alternative = _passages(alternative_results, query_terms)
+
+    kept = []
+    consensus, consensus_dups = _drop_duplicates(consensus, kept)
+    alternative, alternative_dups = _drop_duplicates(alternative, kept)
+
+    alt_blocks, alt_truncated, alt_dropped = _fit(alternative, int(budget * CONTEXT_ALTERNATIVE_SHARE))
+    alternative_text = "\n\n".join(alt_blocks)
+    con_blocks, con_truncated, con_dropped = _fit(consensus, budget - estimate_tokens(alternative_text))
+    consensus_text = "\n\n".join(con_blocks)
+
+    # What the unbounded prompt would have carried: every passage in full
+    tokens_in = sum(estimate_tokens(format_passage(r.get('url'), r.get('content') or "")) + 1
+                    for r in consensus_results + alternative_results)
+    tokens_out = estimate_tokens(consensus_text) + estimate_tokens(alternative_text)
+    report = {
+        "tokenBudget": budget,
+        "tokensIn": tokens_in,
+        "tokensOut": tokens_out,
+        "tokensSaved": max(tokens_in - tokens_out, 0),
+        "passagesIn": len(consensus_results) + len(alternative_results),
+        "passagesOut": len(con_blocks) + len(alt_blocks),
+        "duplicatesDropped": consensus_dups + alternative_dups,
+        "truncated": con_truncated + alt_truncated,
+        "droppedForBudget": con_dropped + alt_dropped,
+    }
+    return consensus_text, alternative_text, report
@@ -0,0 +1,332 @@
+# corpus_snapshot.py
+# Columnar on-disk copy of raw_news_articles and fact_checks_verdicts, so a worker can
+# bootstrap its local indexes from one mmap'd file instead of reading every document
+# out of Firestore.
+#
+#   python corpus_snapshot.py export    full export (replaces the snapshot and its deltas)
+#   python corpus_snapshot.py delta     documents ingested since the last export/delta
+#   python corpus_snapshot.py compact   folds the deltas into the base snapshot
+#   python corpus_snapshot.py info
+#
+# Layout of one segment file (the base snapshot and every delta share it):
+#   b"FGSNAP1\n" | uint32 header length | JSON header | 8-byte aligned columns
+# Fixed-width columns (collection, ingested, bias_score) are raw little-endian arrays
+# read in place through memoryview.cast. Text columns are zlib blocks of
+# CORPUS_SNAPSHOT_BLOCK_ROWS NUL-separated strings, located by offsets in the header.
+import array
+import datetime
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import (
+    RAW_NEWS_COLLECTION, FACT_CHECKS_COLLECTION, CORPUS_SNAPSHOT_PATH, CORPUS_SNAPSHOT_BLOCK_ROWS,
+    CORPUS_SNAPSHOT_PAGE_SIZE, CORPUS_SNAPSHOT_MAX_DELTAS
+)
+
+MAGIC = b"FGSNAP1\n"
+COLLECTIONS = (RAW_NEWS_COLLECTION, FACT_CHECKS_COLLECTION)  # index = value of the `collection` column
+
+# name -> array typecode; NaN marks "not set" in the float columns
+FIXED_COLUMNS = {"collection": "B", "ingested": "d", "bias_score": "f"}
+# Every field the ingestion pipeline stores. New columns go at the end; segments written
+# before a column existed simply lack it (see Segment.items)
+TEXT_COLUMNS = ("doc_id", "url", "source", "title", "summary_text", "pub_date",
+                "claim", "verdict", "rating", "headline", "claimant", "published_date", "extraction",
+                "app_id")
+
+if sys.byteorder != "little":
+    raise ImportError("corpus_snapshot assumes a little-endian host")
+
+
+def _timestamp(value) -> float:
+    # Firestore hands back DatetimeWithNanoseconds; unresolved sentinels have no timestamp
+    return value.timestamp() if hasattr(value, "timestamp") else math.nan
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).replace("\x00", "")
+
+
+# --- WRITING ---
+
+def _pad(out, position: int) -> int:
+    padding = -position % 8
+    out.write(b"\x00" * padding)
+    return position + padding
+
+
+def write_segment(path: str, rows: List[Tuple[str, str, dict]], block_rows: int = CORPUS_SNAPSHOT_BLOCK_ROWS) -> dict:
+    """Writes (collection, doc_id, document) rows as one segment, atomically. Returns its header."""
+    columns: Dict[str, bytes] = {}
+    fixed = {name: array.array(code) for name, code in FIXED_COLUMNS.items()}
+    for collection_name, _, doc in rows:
+        fixed["collection"].append(COLLECTIONS.index(collection_name))
+        fixed["ingested"].append(_timestamp(doc.get("ingestion_date")))
+        score = doc.get("bias_score")
+        fixed["bias_score"].append(score if isinstance(score, (int, float)) else math.nan)
+    for name, values in fixed.items():
+        columns[name] = values.tobytes()
+
+    blocks: Dict[str, List[int]] = {}
+    for name in TEXT_COLUMNS:
+        data, offsets = bytearray(), [0]
+        for start in range(0, len(rows), block_rows):
+            chunk = rows[start:start + block_rows]
+            strings = [doc_id if name == "doc_id" else _text(doc.get(name)) for _, doc_id, doc in chunk]
+            data += zlib.compress("\x00".join(strings).encode(), 6)
+            offsets.append(len(data))
+        columns[name] = bytes(data)
+        blocks[name] = offsets
+
+    ingested = [t for t in fixed["ingested"] if not math.isnan(t)]
+    header = {"version": 1, "rows": len(rows), "created": time.time(), "block_rows": block_rows,
+              "max_ingested": max(ingested) if ingested else None, "columns": {}}
+    # Offsets depend on the header's own length: lay the columns out behind a reserved
+    # header size and grow the reservation until the header fits (pads with spaces)
+    reserved = 0
+    while True:
+        position = len(MAGIC) + 4 + reserved
+        position += -position % 8
+        for name, data in columns.items():
+            header["columns"][name] = {"offset": position, "length": len(data),
+                                       **({"type": FIXED_COLUMNS[name]} if name in FIXED_COLUMNS
+                                          else {"type": "text", "blocks": blocks[name]})}
+            position += len(data) + (-len(data) % 8)
+        encoded = json.dumps(header, separators=(",", ":")).encode()
+        if len(encoded) <= reserved:
+            encoded = encoded.ljust(reserved)
+            break
+        reserved = len(encoded) + 64
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as out:
+        out.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        position = _pad(out, len(MAGIC) + 4 + len(encoded))
+        for name, data in columns.items():
+            assert position == header["columns"][name]["offset"]
+            out.write(data)
+            position = _pad(out, position + len(data))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, path)
+    return header
+
+
+# --- READING ---
+
+class Segment:
+    """One mmap'd segment. Fixed-width columns are zero-copy views; text is decompressed
+    a block at the time, and the last block read per column is kept."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a corpus snapshot")
+        (length,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[start:start + length])
+        self._view = memoryview(self._mmap)
+        self._fixed = {}
+        for name, column in self.header["columns"].items():
+            if column["type"] != "text":
+                self._fixed[name] = self._view[column["offset"]:column["offset"] + column["length"]].cast(column["type"])
+        self._blocks: Dict[str, Tuple[int, List[str]]] = {}
+
+    def __len__(self):
+        return self.header["rows"]
+
+    def fixed(self, name: str) -> memoryview:
+        return self._fixed[name]
+
+    def _block(self, name: str, block: int) -> List[str]:
+        cached = self._blocks.get(name)
+        if cached and cached[0] == block:
+            return cached[1]
+        column = self.header["columns"][name]
+        start, end = column["blocks"][block], column["blocks"][block + 1]
+        base = column["offset"]
+        values = zlib.decompress(self._view[base + start:base + end]).decode().split("\x00")
+        self._blocks[name] = (block, values)
+        return values
+
+    def text(self, name: str, row: int) -> str:
+        block_rows = self.header["block_rows"]
+        return self._block(name, row // block_rows)[row % block_rows]
+
+    def column(self, name: str) -> List[str]:
+        column = self.header["columns"][name]
+        return [value for block in range(len(column["blocks"]) - 1) for value in self._block(name, block)]
+
+    def keys(self) -> List[Tuple[int, str]]:
+        return list(zip(self._fixed["collection"], self.column("doc_id")))
+
+    def items(self, skip=frozenset()) -> Iterator[Tuple[str, str, dict]]:
+        """(collection, doc_id, document) rows, rebuilt as the documents were stored."""
+        texts = {name: self.column(name) for name in TEXT_COLUMNS if name in self.header["columns"]}
+        collection, ingested, bias = self._fixed["collection"], self._fixed["ingested"], self._fixed["bias_score"]
+        for row in range(len(self)):
+            key = (collection[row], texts["doc_id"][row])
+            if key in skip:
+                continue
+            doc = {name: values[row] for name, values in texts.items() if name != "doc_id" and values[row]}
+            if not math.isnan(ingested[row]):
+                doc["ingestion_date"] = datetime.datetime.fromtimestamp(ingested[row], datetime.timezone.utc)
+            if not math.isnan(bias[row]):
+                doc["bias_score"] = round(bias[row], 6)
+            yield COLLECTIONS[key[0]], key[1], doc
+
+    def close(self):
+        self._blocks.clear()
+        for view in self._fixed.values():
+            view.release()
+        self._view.release()
+        self._mmap.close()
+
+
+def delta_paths(path: str) -> List[str]:
+    return sorted(glob.glob(f"{glob.escape(path)}.delta-*"))
+
+
+class Corpus:
+    """The base snapshot plus its deltas; a document in a newer segment replaces the
+    older copy. Deletions are only picked up by a full export."""
+
+    def __init__(self, path: str):
+        self.segments = [Segment(p) for p in [path] + delta_paths(path)]
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    @property
+    def max_ingested(self) -> Optional[float]:
+        stamps = [s.header["max_ingested"] for s in self.segments if s.header["max_ingested"] is not None]
+        return max(stamps) if stamps else None
+
+    def items(self) -> Iterator[Tuple[str, str, dict]]:
+        seen = set()
+        for segment in reversed(self.segments):
+            keys = segment.keys()
+            yield from segment.items(skip=seen)
+            seen.update(keys)
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+
+def open_corpus(path: str = CORPUS_SNAPSHOT_PATH) -> Optional[Corpus]:
+    """The snapshot at `path` with its deltas, or None if there is none (or it is unreadable)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return Corpus(path)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Corpus snapshot {path} unreadable: {e}")
+        return None
+
+
+# --- FIRESTORE EXPORT ---
+
+def _stream_collection(collection_name: str, since: Optional[float], page_size: int):
+    from database_setup import public_collection
+    if since is not None:
+        from google.cloud.firestore_v1.base_query import FieldFilter
+        query = public_collection(collection_name).where(
+            filter=FieldFilter("ingestion_date", ">", datetime.datetime.fromtimestamp(since, datetime.timezone.utc)))
+        for doc in query.stream():
+            data = doc.to_dict()
+            # Re-checked here so a document without a usable timestamp never lands in a delta
+            if _timestamp(data.get("ingestion_date")) > since:
+                yield collection_name, doc.id, data
+        return
+    # Full pass: document-id cursor pages, like the bias re-scoring job
+    base_query = public_collection(collection_name).order_by("__name__").limit(page_size)
+    cursor = None
+    while True:
+        docs = list((base_query.start_after({"__name__": cursor}) if cursor else base_query).stream())
+        for doc in docs:
+            yield collection_name, doc.id, doc.to_dict()
+        if len(docs) < page_size: break
+        cursor = docs[-1].id
+
+
+def export_snapshot(path: str = CORPUS_SNAPSHOT_PATH, page_size: int = CORPUS_SNAPSHOT_PAGE_SIZE) -> Optional[dict]:
+    """Full export of both collections; replaces the base snapshot and drops its deltas."""
+    from database_setup import get_db
+    if not get_db(): return None
+    rows = [row for name in COLLECTIONS for row in _stream_collection(name, None, page_size)]
+    header = write_segment(path, rows)
+    for stale in delta_paths(path):
+        os.remove(stale)
+    return header
+
+
+def export_delta(path: str = CORPUS_SNAPSHOT_PATH, page_size: int = CORPUS_SNAPSHOT_PAGE_SIZE) -> Optional[dict]:
+    """Documents ingested since the newest one in the snapshot, as a new delta segment.
+    Falls back to a full export when there is no snapshot yet."""
+    corpus = open_corpus(path)
+    if corpus is None:
+        return export_snapshot(path, page_size)
+    from database_setup import get_db
+    with corpus:
+        since = corpus.max_ingested
+        deltas = len(corpus.segments) - 1
+    if not get_db(): return None
+    rows = [row for name in COLLECTIONS for row in _stream_collection(name, since, page_size)]
+    if not rows:
+        return {"rows": 0}
+    header = write_segment(f"{path}.delta-{deltas + 1:04d}", rows)
+    if deltas + 1 > CORPUS_SNAPSHOT_MAX_DELTAS:
+        compact(path)
+    return header
+
+
+def compact(path: str = CORPUS_SNAPSHOT_PATH) -> Optional[dict]:
+    """Rewrites base + deltas as one base segment, then removes the deltas."""
+    corpus = open_corpus(path)
+    if corpus is None: return None
+    with corpus:
+        stale = [s.path for s in corpus.segments[1:]]
+        rows = list(corpus.items())
+        header = write_segment(path, rows)
+    for delta in stale:
+        os.remove(delta)
+    return header
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "info"
+    started = time.perf_counter()
+    if command == "export":
+        header = export_snapshot()
+    elif command == "delta":
+        header = export_delta()
+    elif command == "compact":
+        header = compact()
+    elif command == "info":
+        corpus = open_corpus()
+        if corpus is None:
+            print(f"No corpus snapshot at {CORPUS_SNAPSHOT_PATH}.")
+        else:
+            with corpus:
+                for segment in corpus.segments:
+                    print(f"📦 {segment.path}: {len(segment)} rows, {os.path.getsize(segment.path) / 1e6:.1f} MB")
+        sys.exit(0)
+    else:
+        sys.exit(f"Unknown command {command!r}: use export, delta, compact or info.")
+    if header is None:
+        print("Cannot export. Check Firebase setup in database_setup.py.")
+    else:
+        print(f"✅ {command}: {header['rows']} documents in {time.perf_counter() - started:.1f}s.")
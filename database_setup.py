@@ -1,12 +1,15 @@
 import os
 import json
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 def initialize_firebase():
+    # firebase_admin pulls in the whole Firestore/gRPC stack, so it is only imported here
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     # 1. Try to get the JSON string from .env
     config_json_str = os.getenv("__firebase_config")
     
@@ -38,5 +41,30 @@ def initialize_firebase():
         print(f"❌ FATAL: Unexpected Error: {e}")
         return None
 
-# Create the global instance used by the pipeline
-DB = initialize_firebase()
\ No newline at end of file
+# The global instance used by the pipeline is created on first use, not at import,
+# so the search path (which never touches Firestore) does not pay for it on cold start.
+_db = None
+_db_initialized = False
+_db_lock = threading.Lock()
+
+def get_db():
+    """Returns the shared Firestore client, initializing it once; None if setup failed."""
+    global _db, _db_initialized
+    if not _db_initialized:
+        with _db_lock:
+            if not _db_initialized:
+                _db = initialize_firebase()
+                _db_initialized = True
+    return _db
+
+def __getattr__(name):
+    # Keeps `database_setup.DB` working for callers that predate get_db()
+    if name == "DB":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def public_collection(collection_name: str):
+    """artifacts -> {app_id} -> public -> data -> {collection_name}"""
+    app_id = os.getenv('APP_ID', 'default_app_id')
+    return get_db().collection('artifacts').document(app_id).collection('public') \
+             .document('data').collection(collection_name)
\ No newline at end of file
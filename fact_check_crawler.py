@@ -0,0 +1,382 @@
+# fact_check_crawler.py
+# Deep crawl of the FACT_CHECK_SOURCES listings: listing pages are followed back to the
+# last article already ingested, article pages are fetched concurrently under a per-host
+# politeness limit (robots.txt included), and each article's claim, verdict and publish
+# date come from its ClaimReview JSON-LD, falling back to per-site selectors and then to
+# "Claim: / Fact:" labels in the text.
+import contextlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib import robotparser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from config import (
+    FACT_CHECK_MAX_PAGES, FACT_CHECK_MAX_ARTICLES, FACT_CHECK_ARTICLE_WORKERS, FACT_CHECK_PER_HOST,
+    FACT_CHECK_HOST_DELAY
+)
+from telemetry import upstream_error
+
+# Markup per fact-checker. Listing pages: "links" selects article anchors, "link_pattern"
+# is a regex their path must match, "next" selects the next listing page. Article pages
+# (used when there is no ClaimReview JSON-LD): "claim", "verdict" and "date" selectors.
+SITE_PROFILES: Dict[str, dict] = {
+    "boomlive.in": {
+        "links": "a[href*='/fact-check/']",
+        "link_pattern": r"^/fact-check/[a-z0-9-]+-\d+/?$",
+        "next": "link[rel=next], a[rel=next], .pagination a.next",
+        "claim": ".claim-review-block .claim-value, .claim-block p",
+        "verdict": ".claim-review-block .fact-check-value, .verdict-block span",
+        "date": "meta[property='article:published_time'], time[datetime]",
+    },
+    "indiatoday.in": {
+        "links": "a[href*='/fact-check/story/']",
+        "link_pattern": r"^/fact-check/story/[a-z0-9-]+-\d+",
+        "next": "link[rel=next], a[rel=next], li.next a",
+        "claim": ".factcheck_box .claim, .fact-check-claim",
+        "verdict": ".factcheck_box .conclusion, .fact-check-verdict",
+        "date": "meta[property='article:published_time'], meta[itemprop=datePublished]",
+    },
+    "factly.in": {
+        "links": "h2.entry-title a",
+        "link_pattern": None,
+        "next": "link[rel=next], a.next.page-numbers",
+        "claim": ".post-content .claim, .entry-content p.claim",
+        "verdict": ".post-content .fact, .entry-content p.fact",
+        "date": "meta[property='article:published_time'], time.entry-date",
+    },
+}
+# Unknown fact-checkers: WordPress-style markup is the common case
+DEFAULT_PROFILE = {
+    "links": "h2.entry-title a, h3.entry-title a, article h2 a",
+    "link_pattern": None,
+    "next": "link[rel=next], a[rel=next], a.next",
+    "claim": None,
+    "verdict": None,
+    "date": "meta[property='article:published_time'], time[datetime]",
+}
+
+# Publisher ratings mapped onto one scale. Whole words only, and the first pattern that
+# matches wins: "mostly false" and the negated forms ("inaccurate", "not correct") are
+# listed before the plain "false" and "true" they contain or resemble.
+RATING_SCALE = (
+    (r"satire|satirical", "Satire"),
+    (r"(?:mostly|largely) (?:false|fake|incorrect|inaccurate)", "False"),
+    (r"(?:partly|partially|half) (?:false|fake|incorrect|inaccurate)", "Misleading"),
+    (r"misleading|missing context|out of context|lacks context|needs context", "Misleading"),
+    (r"not (?:true|accurate|correct|real|genuine)|untrue|inaccurate|incorrect|wrong", "False"),
+    (r"false|fake|altered|edited|morphed|doctored|manipulated|fabricated|hoax|scam|baseless", "False"),
+    (r"(?:mostly|partly|partially|half) (?:true|correct|accurate)|mixture|mixed", "Partly True"),
+    (r"unverified|unproven|unsubstantiated|no evidence", "Unverified"),
+    (r"true|correct|accurate", "True"),
+)
+_RATING_PATTERNS = [(re.compile(rf"\b(?:{pattern})\b"), rating) for pattern, rating in RATING_SCALE]
+
+_CLAIM_LABEL = re.compile(r"^\s*claim(?:\s+review)?\s*[:：-]\s*(.{10,400}?)\s*$", re.I | re.M)
+_VERDICT_LABEL = re.compile(r"^\s*(?:fact(?:\s*check)?|verdict|rating|conclusion)\s*[:：-]\s*(.{2,300}?)\s*$", re.I | re.M)
+
+
+def profile_for(url: str) -> dict:
+    host = (urlparse(url).hostname or "").lower()
+    for domain, profile in SITE_PROFILES.items():
+        if host == domain or host.endswith("." + domain):
+            return profile
+    return DEFAULT_PROFILE
+
+
+def normalize_rating(verdict: Optional[str]) -> str:
+    text = " ".join(re.sub(r"[^\w\s]", " ", (verdict or "").lower()).split())
+    for pattern, rating in _RATING_PATTERNS:
+        if pattern.search(text):
+            return rating
+    return "Unrated"
+
+
+# --- POLITENESS ---
+
+class HostLimiter:
+    """At most `per_host` requests in flight per host, starts spaced `delay` apart."""
+
+    def __init__(self, per_host: int = FACT_CHECK_PER_HOST, delay: float = FACT_CHECK_HOST_DELAY):
+        self.per_host, self.delay = per_host, delay
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._crawl_delay: Dict[str, float] = {}
+
+    def set_crawl_delay(self, host: str, seconds: float):
+        with self._lock:
+            self._crawl_delay[host] = seconds
+
+    @contextlib.contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).hostname or ""
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with slot:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, 0.0))
+                self._next_start[host] = start + max(self.delay, self._crawl_delay.get(host, 0.0))
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+class RobotsCache:
+    """robots.txt per host, fetched once per process; an unreachable file allows everything.
+    The fetch holds only that host's lock, so a slow host does not stall the others."""
+
+    def __init__(self, limiter: HostLimiter):
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._parsers: Dict[str, Optional[robotparser.RobotFileParser]] = {}
+
+    def allowed(self, session, url: str, user_agent: str) -> bool:
+        parsed = urlparse(url)
+        with self._lock:
+            host_lock = self._host_locks.setdefault(parsed.netloc, threading.Lock())
+        with host_lock:
+            if parsed.netloc not in self._parsers:
+                self._parsers[parsed.netloc] = self._load(session, f"{parsed.scheme}://{parsed.netloc}/robots.txt", user_agent)
+            parser = self._parsers[parsed.netloc]
+        return parser is None or parser.can_fetch(user_agent, url)
+
+    def _load(self, session, robots_url: str, user_agent: str) -> Optional[robotparser.RobotFileParser]:
+        try:
+            response = session.get(robots_url, headers={"User-Agent": user_agent}, timeout=10)
+        except Exception:
+            return None
+        parser = robotparser.RobotFileParser(robots_url)
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            return None
+        else:
+            parser.parse(response.text.splitlines())
+            delay = parser.crawl_delay(user_agent)
+            if delay:
+                self.limiter.set_crawl_delay(urlparse(robots_url).hostname or "", float(delay))
+        return parser
+
+
+HOST_LIMITER = HostLimiter()
+ROBOTS = RobotsCache(HOST_LIMITER)
+
+
+class Disallowed(Exception):
+    pass
+
+
+def polite_request(session, url: str, headers: dict, timeout: float):
+    """GET through robots.txt and the per-host limiter; the caller checks the status."""
+    if not ROBOTS.allowed(session, url, headers.get("User-Agent", "*")):
+        raise Disallowed(f"robots.txt disallows {url}")
+    with HOST_LIMITER.slot(url):
+        return session.get(url, headers=headers, timeout=timeout)
+
+
+def polite_get(session, url: str, headers: dict, timeout: float) -> bytes:
+    """polite_request that raises on HTTP errors and returns the body."""
+    response = polite_request(session, url, headers, timeout)
+    response.raise_for_status()
+    return response.content
+
+
+# --- EXTRACTION ---
+
+def _soup(content: bytes):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, "lxml")
+
+
+def listing_links(page_url: str, content: bytes, profile: dict) -> Tuple[List[str], Optional[str]]:
+    """Article URLs on one listing page (page order, deduplicated) and the next page URL."""
+    soup = _soup(content)
+    host = urlparse(page_url).hostname
+    pattern = re.compile(profile["link_pattern"]) if profile.get("link_pattern") else None
+    links, seen = [], set()
+    for anchor in soup.select(profile["links"]):
+        url = urljoin(page_url, anchor.get("href") or "").split("#")[0]
+        parsed = urlparse(url)
+        if parsed.hostname != host or url in seen or url.rstrip("/") == page_url.rstrip("/"):
+            continue
+        if pattern and not pattern.search(parsed.path):
+            continue
+        seen.add(url)
+        links.append(url)
+    next_tag = soup.select_one(profile["next"]) if profile.get("next") else None
+    next_url = urljoin(page_url, next_tag["href"]) if next_tag and next_tag.get("href") else None
+    return links, next_url if next_url != page_url else None
+
+
+def _json_ld(soup) -> Iterable[dict]:
+    """Every object in the page's JSON-LD blocks, nested ones (@graph, mainEntity) included."""
+    for script in soup.select("script[type='application/ld+json']"):
+        try:
+            stack = [json.loads(script.string or script.get_text() or "null")]
+        except ValueError:
+            continue
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, dict):
+                yield node
+                stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def claim_review(soup) -> Optional[dict]:
+    for node in _json_ld(soup):
+        kinds = node.get("@type")
+        if "ClaimReview" not in (kinds if isinstance(kinds, list) else [kinds]):
+            continue
+        rating = _first(node.get("reviewRating")) or {}
+        author = _first((_first(node.get("itemReviewed")) or {}).get("author")) or {}
+        return {
+            "claim": node.get("claimReviewed"),
+            "verdict": rating.get("alternateName") or rating.get("name") if isinstance(rating, dict) else None,
+            "published_date": node.get("datePublished"),
+            "claimant": author.get("name") if isinstance(author, dict) else author or None,
+        }
+    return None
+
+
+def _select_text(soup, selector: Optional[str]) -> Optional[str]:
+    if not selector:
+        return None
+    tag = soup.select_one(selector)
+    if tag is None:
+        return None
+    text = tag.get("content") or tag.get("datetime") or tag.get_text(" ", strip=True)
+    return text.strip() or None
+
+
+def extract_article(url: str, content: bytes, profile: dict) -> dict:
+    """Claim, verdict and date of one fact-check article; `extraction` records which
+    source won (claim_review, selectors, labels or headline) for data-quality checks."""
+    soup = _soup(content)
+    review = claim_review(soup) or {}
+    # Labels are only looked for in body text: headlines often read "Fact Check: <topic>"
+    text = "\n".join(tag.get_text(" ", strip=True) for tag in soup.select("p, li, td"))
+    headline = _select_text(soup, "meta[property='og:title']") or _select_text(soup, "h1") or _select_text(soup, "title")
+
+    extraction = "claim_review" if review.get("claim") and review.get("verdict") else None
+    claim = review.get("claim") or _select_text(soup, profile.get("claim"))
+    verdict = review.get("verdict") or _select_text(soup, profile.get("verdict"))
+    extraction = extraction or ("selectors" if claim and verdict else None)
+    if not claim:
+        match = _CLAIM_LABEL.search(text)
+        claim = match.group(1) if match else None
+    if not verdict:
+        match = _VERDICT_LABEL.search(text)
+        verdict = match.group(1) if match else None
+    extraction = extraction or ("labels" if claim and verdict else "headline")
+
+    return {
+        "url": url,
+        "headline": headline or "N/A",
+        "claim": claim or headline or "N/A",
+        "verdict": verdict or "Check URL for details",
+        "rating": normalize_rating(verdict),
+        "claimant": review.get("claimant") or "N/A",
+        "published_date": review.get("published_date") or _select_text(soup, profile.get("date")) or "N/A",
+        "extraction": extraction,
+    }
+
+
+# --- CRAWL ---
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "ref", "amp")
+
+def canonical_url(url: str) -> str:
+    """URL form used to compare listing links: lower-case host, no fragment, no tracking
+    parameters, no trailing slash. Listings that re-link an article with "?utm_source=..."
+    or a changed trailing slash still match the stored cursor."""
+    parsed = urlparse(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if not k.lower().startswith(_TRACKING_PARAMS)]
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path.rstrip("/") or "/",
+                       "", urlencode(sorted(query)), ""))
+
+
+def crawl_listing(listing_url: str, first_page: bytes, fetch: Callable[[str], bytes],
+                  stop_at: Optional[str] = None, known: Callable[[List[str]], Set[str]] = lambda urls: set()) -> dict:
+    """Fetches and extracts the articles published since the last run.
+
+    Listing pages are followed until `stop_at` (the newest article of the previous run)
+    shows up, a page is already wholly `known` (stored), there is no next page, or
+    FACT_CHECK_MAX_PAGES / FACT_CHECK_MAX_ARTICLES is reached. Links are compared in
+    their canonical_url form, so a cursor re-linked with a query string or trailing
+    slash still matches. Article pages are then fetched concurrently; `fetch` applies
+    the per-host limit.
+
+    Returns {articles (newest first), newest (cursor for the next run), pages, failed}.
+    `newest` is None, keeping the old cursor, when a cap cut the crawl short with
+    articles still pending or when a listing page or article failed, so those are
+    retried next run. A capped crawl that found nothing pending moves the cursor on:
+    the old one has fallen out of the listing and would otherwise be walked for on
+    every run. The caps bound how far back one run reaches, so a backlog deeper than
+    that is not backfilled.
+    """
+    profile = profile_for(listing_url)
+    page_url, content = listing_url, first_page
+    stop_key = canonical_url(stop_at) if stop_at else None
+    pending, listed, newest, pages, complete = [], set(), None, 0, False
+    while True:
+        pages += 1
+        links, next_url = listing_links(page_url, content, profile)
+        newest = newest or (links[0] if links else None)
+        fresh, keys = [], []
+        for url in links:
+            key = canonical_url(url)
+            if key not in listed:
+                listed.add(key)
+                fresh.append(url)
+                keys.append(key)
+        caught_up = stop_key in keys
+        if caught_up:
+            fresh = fresh[:keys.index(stop_key)]
+        stored = known(fresh)
+        pending.extend(url for url in fresh if url not in stored)
+        page_known = bool(fresh) and len(stored) == len(fresh)
+        if caught_up or page_known or not next_url:
+            complete = len(pending) <= FACT_CHECK_MAX_ARTICLES
+            break
+        if pages >= FACT_CHECK_MAX_PAGES or len(pending) >= FACT_CHECK_MAX_ARTICLES:
+            complete = not pending
+            print(f"⚠️ {listing_url}: crawl capped after {pages} pages, {len(pending)} articles; "
+                  + ("moving the cursor on." if complete else "keeping the old cursor."))
+            break
+        try:
+            page_url, content = next_url, fetch(next_url)
+        except Exception as e:
+            upstream_error("feed", e)
+            print(f"⚠️ Listing page {next_url} failed ({e}), crawling what was found so far.")
+            break
+    pending = pending[:FACT_CHECK_MAX_ARTICLES]
+
+    def article(url):
+        try:
+            return extract_article(url, fetch(url), profile)
+        except Exception as e:
+            upstream_error("feed", e)
+            print(f"⚠️ Fact-check article {url} failed: {e}")
+            return None
+
+    articles = []
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(FACT_CHECK_ARTICLE_WORKERS, len(pending))) as pool:
+            articles = list(pool.map(article, pending))
+    failed = sum(a is None for a in articles)
+    # A failed article must be retried next run, so the cursor only moves on a clean crawl
+    return {"articles": [a for a in articles if a], "newest": newest if complete and not failed else None,
+            "pages": pages, "failed": failed}
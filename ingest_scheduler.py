@@ -0,0 +1,128 @@
+# ingest_scheduler.py
+# Long-running ingestion: every RSS / fact-check source is polled on its own interval,
+# which shrinks while the feed keeps producing new items and grows while it does not.
+# Failing feeds back off exponentially, every delay is jittered, and the schedule lives
+# in IngestState so a restart picks up where the last process stopped.
+#
+#   python ingest_scheduler.py      (SIGINT / SIGTERM finish the running cycle, then exit)
+import random
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import (
+    INGEST_INITIAL_INTERVAL, INGEST_MIN_INTERVAL, INGEST_MAX_INTERVAL, INGEST_SPEEDUP, INGEST_SLOWDOWN,
+    INGEST_FAILURE_BACKOFF_MAX, INGEST_JITTER, INGEST_BATCH_WINDOW, INGEST_STARTUP_SPREAD
+)
+from database_setup import get_db
+from ingest_state import IngestState
+from ingestion_pipeline import all_sources, run_ingestion_cycle
+
+
+def new_entry(now: float) -> dict:
+    return {"interval": INGEST_INITIAL_INTERVAL, "next_due": now, "failures": 0, "last_changed": None}
+
+
+def reschedule(entry: dict, report: dict, now: float, rng: random.Random) -> dict:
+    """Next schedule entry for a feed after one poll.
+
+    A poll that found new items shortens the interval, one that found nothing (304 or
+    only known items) stretches it, so each feed settles near its own change rate
+    between INGEST_MIN_INTERVAL and INGEST_MAX_INTERVAL. Failures (fetch errors, or
+    items that could not be stored) keep the learned interval and back off from it.
+    """
+    if report["status"] == "error" or not report.get("saved", True):
+        failures = entry["failures"] + 1
+        interval, last_changed = entry["interval"], entry["last_changed"]
+        delay = min(interval * 2 ** failures, INGEST_FAILURE_BACKOFF_MAX)
+    else:
+        failures = 0
+        changed = report.get("new_items", len(report["items"])) > 0
+        interval = entry["interval"] * (INGEST_SPEEDUP if changed else INGEST_SLOWDOWN)
+        interval = min(max(interval, INGEST_MIN_INTERVAL), INGEST_MAX_INTERVAL)
+        last_changed = now if changed else entry["last_changed"]
+        delay = interval
+    return {"interval": interval, "failures": failures, "last_changed": last_changed,
+            "next_due": now + delay * rng.uniform(1 - INGEST_JITTER, 1 + INGEST_JITTER)}
+
+
+class IngestScheduler:
+    """Runs due feeds through run_ingestion_cycle and keeps their schedule.
+
+    Feeds due within INGEST_BATCH_WINDOW of each other share one cycle (one HTTP
+    session, one Firestore batch per collection). The schedule is saved after every
+    cycle; entries are keyed by feed URL, so renamed sources keep their history and
+    sources removed from config.py are simply no longer polled.
+    """
+
+    def __init__(self, state: IngestState, sources: Optional[List[tuple]] = None,
+                 clock=time.time, rng: random.Random = None, cycle=run_ingestion_cycle):
+        self.state, self.clock, self.cycle = state, clock, cycle
+        self.sources = {url: (kind, name, url) for kind, name, url in (all_sources() if sources is None else sources)}
+        self.rng = rng or random.Random()
+        self._stop = threading.Event()
+        self.schedule = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        saved = self.state.get_feed_schedules()
+        now = self.clock()
+        schedule = {}
+        for url in self.sources:
+            entry = saved.get(url) or new_entry(now)
+            # New feeds, and feeds that fell due while we were down, would otherwise all fire at once
+            if entry["next_due"] <= now:
+                entry["next_due"] = now + self.rng.uniform(0, INGEST_STARTUP_SPREAD)
+            schedule[url] = entry
+        return schedule
+
+    def due(self, now: float) -> List[tuple]:
+        return [self.sources[url] for url, entry in self.schedule.items()
+                if entry["next_due"] <= now + INGEST_BATCH_WINDOW]
+
+    def seconds_until_due(self, now: float) -> float:
+        return max(min(entry["next_due"] for entry in self.schedule.values()) - now, 0.0) if self.schedule else INGEST_MAX_INTERVAL
+
+    def run_once(self) -> List[dict]:
+        """Polls whatever is due now and reschedules it. Returns the feed reports."""
+        sources = self.due(self.clock())
+        if not sources:
+            return []
+        reports = self.cycle(self.state, sources=sources)
+        now = self.clock()
+        for report in reports:
+            entry = self.schedule[report["url"]] = reschedule(self.schedule[report["url"]], report, now, self.rng)
+            status = f"failing ({entry['failures']}x)" if entry["failures"] else f"{report.get('new_items', 0)} new"
+            print(f"🗓️ {report['source']}: {status}, next poll in {(entry['next_due'] - now) / 60:.1f} min "
+                  f"(interval {entry['interval'] / 60:.1f} min)")
+        self.state.save_feed_schedules({r["url"]: self.schedule[r["url"]] for r in reports})
+        return reports
+
+    def run_forever(self):
+        print(f"🚀 Ingestion scheduler started for {len(self.sources)} sources.")
+        while not self._stop.is_set():
+            wait = self.seconds_until_due(self.clock())
+            if wait > 0:
+                # Wakes early on stop(); otherwise sleeps until the next feed is due
+                self._stop.wait(wait)
+                continue
+            self.run_once()
+        print("🛑 Ingestion scheduler stopped.")
+
+    def stop(self, *_):
+        """Signal-safe: the running cycle finishes and its schedule is saved before exit."""
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    if not get_db():
+        print("Cannot run scheduler. Check Firebase setup in database_setup.py.")
+    else:
+        state = IngestState()
+        scheduler = IngestScheduler(state)
+        signal.signal(signal.SIGINT, scheduler.stop)
+        signal.signal(signal.SIGTERM, scheduler.stop)
+        try:
+            scheduler.run_forever()
+        finally:
+            state.close()
@@ -0,0 +1,171 @@
+# ingest_state.py
+# Local, persistent ingestion state (SQLite). Lets repeated ingestion runs skip
+# work that was already done: unchanged feeds, already-seen items, etc.
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import INGEST_STATE_DB
+
+
+class IngestState:
+    def __init__(self, path: str = INGEST_STATE_DB):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection shared by the ingestion worker threads, serialized by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS feed_validators (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    updated_at REAL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_items (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    updated_at REAL,
+                    PRIMARY KEY (collection, doc_id)
+                ) WITHOUT ROWID""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_checkpoints (
+                    job TEXT PRIMARY KEY,
+                    cursor TEXT,
+                    updated_at REAL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS feed_schedule (
+                    url TEXT PRIMARY KEY,
+                    interval REAL NOT NULL,
+                    next_due REAL NOT NULL,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    last_changed REAL,
+                    updated_at REAL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS term_rollup (
+                    day TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    documents INTEGER NOT NULL,
+                    PRIMARY KEY (day, term)
+                ) WITHOUT ROWID""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS feed_cursors (
+                    url TEXT PRIMARY KEY,
+                    last_seen_link TEXT,
+                    updated_at REAL
+                )""")
+
+    # --- CONDITIONAL GET VALIDATORS ---
+
+    def get_validators(self, url: str) -> dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM feed_validators WHERE url = ?", (url,)).fetchone()
+        return {"etag": row[0], "last_modified": row[1]} if row else {}
+
+    def save_validators(self, url: str, etag: Optional[str], last_modified: Optional[str]):
+        if not etag and not last_modified: return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_validators (url, etag, last_modified, updated_at) VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, time.time()))
+
+    # --- SEEN-ITEM INDEX (skip unchanged writes) ---
+
+    def get_seen_hashes(self, collection: str, doc_ids: List[str]) -> Dict[str, str]:
+        """Returns {doc_id: content_hash} for the ids already written."""
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(doc_ids), 500):
+                chunk = doc_ids[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT doc_id, content_hash FROM seen_items WHERE collection = ? AND doc_id IN ({','.join('?' * len(chunk))})",
+                    (collection, *chunk)).fetchall()
+                found.update(rows)
+        return found
+
+    def mark_seen(self, collection: str, entries: List[Tuple[str, str]]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO seen_items (collection, doc_id, content_hash, updated_at) VALUES (?, ?, ?, ?)",
+                [(collection, doc_id, digest, now) for doc_id, digest in entries])
+
+    # --- LAST-SEEN ITEM (streaming parser early stop) ---
+
+    def get_last_seen(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT last_seen_link FROM feed_cursors WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def save_last_seen(self, url: str, link: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_cursors (url, last_seen_link, updated_at) VALUES (?, ?, ?)",
+                (url, link, time.time()))
+
+    # --- POLLING SCHEDULE (ingest_scheduler.py) ---
+
+    def get_feed_schedules(self) -> Dict[str, dict]:
+        """{url: {interval, next_due, failures, last_changed}}; times are epoch seconds."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, interval, next_due, failures, last_changed FROM feed_schedule").fetchall()
+        return {url: {"interval": interval, "next_due": next_due, "failures": failures, "last_changed": last_changed}
+                for url, interval, next_due, failures, last_changed in rows}
+
+    def save_feed_schedules(self, entries: Dict[str, dict]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO feed_schedule (url, interval, next_due, failures, last_changed, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(url, e["interval"], e["next_due"], e["failures"], e.get("last_changed"), now) for url, e in entries.items()])
+
+    # --- TREND ROLLUPS (trend_rollup.py) ---
+
+    def add_term_counts(self, day: str, counts: Dict[str, int]):
+        """Adds to the day's per-term document counts; "" counts the documents themselves."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO term_rollup (day, term, documents) VALUES (?, ?, ?) "
+                "ON CONFLICT (day, term) DO UPDATE SET documents = documents + excluded.documents",
+                [(day, term, n) for term, n in counts.items()])
+
+    def get_term_counts(self, day: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT term, documents FROM term_rollup WHERE day = ?", (day,)).fetchall())
+
+    def prune_term_counts(self, before_day: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM term_rollup WHERE day < ?", (before_day,))
+
+    # --- RESUMABLE JOB CHECKPOINTS ---
+
+    def get_checkpoint(self, job: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT cursor FROM job_checkpoints WHERE job = ?", (job,)).fetchone()
+        return row[0] if row else None
+
+    def save_checkpoint(self, job: str, cursor: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_checkpoints (job, cursor, updated_at) VALUES (?, ?, ?)",
+                (job, cursor, time.time()))
+
+    def clear_checkpoint(self, job: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM job_checkpoints WHERE job = ?", (job,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -5,7 +5,10 @@
 
 import os
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+from io import BytesIO
 import json
 import time
 from typing import List, Dict, Any, Optional
@@ -15,122 +18,409 @@ from firebase_admin import credentials, firestore
 # --- Project Imports ---
 from config import (
     RSS_SOURCES, FACT_CHECK_SOURCES, RAW_NEWS_COLLECTION, 
-    FACT_CHECKS_COLLECTION, API_URL_BASE, MODEL_NAME, SYSTEM_INSTRUCTION
+    FACT_CHECKS_COLLECTION, API_URL_BASE, MODEL_NAME, SYSTEM_INSTRUCTION,
+    INGEST_MAX_WORKERS, INGEST_POOL_PER_HOST, INGEST_TIMEOUT, RSS_PARSER,
+    FIRESTORE_BATCH_SIZE, FIRESTORE_WRITE_WORKERS, INGEST_UPDATES_LOCAL_INDEX
 )
-from database_setup import DB
-# Note: Since the DB setup handles initialization, we only need to access DB here.
+from database_setup import get_db
+from ingest_state import IngestState
+from fact_check_crawler import crawl_listing, polite_get, polite_request
+from local_index import LOCAL_INDEX
+from claim_matcher import CLAIM_MATCHER
+from trend_rollup import TREND_ROLLUP
+from telemetry import span, upstream_error
+# Note: Since the DB setup handles initialization, we only need to call get_db() here.
 
 
 # --- PART 1: SCRAPING FUNCTIONS (P2.2) ---
 
 app_id=os.getenv('APP_ID', 'default_app_id')    
-def scrape_rss_feed(source_name: str, url: str) -> List[Dict[str, Any]]:
-    """Implements the RSS/XML scraping logic for news agencies."""
+
+RSS_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/rss+xml, application/xml, text/xml, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+FACT_CHECK_HEADERS = {'User-Agent': 'NewsGPT/1.0'}
+
+def build_http_session(pool_per_host: int = INGEST_POOL_PER_HOST) -> requests.Session:
+    """One session per ingestion cycle so keep-alive connections are reused per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=len(RSS_SOURCES) + len(FACT_CHECK_SOURCES), pool_maxsize=pool_per_host)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def conditional_get(session, url: str, headers: dict, state: Optional[IngestState] = None, polite: bool = False):
+    """GET with If-None-Match/If-Modified-Since from the last run. Returns None on 304 Not Modified.
+    `polite` routes the request through robots.txt and the per-host limiter (scraped sites)."""
+    request_headers = dict(headers)
+    if state is not None:
+        validators = state.get_validators(url)
+        if validators.get("etag"):
+            request_headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            request_headers["If-Modified-Since"] = validators["last_modified"]
+    with span("ingest_fetch"):
+        if polite:
+            response = polite_request(session, url, request_headers, INGEST_TIMEOUT)
+        else:
+            response = session.get(url, headers=request_headers, timeout=INGEST_TIMEOUT)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    return response
+
+# Item elements of RSS 2.0, RSS 1.0 (RDF) and Atom feeds
+_ATOM_NS = "{http://www.w3.org/2005/Atom}"
+_FEED_ITEM_TAGS = ("item", "{http://purl.org/rss/1.0/}item", _ATOM_NS + "entry")
+_TITLE_FIELDS = ("title",)
+_SUMMARY_FIELDS = ("description", "summary", "content", "encoded")
+_DATE_FIELDS = ("pubDate", "published", "updated", "date")
+
+def _element_text(element) -> str:
+    return "".join(element.itertext()).strip()
+
+def iter_feed_items(source_name: str, content: bytes, stop_at: Optional[str] = None):
+    """Streams items out of an RSS or Atom feed with lxml iterparse.
+
+    Each item is read in one pass over its children and freed right after, so memory
+    stays flat on large feeds. Iteration stops at `stop_at`, the link of the newest
+    item seen on the previous run; feeds are newest-first, so the rest is old news.
+    """
+    context = etree.iterparse(BytesIO(content), events=("end",), tag=_FEED_ITEM_TAGS,
+                              recover=True, resolve_entities=False, no_network=True)
+    for _, element in context:
+        fields = {}
+        for child in element:
+            if not isinstance(child.tag, str):
+                continue  # comments / processing instructions
+            name = etree.QName(child).localname
+            if name == "link":
+                # Atom links carry the URL in href; prefer rel="alternate"
+                href = child.get("href")
+                if href and (child.get("rel", "alternate") == "alternate" or "link" not in fields):
+                    fields["link"] = href.strip()
+                elif child.text and "link" not in fields:
+                    fields["link"] = child.text.strip()
+            elif name == "id" and "link" not in fields and (child.text or "").startswith("http"):
+                fields["link"] = child.text.strip()
+            elif name in _TITLE_FIELDS or name in _SUMMARY_FIELDS or name in _DATE_FIELDS:
+                key = "title" if name in _TITLE_FIELDS else "summary" if name in _SUMMARY_FIELDS else "date"
+                text = _element_text(child)
+                # Skip empty twins such as media:content so they don't shadow the real field
+                if text and key not in fields:
+                    fields[key] = text
+
+        # Free the item and everything parsed before it
+        element.clear(keep_tail=False)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+        link = fields.get("link") or "N/A"
+        if stop_at and link == stop_at:
+            break
+
+        # --- SCHEMA FOR FIRESTORE (RAW_NEWS) ---
+        yield {
+            "title": fields.get("title") or "N/A",
+            "url": link,
+            "summary_text": fields.get("summary") or "N/A",
+            "pub_date": fields.get("date") or "N/A",
+            "source": source_name,
+            "ingestion_date": firestore.SERVER_TIMESTAMP,
+            "app_id": app_id 
+        }
+    del context
+
+def parse_rss_content(source_name: str, content: bytes, stop_at: Optional[str] = None) -> List[Dict[str, Any]]:
+    if RSS_PARSER == "stream":
+        try:
+            return list(iter_feed_items(source_name, content, stop_at))
+        except etree.LxmlError as e:
+            print(f"⚠️ Streaming parse failed for {source_name} ({e}), falling back to BeautifulSoup.")
+    return parse_rss_content_soup(source_name, content)
+
+def parse_rss_content_soup(source_name: str, content: bytes) -> List[Dict[str, Any]]:
+    """Full-tree BeautifulSoup parser, kept as the fallback for feeds lxml cannot recover."""
+    from bs4 import BeautifulSoup
     news_items = []
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'application/rss+xml, application/xml, text/xml, */*',
-        'Accept-Language': 'en-US,en;q=0.9',
-    }
+    # Use 'xml' parser for standard RSS feeds
+    soup = BeautifulSoup(content, 'xml')
     
+    for item in soup.find_all('item'):
+        # Extract data using standard RSS tags
+        title = item.find('title').text.strip() if item.find('title') else "N/A"
+        link = item.find('link').text.strip() if item.find('link') else "N/A"
+        description = item.find('description').text.strip() if item.find('description') else "N/A"
+        pub_date = item.find('pubDate').text.strip() if item.find('pubDate') else "N/A"
+        
+        # --- SCHEMA FOR FIRESTORE (RAW_NEWS) ---
+        news_items.append({
+            "title": title,
+            "url": link,
+            "summary_text": description,
+            "pub_date": pub_date,
+            "source": source_name,
+            "ingestion_date": firestore.SERVER_TIMESTAMP,
+            "app_id": app_id 
+        })
+        
+    return news_items
+
+def fact_check_item(source_name: str, article: Dict[str, Any]) -> Dict[str, Any]:
+    # --- SCHEMA FOR FIRESTORE (FACT_CHECKS) ---
+    return {
+        "source": source_name,
+        "url": article["url"],
+        "claim": article["claim"],
+        "verdict": article["verdict"],  # the publisher's own wording
+        "rating": article["rating"],    # the same, on the shared scale (fact_check_crawler.RATING_SCALE)
+        "headline": article["headline"],
+        "claimant": article["claimant"],
+        "published_date": article["published_date"],
+        "extraction": article["extraction"],
+        "ingestion_date": firestore.SERVER_TIMESTAMP,
+        "app_id": app_id
+    }
+
+def crawl_fact_checks(source_name: str, listing_url: str, first_page: bytes, session,
+                      state: Optional[IngestState] = None) -> Dict[str, Any]:
+    """Deep crawl of one fact-checker (see fact_check_crawler.crawl_listing). Articles
+    already in the seen-item index are not fetched again."""
+    def fetch(url):
+        with span("ingest_fetch"):
+            return polite_get(session, url, FACT_CHECK_HEADERS, INGEST_TIMEOUT)
+
+    def known(urls):
+        if state is None: return set()
+        stored = state.get_seen_hashes(FACT_CHECKS_COLLECTION, [document_id(url) for url in urls])
+        return {url for url in urls if document_id(url) in stored}
+
+    stop_at = state.get_last_seen(listing_url) if state is not None else None
+    crawl = crawl_listing(listing_url, first_page, fetch, stop_at, known)
+    crawl["items"] = [fact_check_item(source_name, article) for article in crawl.pop("articles")]
+    return crawl
+
+def scrape_rss_feed(source_name: str, url: str) -> List[Dict[str, Any]]:
+    """Implements the RSS/XML scraping logic for news agencies."""
     try:
-        session=requests.Session()
-        response = requests.get(url, headers=headers, timeout=15)
+        response = requests.get(url, headers=RSS_HEADERS, timeout=INGEST_TIMEOUT)
         response.raise_for_status() 
-
-        # Use 'xml' parser for standard RSS feeds
-        soup = BeautifulSoup(response.content, 'xml')
-        
-        for item in soup.find_all('item'):
-            # Extract data using standard RSS tags
-            title = item.find('title').text.strip() if item.find('title') else "N/A"
-            link = item.find('link').text.strip() if item.find('link') else "N/A"
-            description = item.find('description').text.strip() if item.find('description') else "N/A"
-            pub_date = item.find('pubDate').text.strip() if item.find('pubDate') else "N/A"
-            
-            # --- SCHEMA FOR FIRESTORE (RAW_NEWS) ---
-            news_items.append({
-                "title": title,
-                "url": link,
-                "summary_text": description,
-                "pub_date": pub_date,
-                "source": source_name,
-                "ingestion_date": firestore.SERVER_TIMESTAMP,
-                "app_id": app_id 
-            })
-            
-        return news_items
+        return parse_rss_content(source_name, response.content)
 
     except requests.exceptions.RequestException as e:
         print(f"ERROR: Failed to retrieve RSS for {source_name} ({url}). Exception: {e}")
         return []
 
 def scrape_fact_check_html(source_name: str, base_url: str) -> List[Dict[str, Any]]:
-    verdicts = []
     try:
-        response = requests.get(base_url, headers={'User-Agent': 'NewsGPT/1.0'}, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Factly uses 'h2' tags with the class 'entry-title' for their fact-checks
-        articles = soup.find_all('h2', class_='entry-title') 
-        
-        for article in articles[:5]: # Let's grab the top 5 latest checks
-            link_tag = article.find('a')
-            if link_tag:
-                claim_text = link_tag.get_text(strip=True)
-                fact_check_url = link_tag.get('href')
-                
-                verdicts.append({
-                    "source": source_name,
-                    "url": fact_check_url,
-                    "claim": claim_text, 
-                    "verdict": "Check URL for details", # Deep scraping would go inside the link
-                    "ingestion_date": firestore.SERVER_TIMESTAMP,
-                    "app_id": app_id 
-                })
-
-        return verdicts
+        session = build_http_session()
+        try:
+            first_page = polite_get(session, base_url, FACT_CHECK_HEADERS, INGEST_TIMEOUT)
+            return crawl_fact_checks(source_name, base_url, first_page, session)["items"]
+        finally:
+            session.close()
 
     except Exception as e:
         print(f"ERROR: Failed to retrieve HTML for {source_name}. Exception: {e}")
         return []
+
+def fetch_source(kind: str, source_name: str, url: str, session, state: Optional[IngestState] = None) -> Dict[str, Any]:
+    """Fetches and parses one feed, returning its items plus a timing/status report."""
+    started = time.perf_counter()
+    report = {"source": source_name, "kind": kind, "url": url, "status": "ok", "http_status": None,
+              "bytes": 0, "items": [], "validators": None, "last_seen": None, "error": None}
+    try:
+        if kind == "rss":
+            response = conditional_get(session, url, RSS_HEADERS, state)
+        else:
+            response = conditional_get(session, url, FACT_CHECK_HEADERS, state, polite=True)
+        if response is None:
+            report.update(status="not_modified", http_status=304)
+        else:
+            report.update(http_status=response.status_code, bytes=len(response.content),
+                          validators=(response.headers.get("ETag"), response.headers.get("Last-Modified")))
+            if kind == "rss":
+                with span("ingest_parse"):
+                    stop_at = state.get_last_seen(url) if state is not None else None
+                    report["items"] = parse_rss_content(source_name, response.content, stop_at)
+                newest = report["items"][0]["url"] if report["items"] else None
+                report["last_seen"] = newest if newest != "N/A" else None
+            else:
+                with span("fact_check_crawl"):
+                    crawl = crawl_fact_checks(source_name, url, response.content, session, state)
+                report.update(items=crawl["items"], last_seen=crawl["newest"],
+                              crawl={"pages": crawl["pages"], "failed": crawl["failed"]})
+    except Exception as e:
+        upstream_error("feed", e)
+        report.update(status="error", error=str(e))
+        print(f"ERROR: Failed to retrieve {kind} for {source_name} ({url}). Exception: {e}")
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+def print_ingestion_report(reports: List[Dict[str, Any]], wall_seconds: float):
+    print(f"\n--- FEED REPORT ({wall_seconds:.2f}s wall, {sum(r['elapsed_ms'] for r in reports) / 1000:.2f}s summed) ---")
+    for r in sorted(reports, key=lambda r: r["elapsed_ms"], reverse=True):
+        print(f"{r['status']:<13} {str(r['http_status'] or '-'):>4} {r['elapsed_ms']:>8.1f}ms "
+              f"{r['bytes']:>9}B {len(r['items']):>4} items  {r['source']}" + (f"  ({r['error']})" if r['error'] else ""))
+
 # --- PART 2: FIRESTORE SAVING (P2.2) ---
 
-def save_to_firestore(collection_name: str, data: list):
-    """Saves news items to Firestore, preventing duplicates using URL hashing."""
-    if not DB:
+def document_id(url: str) -> str:
+    return hashlib.md5(url.encode()).hexdigest()
+
+def content_hash(item: Dict[str, Any]) -> str:
+    """Fingerprint of the stored fields; the server timestamp sentinel is excluded."""
+    stable = {k: v for k, v in item.items() if k != 'ingestion_date'}
+    return hashlib.md5(json.dumps(stable, sort_keys=True, default=str).encode()).hexdigest()
+
+def _commit_chunk(chunk: List[tuple]) -> bool:
+    batch = get_db().batch()
+    for doc_ref, item in chunk:
+        batch.set(doc_ref, item, merge=True)
+    try:
+        with span("ingest_write"):
+            batch.commit()
+        return True
+    except Exception as e:
+        upstream_error("firestore", e)
+        print(f"❌ Error during batch write ({len(chunk)} items): {e}")
+        return False
+
+def save_to_firestore(collection_name: str, data: list, state: Optional[IngestState] = None) -> Dict[str, int]:
+    """Saves news items to Firestore, preventing duplicates using URL hashing.
+
+    With a `state`, items whose URL hash and content hash were already written are
+    skipped before any network call. Writes go out in FIRESTORE_BATCH_SIZE chunks
+    (Firestore caps a batch at 500 operations) committed in parallel.
+    """
+    stats = {"new": 0, "updated": 0, "skipped": 0, "failed": 0}
+    db = get_db()
+    if not db:
         print("FATAL: Database client is not available.")
-        return
+        stats["failed"] = len(data)
+        return stats
 
     # Using your specific path structure
-    collection_ref = DB.collection('artifacts').document(app_id).collection('public') \
+    collection_ref = db.collection('artifacts').document(app_id).collection('public') \
                        .document('data').collection(collection_name)
-    
-    batch = DB.batch()
-    count = 0
 
-    print(f"INFO: Starting batch write to collection: {collection_name}")
+    # 1. Create a unique ID based on the URL (prevents duplicates); last copy wins
+    pending = {}
     for item in data:
         url = item.get('url', '')
-        if not url: 
+        if not url or url == "N/A": 
             continue
-        
-        # 1. Create a unique ID based on the URL (prevents duplicates)
-        doc_id = hashlib.md5(url.encode()).hexdigest()
-        
-        # 2. Reference the document with our custom ID
-        doc_ref = collection_ref.document(doc_id)
-        
-        # 3. FIX: Pass BOTH the doc_ref and the item data
-        batch.set(doc_ref, item, merge=True)
-        count += 1
+        pending[document_id(url)] = item
+
+    # 2. Drop unchanged items using the local seen-index
+    hashes = {doc_id: content_hash(item) for doc_id, item in pending.items()}
+    known = state.get_seen_hashes(collection_name, list(hashes)) if state is not None else {}
+    to_write = []
+    for doc_id, item in pending.items():
+        if doc_id not in known:
+            stats["new"] += 1
+        elif known[doc_id] != hashes[doc_id]:
+            stats["updated"] += 1
+        else:
+            stats["skipped"] += 1
+            continue
+        to_write.append((doc_id, item))
+
+    # 3. Chunked batches, committed in parallel
+    chunks = [to_write[i:i + FIRESTORE_BATCH_SIZE] for i in range(0, len(to_write), FIRESTORE_BATCH_SIZE)]
+    print(f"INFO: Writing {len(to_write)} items to {collection_name} in {len(chunks)} batches.")
+    written = []
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(FIRESTORE_WRITE_WORKERS, len(chunks))) as pool:
+            results = pool.map(lambda chunk: _commit_chunk([(collection_ref.document(d), item) for d, item in chunk]), chunks)
+            for chunk, ok in zip(chunks, results):
+                if ok:
+                    written.extend(chunk)
+                else:
+                    stats["failed"] += len(chunk)
 
+    if state is not None and written:
+        state.mark_seen(collection_name, [(doc_id, hashes[doc_id]) for doc_id, _ in written])
+    # The API workers pick new documents up through keep_index_fresh; an ingestion-only
+    # process would only grow an index nobody queries
+    if INGEST_UPDATES_LOCAL_INDEX:
+        LOCAL_INDEX.add_items(collection_name, [item for _, item in written])
+        CLAIM_MATCHER.add_items(collection_name, [item for _, item in written])
+    # Trend counts take first writes only; an updated article is not a new mention
+    TREND_ROLLUP.record(collection_name, [item for doc_id, item in written if doc_id not in known], state)
+
+    print(f"✅ {collection_name}: {stats['new']} new, {stats['updated']} updated, "
+          f"{stats['skipped']} skipped, {stats['failed']} failed.")
+    return stats
+
+def count_unseen(collection_name: str, items: List[Dict[str, Any]], state: IngestState) -> int:
+    """Items that save_to_firestore would write (new or changed), without writing them."""
+    hashes = {document_id(item['url']): content_hash(item) for item in items
+              if item.get('url') and item['url'] != "N/A"}
+    known = state.get_seen_hashes(collection_name, list(hashes))
+    return sum(known.get(doc_id) != digest for doc_id, digest in hashes.items())
+
+# --- PART 2b: INGESTION CYCLE ---
+
+COLLECTION_FOR_KIND = {"rss": RAW_NEWS_COLLECTION, "fact_check": FACT_CHECKS_COLLECTION}
+
+def all_sources() -> List[tuple]:
+    """(kind, name, url) for every configured RSS and fact-check source."""
+    return [("rss", name, url) for name, url in RSS_SOURCES.items()] + \
+           [("fact_check", name, url) for name, url in FACT_CHECK_SOURCES.items()]
+
+def run_ingestion_cycle(state: Optional[IngestState] = None, max_workers: int = INGEST_MAX_WORKERS,
+                        sources: Optional[List[tuple]] = None) -> List[Dict[str, Any]]:
+    """Fetches the sources (default: all of them) in parallel, saves new items and
+    returns the per-feed reports. Wall time tracks the slowest feed, not the sum.
+
+    Each report also carries `new_items` (items not stored before) and `saved`
+    (whether its collection was written without failures), which the polling
+    scheduler in ingest_scheduler.py adapts to.
+    """
+    sources = all_sources() if sources is None else sources
+    session = build_http_session()
+    started = time.perf_counter()
     try:
-        batch.commit()
-        print(f"✅ Successfully processed {count} items in {collection_name}.")
-    except Exception as e:
-        print(f"❌ Error during batch write: {e}")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            reports = list(pool.map(lambda source: fetch_source(*source, session=session, state=state), sources))
+    finally:
+        session.close()
+
+    for r in reports:
+        r["new_items"] = count_unseen(COLLECTION_FOR_KIND[r["kind"]], r["items"], state) if state is not None else len(r["items"])
+
+    agency_data = [item for r in reports if r["kind"] == "rss" for item in r["items"]]
+    fact_checker_data = [item for r in reports if r["kind"] == "fact_check" for item in r["items"]]
+
+    print(f"\n--- DATA SUMMARY ---")
+    print(f"Collected {len(agency_data)} articles for raw news.")
+    print(f"Collected {len(fact_checker_data)} verdicts for fact checks.")
+
+    stats = {
+        "rss": save_to_firestore(RAW_NEWS_COLLECTION, agency_data, state),
+        "fact_check": save_to_firestore(FACT_CHECKS_COLLECTION, fact_checker_data, state),
+    }
+    saved = {kind: s["failed"] == 0 for kind, s in stats.items()}
+    for r in reports:
+        r["saved"] = saved[r["kind"]]
+
+    # Validators and last-seen markers are only remembered once the items they cover
+    # are safely stored, otherwise a failed write would be followed by a 304 (or an
+    # early stop) and the items lost.
+    if state is not None:
+        for r in reports:
+            if not saved[r["kind"]]:
+                continue
+            if r["validators"]:
+                state.save_validators(r["url"], *r["validators"])
+            if r["last_seen"]:
+                state.save_last_seen(r["url"], r["last_seen"])
+
+    print_ingestion_report(reports, time.perf_counter() - started)
+    return reports
 
 # --- PART 3: CORE AI (P2.3) ---
 
@@ -158,27 +448,13 @@ def generate_unbiased_news(query: str, api_key: str) -> Dict[str, Any]:
 if __name__ == '__main__':
     print("--- PHASE 2: DATA INGESTION PIPELINE START ---")
     
-    if not DB:
+    if not get_db():
         print("Cannot run pipeline. Check Firebase setup in database_setup.py.")
     else:
-        # 1. Scrape News Agencies (RSS Strategy)
-        agency_data = []
-        for name, url in RSS_SOURCES.items():
-            agency_data.extend(scrape_rss_feed(name, url))
-        
-        # 2. Scrape Fact Checkers (HTML Strategy)
-        fact_checker_data = []
-        for name, url in FACT_CHECK_SOURCES.items():
-            fact_checker_data.extend(scrape_fact_check_html(name, url))
-            
-        print(f"\n--- DATA SUMMARY ---")
-        print(f"Collected {len(agency_data)} articles for raw news.")
-        print(f"Collected {len(fact_checker_data)} verdicts for fact checks.")
-
-        # 3. Save to Firestore
-        if agency_data:
-            save_to_firestore(RAW_NEWS_COLLECTION, agency_data)
-        if fact_checker_data:
-            save_to_firestore(FACT_CHECKS_COLLECTION, fact_checker_data)
+        state = IngestState()
+        try:
+            run_ingestion_cycle(state)
+        finally:
+            state.close()
         
     print("\n--- PHASE 2: DATA INGESTION PIPELINE END ---")
\ No newline at end of file
@@ -0,0 +1,205 @@
+# local_index.py
+# In-process BM25 inverted index over ingested raw_news_articles and fact_checks_verdicts.
+# Serves as the zero-network first retrieval tier of the RAG pipeline.
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from claim_matcher import CLAIM_MATCHER
+from config import (
+    RAW_NEWS_COLLECTION, FACT_CHECKS_COLLECTION, LOCAL_TOP_K, CORPUS_SNAPSHOT_PATH, LOCAL_INDEX_COMPACT_MIN,
+    LOCAL_INDEX_COMPACT_RATIO
+)
+from text_utils import tokenize
+
+
+def document_text(collection_name: str, item: dict) -> str:
+    """The fields that get indexed for each stored document."""
+    if collection_name == FACT_CHECKS_COLLECTION:
+        return f"{item.get('claim', '')} {item.get('verdict', '')}"
+    return f"{item.get('title', '')} {item.get('summary_text', '')}"
+
+
+def document_result(collection_name: str, item: dict) -> dict:
+    """Shapes a stored document like a Tavily result so the pipeline can treat both alike."""
+    if collection_name == FACT_CHECKS_COLLECTION:
+        content = f"CLAIM: {item.get('claim', '')}\nVERDICT: {item.get('verdict', '')}"
+        title = item.get('claim', '')
+    else:
+        content = f"{item.get('title', '')}\n{item.get('summary_text', '')}"
+        title = item.get('title', '')
+    return {"url": item.get('url'), "title": title, "content": content,
+            "source": item.get('source'), "collection": collection_name}
+
+
+class BM25Index:
+    """Replacing a document leaves an empty slot behind (postings hold slot numbers);
+    once the empty slots pass LOCAL_INDEX_COMPACT_MIN and LOCAL_INDEX_COMPACT_RATIO of
+    all slots, the live documents are renumbered into fresh lists."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, compact_min: int = LOCAL_INDEX_COMPACT_MIN,
+                 compact_ratio: float = LOCAL_INDEX_COMPACT_RATIO):
+        self.k1 = k1
+        self.b = b
+        self.compact_min, self.compact_ratio = compact_min, compact_ratio
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)  # term -> {doc_idx: tf}
+        self._doc_terms: List[Optional[tuple]] = []
+        self._doc_len: List[int] = []
+        self._docs: List[Optional[dict]] = []
+        self._ids: Dict[str, int] = {}
+        self._total_len = 0
+        self._live = 0
+        self._lock = threading.RLock()
+        self.last_loaded = None  # newest ingestion_date seen, for incremental refreshes
+
+    def __len__(self):
+        return self._live
+
+    def add_document(self, doc_id: str, text: str, result: dict):
+        """Adds or replaces one document."""
+        terms = Counter(tokenize(text))
+        if not terms: return
+        with self._lock:
+            if doc_id in self._ids:
+                self._remove(self._ids[doc_id])
+            idx = len(self._docs)
+            self._ids[doc_id] = idx
+            self._docs.append(result)
+            self._doc_terms.append(tuple(terms))
+            length = sum(terms.values())
+            self._doc_len.append(length)
+            self._total_len += length
+            self._live += 1
+            for term, tf in terms.items():
+                self._postings[term][idx] = tf
+            dead = len(self._docs) - self._live
+            if dead >= self.compact_min and dead >= self.compact_ratio * len(self._docs):
+                self._compact()
+
+    def add_items(self, collection_name: str, items: Iterable[dict]) -> int:
+        """Indexes ingested items; doc ids follow save_to_firestore (url-keyed)."""
+        count = 0
+        for item in items:
+            if not item.get('url'): continue
+            self.add_document(f"{collection_name}:{item['url']}", document_text(collection_name, item),
+                              document_result(collection_name, item))
+            count += 1
+        return count
+
+    def _remove(self, idx: int):
+        for term in self._doc_terms[idx]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(idx, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_len -= self._doc_len[idx]
+        self._doc_terms[idx] = ()
+        self._docs[idx] = None
+        self._live -= 1
+
+    def _compact(self):
+        renumber = {}
+        for idx, doc in enumerate(self._docs):
+            if doc is not None:
+                renumber[idx] = len(renumber)
+        self._docs = [self._docs[idx] for idx in renumber]
+        self._doc_terms = [self._doc_terms[idx] for idx in renumber]
+        self._doc_len = [self._doc_len[idx] for idx in renumber]
+        self._ids = {doc_id: renumber[idx] for doc_id, idx in self._ids.items()}
+        for term, postings in self._postings.items():
+            self._postings[term] = {renumber[idx]: tf for idx, tf in postings.items()}
+
+    def search(self, query: str, top_k: int = LOCAL_TOP_K) -> List[dict]:
+        """Returns Tavily-shaped results with `score` (BM25) and `coverage`
+        (idf-weighted share of the query terms the document contains)."""
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._live:
+                return []
+            avg_len = self._total_len / self._live
+            idf = {}
+            for term in terms:
+                df = len(self._postings.get(term, ()))
+                idf[term] = math.log(1 + (self._live - df + 0.5) / (df + 0.5))
+            total_idf = sum(idf.values())
+
+            scores, matched = defaultdict(float), defaultdict(float)
+            for term in terms:
+                for idx, tf in self._postings.get(term, {}).items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[idx] / avg_len)
+                    scores[idx] += idf[term] * tf * (self.k1 + 1) / norm
+                    matched[idx] += idf[term]
+
+            ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+            return [dict(self._docs[idx], score=round(score, 4), coverage=round(matched[idx] / total_idf, 4))
+                    for idx, score in ranked]
+
+    # --- FIRESTORE SYNC ---
+
+    def load_from_firestore(self, since=None) -> int:
+        """Full load at startup, or an incremental pull of documents ingested after `since`.
+        Fact-checks also go to the claim matcher, which has no Firestore sync of its own."""
+        from database_setup import get_db, public_collection
+        if not get_db(): return 0
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        count = 0
+        for collection_name in (RAW_NEWS_COLLECTION, FACT_CHECKS_COLLECTION):
+            query = public_collection(collection_name)
+            if since is not None:
+                query = query.where(filter=FieldFilter("ingestion_date", ">", since))
+            for doc in query.stream():
+                item = doc.to_dict()
+                count += self.add_items(collection_name, [item])
+                CLAIM_MATCHER.add_items(collection_name, [item])
+                stamp = item.get('ingestion_date')
+                if stamp is not None and hasattr(stamp, 'timestamp') and (self.last_loaded is None or stamp > self.last_loaded):
+                    self.last_loaded = stamp
+        return count
+
+    def refresh_from_firestore(self) -> int:
+        return self.load_from_firestore(since=self.last_loaded)
+
+    def load_from_snapshot(self, path: str = CORPUS_SNAPSHOT_PATH) -> int:
+        """Bootstrap from the local corpus snapshot (corpus_snapshot.py) with no Firestore
+        reads; refresh_from_firestore() then only pulls what was ingested after it."""
+        from corpus_snapshot import open_corpus
+        import datetime
+        corpus = open_corpus(path)
+        if corpus is None: return 0
+        count = 0
+        with corpus:
+            for collection_name, _, item in corpus.items():
+                count += self.add_items(collection_name, [item])
+                CLAIM_MATCHER.add_items(collection_name, [item])
+            if corpus.max_ingested is not None:
+                self.last_loaded = datetime.datetime.fromtimestamp(corpus.max_ingested, datetime.timezone.utc)
+        return count
+
+
+LOCAL_INDEX = BM25Index()
+
+
+async def keep_index_fresh(index: BM25Index, interval: float):
+    """App background task: load at startup (from the corpus snapshot if there is one,
+    else all of Firestore), then incremental pulls of newly ingested docs."""
+    import asyncio
+    try:
+        loaded = await asyncio.to_thread(index.load_from_snapshot)
+        if loaded:
+            added = await asyncio.to_thread(index.refresh_from_firestore)
+            print(f"📚 Local index ready: {loaded} documents from snapshot, +{added} from Firestore.")
+        else:
+            loaded = await asyncio.to_thread(index.load_from_firestore)
+            print(f"📚 Local index ready: {loaded} documents.")
+    except Exception as e:
+        print(f"⚠️ Local index load failed: {e}")
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            added = await asyncio.to_thread(index.refresh_from_firestore)
+            if added: print(f"📚 Local index refreshed: +{added} documents.")
+        except Exception as e:
+            print(f"⚠️ Local index refresh failed: {e}")
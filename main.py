@@ -1,12 +1,42 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
+from typing import List, Optional
 import os
-from google import genai
-from google.genai import types
-from rag_engine import generate_hybrid_rag_news 
+import json
+from rag_engine import agenerate_hybrid_rag_news, astream_hybrid_rag_news, abatch_hybrid_rag_news, close_async_clients, get_async_tavily
+from database_setup import get_db
+from local_index import LOCAL_INDEX, keep_index_fresh
+from trend_rollup import TREND_ROLLUP, keep_trends_fresh
+from media_cache import MEDIA_CACHE, content_digest, prepare_image
+from config import (
+    LOCAL_INDEX_REFRESH_SECONDS, TREND_REFRESH_SECONDS, MEDIA_MAX_UPLOAD_BYTES, TIMING_HEADER, WARMUP_ON_STARTUP,
+    BATCH_MAX_CLAIMS, BATCH_CONCURRENCY, VISION_MODELS
+)
+from telemetry import METRICS, span, cache_lookup, begin_request, end_request, server_timing
+from upstream_scheduler import SCHEDULER, failure_kind
+from contextlib import asynccontextmanager
 import asyncio
-app = FastAPI(title="FairGPT Unbiased News API")
+import time
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the local BM25 tier in the background so startup is not blocked on Firestore
+    index_task = asyncio.create_task(keep_index_fresh(LOCAL_INDEX, LOCAL_INDEX_REFRESH_SECONDS))
+    # Same for the per-day term counts behind trend_history
+    trend_task = asyncio.create_task(keep_trends_fresh(TREND_ROLLUP, TREND_REFRESH_SECONDS))
+    # Optionally build the lazy clients now, off the event loop, instead of on the first request
+    warmup_task = asyncio.create_task(asyncio.to_thread(warm_up)) if WARMUP_ON_STARTUP else None
+    yield
+    index_task.cancel()
+    trend_task.cancel()
+    if warmup_task: warmup_task.cancel()
+    # Drain the pooled Gemini/Tavily connections on shutdown
+    await close_async_clients()
+
+app = FastAPI(title="FairGPT Unbiased News API", lifespan=lifespan)
 
 
 origins = [
@@ -22,8 +52,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Gemini Client for Vision
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+# 🟢 REQUEST TIMING: latency histogram per route, plus an optional Server-Timing header
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    started = time.perf_counter()
+    token = begin_request()
+    try:
+        response = await call_next(request)
+    finally:
+        spans = end_request(token)
+    route = request.scope.get("route")
+    METRICS.observe("fairgpt_http_request_duration_seconds", time.perf_counter() - started,
+                    method=request.method, path=route.path if route else "unmatched", status=response.status_code)
+    if TIMING_HEADER and spans:
+        response.headers["Server-Timing"] = server_timing(spans)
+    return response
+
+@app.get("/metrics")
+def metrics():
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Gemini Client for Vision, created on first use (google.genai is slow to import)
+_genai_client = None
+
+def get_genai_client():
+    global _genai_client
+    if _genai_client is None:
+        from google import genai
+        _genai_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+    return _genai_client
+
+def warm_up():
+    """Startup hook: imports the heavy SDKs and opens the clients before traffic arrives."""
+    started = time.perf_counter()
+    try:
+        from google.genai import types  # noqa: F401
+        from PIL import Image  # noqa: F401
+        get_genai_client()
+        get_async_tavily()
+        get_db()
+        print(f"🔥 Warm-up finished in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Warm-up failed: {e}")
 
 class NewsQuery(BaseModel):
     query: str
@@ -31,9 +101,48 @@ class NewsQuery(BaseModel):
 @app.post("/api/search")
 async def search_news(data: NewsQuery):
     api_key = os.getenv("API_KEY")
-    result = generate_hybrid_rag_news(data.query, api_key)
+    result = await agenerate_hybrid_rag_news(data.query, api_key)
     return result
 
+# 🟢 STREAMING VARIANT: Server-Sent Events, one event per finished stage/section.
+# GET exists for browser EventSource clients, POST mirrors /api/search.
+async def _sse_events(query: str):
+    async for event, data in astream_hybrid_rag_news(query, os.getenv("API_KEY")):
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(query: str) -> StreamingResponse:
+    return StreamingResponse(_sse_events(query), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/search/stream")
+async def search_news_stream(data: NewsQuery):
+    return _sse_response(data.query)
+
+@app.get("/api/search/stream")
+async def search_news_stream_get(query: str):
+    return _sse_response(query)
+
+# 🟢 BATCH VERIFICATION: newsroom claim lists, streamed back as NDJSON (one line per
+# submitted claim as its audit finishes, then a summary line)
+class BatchQuery(BaseModel):
+    queries: List[str]
+    concurrency: Optional[int] = None
+
+async def _ndjson_batch(queries: List[str], concurrency: int):
+    async for positions, query, result in abatch_hybrid_rag_news(queries, os.getenv("API_KEY"), concurrency):
+        if positions is None:
+            yield json.dumps({"type": "summary", **result}) + "\n"
+            continue
+        for index in positions:
+            yield json.dumps({"type": "result", "index": index, "query": queries[index], "result": result}) + "\n"
+
+@app.post("/api/search/batch")
+async def search_news_batch(data: BatchQuery):
+    if len(data.queries) > BATCH_MAX_CLAIMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_CLAIMS} claims per batch.")
+    concurrency = min(max(data.concurrency or BATCH_CONCURRENCY, 1), BATCH_CONCURRENCY)
+    return StreamingResponse(_ndjson_batch(data.queries, concurrency), media_type="application/x-ndjson")
+
 # 🟢 NEW: MULTIMODAL MEDIA VERIFICATION ENDPOINT
 @app.post("/api/verify-media")
 async def verify_media(file: UploadFile = File(...)):
@@ -42,18 +151,38 @@ async def verify_media(file: UploadFile = File(...)):
         return await asyncio.wait_for(process_media_logic(file), timeout=60.0)
     except asyncio.TimeoutError:
         raise HTTPException(status_code=504, detail="AI processing took too long.")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def process_media_logic(file):
     await file.seek(0)
-    file_bytes = await file.read()
-    
-    # 🟢 2026 ACTIVE MODELS: Replaces retired 1.5 versions
-    models_to_try = [
-        "gemini-3-flash-preview", # Newest 2026 model
-        
-    ]
+    # Read at most one byte past the cap so oversized uploads are rejected without buffering them
+    file_bytes = await file.read(MEDIA_MAX_UPLOAD_BYTES + 1)
+    if len(file_bytes) > MEDIA_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {MEDIA_MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit.")
+
+    # 🟢 VIRAL IMAGE CACHE: identical bytes skip decoding and the vision call entirely
+    digest = content_digest(file_bytes)
+    cached_query = MEDIA_CACHE.get_exact(digest)
+    prints = None
+    outcome = "hit"
+    if cached_query is None:
+        # Decode/shrink off the event loop; recompressed copies match by fingerprint
+        with span("prepare_image"):
+            upload_bytes, upload_mime, prints = await asyncio.to_thread(prepare_image, file_bytes, file.content_type)
+        cached_query = await asyncio.to_thread(MEDIA_CACHE.get_similar, prints)
+        outcome = "perceptual_hit" if cached_query else "miss"
+        if cached_query:
+            # Remember this copy's exact bytes too
+            MEDIA_CACHE.put(digest, prints, cached_query)
+    cache_lookup("media", outcome)
+    if cached_query:
+        print(f"⚡ MEDIA CACHE HIT: {cached_query}")
+        verification_data = await agenerate_hybrid_rag_news(cached_query, os.getenv("API_KEY"))
+        verification_data["extractedQuery"] = cached_query
+        return verification_data
     
     extraction_prompt = (
             "You are an expert news analyst. Read the text in this image. "
@@ -61,31 +190,30 @@ async def process_media_logic(file):
             "CRITICAL: The entire response MUST be under 300 characters."
         )
     
-    for model_name in models_to_try:
-        try:
-            print(f"🤖 Scanning with {model_name}...")
-            response = client.models.generate_content(
-                model=model_name,
-                contents=[
-                    types.Part.from_bytes(data=file_bytes, mime_type=file.content_type),
-                    extraction_prompt
-                ]
-            )
-            extracted_query = response.text.strip()
-            if extracted_query:
-                # 🟢 PROCEED TO RAG: Use your existing generate_hybrid_rag_news here
-                verification_data = generate_hybrid_rag_news(extracted_query, os.getenv("API_KEY"))
-                verification_data["extractedQuery"] = extracted_query
-                return verification_data
-        except Exception as e:
-            if "429" in str(e):
-                print(f"⚠️ {model_name} Quota Full, trying next...")
-                continue
-            if "404" in str(e):
-                print(f"⚠️ {model_name} Retired or Not Found.")
-                continue
-            raise e
-    return {"status": "FAIL", "summary": "All models exhausted."}
+    from google.genai import types
+    contents = [types.Part.from_bytes(data=upload_bytes, mime_type=upload_mime), extraction_prompt]
+
+    async def extract(model_name):
+        print(f"🤖 Scanning with {model_name}...")
+        return await get_genai_client().aio.models.generate_content(model=model_name, contents=contents)
+
+    # 🟢 QUOTA-AWARE: shares the Gemini buckets with text audits, honours Retry-After
+    # and walks VISION_MODELS in order when a model is out of quota or retired
+    try:
+        with span("vision_extract"):
+            response = await SCHEDULER.acall("gemini", extract, models=VISION_MODELS)
+    except Exception as e:
+        if failure_kind(e) in ("rate_limited", "unavailable"):
+            return {"status": "FAIL", "summary": "All models exhausted."}
+        raise
+    extracted_query = (response.text or "").strip()
+    if not extracted_query:
+        return {"status": "FAIL", "summary": "All models exhausted."}
+    MEDIA_CACHE.put(digest, prints, extracted_query)
+    # 🟢 PROCEED TO RAG: Use your existing agenerate_hybrid_rag_news here
+    verification_data = await agenerate_hybrid_rag_news(extracted_query, os.getenv("API_KEY"))
+    verification_data["extractedQuery"] = extracted_query
+    return verification_data
 @app.get("/")
 def home():
 
@@ -0,0 +1,153 @@
+# media_cache.py
+# Content-hash + perceptual-hash cache for /api/verify-media, and image pre-shrinking
+# so fresh uploads cost less bandwidth and vision latency.
+import hashlib
+import io
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import (
+    MEDIA_CACHE_TTL, MEDIA_CACHE_MAX_ENTRIES, MEDIA_PHASH_DISTANCE, MEDIA_CONFIRM_SIZE, MEDIA_CONFIRM_MAX_DIFF,
+    MEDIA_MAX_DIMENSION, MEDIA_REENCODE_BYTES, MEDIA_JPEG_QUALITY
+)
+
+# (difference hash, zlib-compressed grayscale thumbnail) of a decoded upload
+Fingerprint = Tuple[int, bytes]
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _dhash(image, size: int = 32) -> int:
+    """Difference hash (size*size bits): survives recompression and resizing of the same
+    image. It only shortlists candidates: two chat screenshots sharing one layout can be
+    closer than a copy of either recompressed at low quality."""
+    small = image.convert("L").resize((size + 1, size))
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def _thumbnail(image, size: int = MEDIA_CONFIRM_SIZE) -> bytes:
+    from PIL import Image
+    # Shrinking with BILINEAR averages areas: recompression noise cancels out, a changed digit does not
+    return image.convert("L").resize((size, size), Image.Resampling.BILINEAR).tobytes()
+
+
+def fingerprint(image) -> Fingerprint:
+    return _dhash(image), zlib.compress(_thumbnail(image))
+
+
+def same_picture(a: Fingerprint, b: Fingerprint, max_distance: int = MEDIA_PHASH_DISTANCE,
+                 max_diff: int = MEDIA_CONFIRM_MAX_DIFF) -> bool:
+    """Whether two fingerprints are one image, recompressed or resized.
+
+    The hashes must be within max_distance bits, and then no thumbnail pixel may differ
+    by more than max_diff grey levels. A recompressed copy moves every pixel a little;
+    different text on the same layout moves the pixels under it a lot.
+    """
+    if (a[0] ^ b[0]).bit_count() > max_distance:
+        return False
+    pixels_a, pixels_b = zlib.decompress(a[1]), zlib.decompress(b[1])
+    return len(pixels_a) == len(pixels_b) and max(abs(p - q) for p, q in zip(pixels_a, pixels_b)) <= max_diff
+
+
+def prepare_image(data: bytes, content_type: Optional[str]) -> Tuple[bytes, Optional[str], Optional[Fingerprint]]:
+    """Returns (bytes_to_upload, mime_type, fingerprint).
+
+    Oversized images are downscaled to MEDIA_MAX_DIMENSION and re-encoded as JPEG.
+    Anything Pillow cannot open is passed through untouched with no fingerprint.
+    """
+    from PIL import Image, ImageOps
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception:
+        return data, content_type, None
+
+    image = ImageOps.exif_transpose(image)
+    prints = fingerprint(image)
+    if max(image.size) <= MEDIA_MAX_DIMENSION and len(data) <= MEDIA_REENCODE_BYTES:
+        return data, content_type, prints
+
+    image.thumbnail((MEDIA_MAX_DIMENSION, MEDIA_MAX_DIMENSION))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=MEDIA_JPEG_QUALITY, optimize=True)
+    shrunk = out.getvalue()
+    if len(shrunk) >= len(data):
+        return data, content_type, prints
+    return shrunk, "image/jpeg", prints
+
+
+class MediaQueryCache:
+    """Maps an upload to the search query extracted from it, by exact SHA-256 first and
+    then by fingerprint (see same_picture). The verification result itself lives in the
+    RAG result cache under that query."""
+
+    def __init__(self, ttl: float = MEDIA_CACHE_TTL, max_entries: int = MEDIA_CACHE_MAX_ENTRIES,
+                 max_distance: int = MEDIA_PHASH_DISTANCE, max_diff: int = MEDIA_CONFIRM_MAX_DIFF):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_diff = max_diff
+        self._entries = OrderedDict()  # digest -> (expires_at, fingerprint, query)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+
+    def get_exact(self, digest: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry[2]
+        return None
+
+    def get_similar(self, prints: Optional[Fingerprint]) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            if prints is not None:
+                # Closest hashes first; the pixel check confirms before a query is reused
+                candidates = sorted(
+                    ((prints[0] ^ other[0]).bit_count(), digest)
+                    for digest, (expires_at, other, _) in self._entries.items()
+                    if other is not None and expires_at > now
+                )
+                best = next((digest for distance, digest in candidates if distance <= self.max_distance
+                             and same_picture(prints, self._entries[digest][1], self.max_distance, self.max_diff)), None)
+                if best is not None:
+                    self._entries.move_to_end(best)
+                    self.perceptual_hits += 1
+                    return self._entries[best][2]
+            self.misses += 1
+            return None
+
+    def put(self, digest: str, prints: Optional[Fingerprint], query: str):
+        if not query: return
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + self.ttl, prints, query)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits,
+                    "perceptualHits": self.perceptual_hits, "misses": self.misses}
+
+
+MEDIA_CACHE = MediaQueryCache()
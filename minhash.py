@@ -0,0 +1,37 @@
+# minhash.py
+# Word-shingle MinHash sketches for spotting near-duplicate text (syndicated wire copy,
+# reworded forwards) without comparing full documents.
+import heapq
+import zlib
+from typing import Iterable, Set, Tuple
+
+from config import MINHASH_SHINGLE_SIZE, MINHASH_SKETCH_SIZE
+from text_utils import tokenize
+
+
+def shingles(text: str, size: int = MINHASH_SHINGLE_SIZE) -> Set[int]:
+    """Hashes of every run of `size` consecutive words; short texts become one shingle."""
+    words = tokenize(text, drop_stopwords=False)
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode())}
+    return {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+def sketch(shingle_set: Iterable[int], k: int = MINHASH_SKETCH_SIZE) -> Tuple[int, ...]:
+    """Bottom-k MinHash: the k smallest shingle hashes.
+
+    One hash function instead of k permutations, so building a sketch is a single
+    heapq.nsmallest call rather than k passes over the shingles.
+    """
+    return tuple(heapq.nsmallest(k, shingle_set))
+
+
+def estimate_jaccard(a: Tuple[int, ...], b: Tuple[int, ...], k: int = MINHASH_SKETCH_SIZE) -> float:
+    """Jaccard similarity of the underlying shingle sets, estimated from two sketches."""
+    if not a or not b:
+        return 0.0
+    union_sketch = heapq.nsmallest(k, set(a) | set(b))
+    both = set(a) & set(b)
+    return sum(1 for h in union_sketch if h in both) / len(union_sketch)
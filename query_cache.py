@@ -0,0 +1,197 @@
+# query_cache.py
+# In-process TTL/LRU cache of finished audits, keyed by normalized query,
+# plus single-flight coalescing of identical audits that are still running.
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from config import RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES, COALESCE_WAIT_TIMEOUT, BATCH_SHARE_SIMILARITY
+from text_utils import normalize_query, same_order, stem_terms
+
+
+# Tokens that flip or pin down a claim. Near-duplicate matches must agree on all of them,
+# otherwise "X has banned 2000 notes" would answer "X has not banned 500 notes".
+_POLARITY_WORDS = frozenset(["not", "no", "nor", "never", "none", "fake", "false", "hoax", "true", "real", "nahi", "nahin"])
+
+def _claim_signature(key: str) -> frozenset:
+    return frozenset(t for t in key.split() if t in _POLARITY_WORDS or any(ch.isdigit() for ch in t))
+
+
+def dedupe_queries(queries: List[str]) -> Dict[str, List[int]]:
+    """Normalized key -> positions of every submitted phrasing of it, in first-seen order."""
+    positions = {}
+    for i, query in enumerate(queries):
+        key = normalize_query(query)
+        if key:
+            positions.setdefault(key, []).append(i)
+    return positions
+
+
+def cluster_queries(keys: List[str], similarity: float = BATCH_SHARE_SIMILARITY) -> List[List[str]]:
+    """Groups normalized keys whose word sets overlap enough to reuse one retrieval.
+
+    Greedy against each cluster's first key; like the cache, members must agree on
+    negations and numbers, so "X banned" and "X not banned" still retrieve separately.
+    """
+    clusters = []  # (word set, signature, members)
+    for key in keys:
+        words, signature = set(key.split()), _claim_signature(key)
+        for seed_words, seed_signature, members in clusters:
+            if signature == seed_signature and len(words & seed_words) / len(words | seed_words) >= similarity:
+                members.append(key)
+                break
+        else:
+            clusters.append((words, signature, [key]))
+    return [members for _, _, members in clusters]
+
+
+def is_cacheable(result: Optional[dict]) -> bool:
+    """Fail-safe responses are never cached; the next caller should retry upstream."""
+    return bool(result) and result.get("status") == "SUCCESS" and not result.get("fail_safe")
+
+
+def content_terms(key: str) -> frozenset:
+    """The stemmed content words of a normalized key; two phrasings of one claim share them."""
+    return frozenset(stem_terms(key))
+
+
+class QueryResultCache:
+    """Exact lookups on the normalized query, then a content-word fallback so other
+    phrasings of the same claim reuse a fresh verdict.
+
+    A near hit must use exactly the same stemmed content words, in the same relative
+    order: only stopwords and inflection may differ ("Has RBI banned 2000 notes?" /
+    "RBI bans 2000 notes"). A single substituted word ("Punjab" / "Haryana",
+    "announced" / "denied", "500" / "2000", an added "not") is a different claim, and
+    however long the shared rest of the sentence, it is never answered from the cache.
+    """
+
+    def __init__(self, ttl: float = RESULT_CACHE_TTL, max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._by_content: Dict[frozenset, Set[str]] = {}  # content terms -> keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[dict]:
+        key = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if entry:
+                self._delete(key)
+
+            match = self._find_similar(key, now)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.near_hits += 1
+                return dict(self._entries[match][1])
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, result: dict):
+        if not is_cacheable(result):
+            return
+        key = normalize_query(query)
+        with self._lock:
+            if key not in self._entries:
+                self._by_content.setdefault(content_terms(key), set()).add(key)
+            self._entries[key] = (time.monotonic() + self.ttl, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._delete(next(iter(self._entries)))
+
+    def _delete(self, key: str):
+        del self._entries[key]
+        content = content_terms(key)
+        keys = self._by_content.get(content)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_content[content]
+
+    def _find_similar(self, key: str, now: float) -> Optional[str]:
+        content = content_terms(key)
+        if not content:
+            return None
+        terms = stem_terms(key)
+        best, best_expiry = None, now
+        for candidate in self._by_content.get(content, ()):
+            expires_at = self._entries[candidate][0]
+            # Freshest verdict wins when several phrasings are cached
+            if expires_at > best_expiry and same_order(terms, stem_terms(candidate)):
+                best, best_expiry = candidate, expires_at
+        return best
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_content.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "nearHits": self.near_hits, "misses": self.misses}
+
+
+class _LeaderFailed(Exception):
+    """Raised to followers when the leading audit died with an exception."""
+
+
+class SingleFlight:
+    """Concurrent callers with the same normalized query share one in-flight audit.
+
+    The first caller (leader) runs the audit; followers await its result for at most
+    `wait_timeout` seconds and then get asyncio.TimeoutError. If the leader raises,
+    followers run the audit themselves instead of inheriting the exception.
+    """
+
+    def __init__(self, wait_timeout: float = COALESCE_WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self._inflight = {}  # key -> asyncio.Future
+        self.leaders = 0
+        self.followers = 0
+        self.follower_timeouts = 0
+
+    async def run(self, query: str, factory):
+        key = normalize_query(query)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.followers += 1
+            try:
+                # shield() so a follower giving up never cancels the leader's audit
+                result = await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+                return dict(result)
+            except asyncio.TimeoutError:
+                self.follower_timeouts += 1
+                raise
+            except _LeaderFailed:
+                return await factory()
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the exception as retrieved even when nobody is following
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result = await factory()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(_LeaderFailed(repr(e)))
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"inFlight": len(self._inflight), "leaders": self.leaders,
+                "followers": self.followers, "followerTimeouts": self.follower_timeouts}
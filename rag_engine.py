@@ -1,29 +1,82 @@
 import os
-import requests
+import asyncio
+import httpx
 import re
-import datetime
-from firebase_admin import firestore
-from difflib import SequenceMatcher
-from tavily import TavilyClient 
-from source_reputation import get_source_profile
-from config import API_URL_BASE, MODEL_NAME, SYSTEM_INSTRUCTION, RAW_NEWS_COLLECTION
-from database_setup import DB
+import json
+import time
+import functools
+from source_reputation import SOURCE_REGISTRY
+from config import (
+    API_URL_BASE, MODEL_NAME, TEXT_MODELS, SYSTEM_INSTRUCTION, RAW_NEWS_COLLECTION, TAVILY_TIMEOUT,
+    GOLDEN_DOMAINS, CONSENSUS_DOMAINS,
+    GEMINI_TIMEOUT, HTTP_POOL_SIZE, HTTP_KEEPALIVE_EXPIRY, LOCAL_MIN_HITS, LOCAL_MIN_COVERAGE,
+    BATCH_CONCURRENCY, RETRIEVAL_POLICY, RETRIEVAL_EARLY_EXIT_SCORE, RETRIEVAL_EARLY_EXIT_RESULTS
+)
+from query_cache import QueryResultCache, SingleFlight, dedupe_queries, cluster_queries
+from local_index import LOCAL_INDEX
+from claim_matcher import CLAIM_MATCHER
+from trend_rollup import TREND_ROLLUP
+from bias_scorer import LoadedTermMatcher
+from telemetry import METRICS, span, cache_lookup, classify_error
+from context_builder import build_context
+from upstream_scheduler import SCHEDULER, BATCH, lane, attempt_timeout
 
-tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+RESULT_CACHE = QueryResultCache()
+INFLIGHT_AUDITS = SingleFlight()
+
+# Clients are created on first use: they are bound to the running event loop, and
+# none of them should cost anything at import (cold start).
+_async_tavily = None
+_gemini_http = None
+
+def get_async_tavily():
+    global _async_tavily
+    if _async_tavily is None:
+        from tavily import AsyncTavilyClient
+        _async_tavily = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+    return _async_tavily
+
+def get_gemini_http() -> httpx.AsyncClient:
+    """Pooled keep-alive client for API_URL_BASE, shared by every async audit."""
+    global _gemini_http
+    if _gemini_http is None or _gemini_http.is_closed:
+        _gemini_http = httpx.AsyncClient(
+            base_url=API_URL_BASE,
+            timeout=GEMINI_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    return _gemini_http
+
+async def close_async_clients():
+    """Releases pooled connections; called from the app shutdown hook."""
+    global _async_tavily, _gemini_http
+    if _gemini_http is not None:
+        await _gemini_http.aclose()
+        _gemini_http = None
+    if _async_tavily is not None:
+        await _async_tavily.close()
+        _async_tavily = None
 
 # --- HELPER FUNCTIONS ---
 
+# The response's own tone markers; bias_scorer.LOADED_WORDS scores stored articles
+RESPONSE_BIAS_MATCHER = LoadedTermMatcher({"loaded": ["allegedly", "claimed", "apparently", "supposedly", "huge", "shocking", "exposed"]})
+
 def calculate_bias_score(text: str) -> float:
     if not text: return 0.0
-    loaded_markers = ["allegedly", "claimed", "apparently", "supposedly", "huge", "shocking", "exposed"]
-    words = text.lower().split()
-    bias_hits = sum(1 for word in words if any(marker in word for marker in loaded_markers))
-    return min(round((bias_hits / max(len(words), 1)) * 10, 2), 1.0)
+    analysis = RESPONSE_BIAS_MATCHER.analyze(text)
+    return min(round((analysis["hits"] / max(analysis["words"], 1)) * 10, 2), 1.0)
+
 
+# List of tags we expect in order
+AI_RESPONSE_TAGS = ["[SUMMARY]", "[COUNTER_SUMMARY]", "[CLARIFICATION]", "[AUDIT]", "[LOGIC_AUDIT]", "[CONFIDENCE]"]
 
 def parse_ai_response(text):
-    # List of tags we expect in order
-    tags = ["[SUMMARY]", "[COUNTER_SUMMARY]", "[CLARIFICATION]", "[AUDIT]", "[LOGIC_AUDIT]", "[CONFIDENCE]"]
+    tags = AI_RESPONSE_TAGS
     sections = {}
     
     # Map where every tag starts in the raw text
@@ -50,113 +103,521 @@ def parse_ai_response(text):
             
     return sections
 
+class StreamingTagParser:
+    """Incremental twin of parse_ai_response for streamed model output.
+
+    feed() returns the (tag, content) sections completed by the new text; a section
+    is complete once the next tag shows up. close() flushes the last one. Like
+    parse_ai_response, only the first occurrence of each tag opens a section.
+    """
+
+    _MAX_TAG_LEN = max(len(tag) for tag in AI_RESPONSE_TAGS)
+
+    def __init__(self):
+        self._buffer = ""
+        self._scanned = 0  # buffer prefix already known to hold no complete unseen tag
+        self._current = None
+        self._seen = set()
+
+    def feed(self, text: str):
+        self._buffer += text
+        done = []
+        while True:
+            # A tag may straddle the previous chunk boundary, so back up by one tag length
+            start = max(self._scanned - self._MAX_TAG_LEN, 0)
+            hits = [(self._buffer.find(tag, start), tag) for tag in AI_RESPONSE_TAGS if tag not in self._seen]
+            hits = [hit for hit in hits if hit[0] != -1]
+            if not hits:
+                self._scanned = len(self._buffer)
+                return done
+            idx, tag = min(hits)
+            if self._current is not None:
+                done.append((self._current, self._buffer[:idx].strip()))
+            self._seen.add(tag)
+            self._current = tag
+            self._buffer = self._buffer[idx + len(tag):]
+            self._scanned = 0
+
+    def close(self):
+        if self._current is None: return []
+        done = [(self._current, self._buffer.strip())]
+        self._current, self._buffer = None, ""
+        return done
+
+# --- RETRIEVAL STAGE ---
+
+def local_retrieval(user_query: str):
+    """Zero-network first tier over the ingested corpus. Returns (hits, sufficient)."""
+    with span("local_retrieval"):
+        hits = [hit for hit in LOCAL_INDEX.search(user_query) if hit["coverage"] >= LOCAL_MIN_COVERAGE]
+    return hits, len(hits) >= LOCAL_MIN_HITS
+
+def build_retrieval_plan(user_query: str, depth: str = "advanced") -> dict:
+    """The three Tavily searches behind every audit, keyed by context name."""
+    return {
+        "golden": {"query": user_query, "include_domains": GOLDEN_DOMAINS, "search_depth": depth, "max_results": 4},
+        "consensus": {"query": user_query, "include_domains": CONSENSUS_DOMAINS, "search_depth": depth, "max_results": 3},
+        "alternative": {"query": f'criticism of "{user_query}" OR "opposition to {user_query}"', "search_depth": depth, "max_results": 3},
+    }
+
+def tier_coverage(response) -> float:
+    """How directly a tier answers the query: mean Tavily score of its top results."""
+    scores = sorted((r.get("score") or 0.0 for r in (response or {}).get("results", [])), reverse=True)
+    return round(sum(scores[:RETRIEVAL_EARLY_EXIT_RESULTS]) / RETRIEVAL_EARLY_EXIT_RESULTS, 3)
+
+def _golden_first(user_query: str) -> dict:
+    """Step 1 of the adaptive policy: the fact-checker tier alone, at basic depth."""
+    return {"golden": dict(build_retrieval_plan(user_query)["golden"], search_depth="basic")}
+
+def _widen(first: dict, second: dict, second_missing: list):
+    """Merges the basic golden results into the wider round's (advanced golden wins on
+    duplicate URLs) and only reports a tier missing if neither round returned it."""
+    if "golden" in first:
+        seen = {r.get("url") for r in second.get("golden", {}).get("results", [])}
+        merged = second.get("golden", {}).get("results", []) + [r for r in first["golden"].get("results", []) if r.get("url") not in seen]
+        second["golden"] = dict(second.get("golden") or first["golden"], results=merged)
+    missing = [name for name in second_missing if name not in second]
+    return second, missing
+
+def _retrieval_report(steps: list, coverage, early_exit: bool) -> dict:
+    return {"policy": RETRIEVAL_POLICY, "steps": steps, "goldenCoverage": coverage, "earlyExit": early_exit}
+
+async def adaptive_retrieval_async(user_query: str):
+    """Golden tier first; consensus/alternative searches and the advanced-depth golden
+    search only run when the fact-checkers do not already cover the claim.
+    Returns (results, missing, report)."""
+    if RETRIEVAL_POLICY != "adaptive":
+        results, missing = await run_concurrent_retrieval_async(build_retrieval_plan(user_query))
+        return results, missing, _retrieval_report(["golden:advanced", "consensus:advanced", "alternative:advanced"], None, False)
+    first, _ = await run_concurrent_retrieval_async(_golden_first(user_query))
+    coverage = tier_coverage(first.get("golden"))
+    if coverage >= RETRIEVAL_EARLY_EXIT_SCORE:
+        print(f"🎯 Golden tier covers the claim ({coverage}), skipping wider searches.")
+        return first, [], _retrieval_report(["golden:basic"], coverage, True)
+    second, second_missing = await run_concurrent_retrieval_async(build_retrieval_plan(user_query))
+    results, missing = _widen(first, second, second_missing)
+    return results, missing, _retrieval_report(["golden:basic", "golden:advanced", "consensus:advanced", "alternative:advanced"], coverage, False)
+
+async def run_concurrent_retrieval_async(searches: dict, timeout: float = TAVILY_TIMEOUT):
+    """Fires every Tavily search at once on the shared AsyncTavilyClient and waits at
+    most `timeout` seconds for each.
+
+    Returns (results, missing): results maps search name -> Tavily response for the
+    searches that came back, missing lists the names that timed out or failed.
+    """
+    client = get_async_tavily()
+
+    async def _search(name, params):
+        # acall bounds quota waits, retries and every attempt by the deadline, and counts a
+        # timed-out attempt in fairgpt_upstream_errors_total itself
+        with span(f"tavily_{name}"):
+            return await SCHEDULER.acall("tavily", lambda: client.search(timeout=attempt_timeout(timeout), **params),
+                                         deadline=timeout)
+
+    outcomes = await asyncio.gather(*(_search(name, params) for name, params in searches.items()), return_exceptions=True)
+    results, missing = {}, []
+    for name, outcome in zip(searches, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            print(f"⏱️ Tavily '{name}' search timed out after {timeout}s, continuing without it.")
+            missing.append(name)
+        elif isinstance(outcome, Exception):
+            print(f"⚠️ Tavily '{name}' search failed: {outcome}")
+            missing.append(name)
+        else:
+            results[name] = outcome
+    return results, missing
+
+# --- PIPELINE STAGES (shared by the single, batch and streaming audits) ---
+
+def assemble_context(retrieved: dict, missing_contexts: list, user_query: str = "", retrieval: dict = None) -> dict:
+    if not retrieved:
+        raise RuntimeError("All retrieval searches failed or timed out.")
+    local_res = retrieved.get("local", {})
+    g_res = retrieved.get("golden", {})
+    c_res = retrieved.get("consensus", {})
+    alt_res = retrieved.get("alternative", {})
+
+    consensus_results = local_res.get('results', []) + g_res.get('results', []) + c_res.get('results', [])
+    # Deduplicated, ranked and fitted to CONTEXT_TOKEN_BUDGET however much retrieval returned
+    with span("context_build"):
+        consensus_context, alternative_context, budget = build_context(user_query, consensus_results, alt_res.get('results', []))
+    METRICS.inc("fairgpt_context_tokens_saved_total", budget["tokensSaved"])
+    print(f"✂️ Context: {budget['tokensOut']} tokens ({budget['tokensSaved']} saved, {budget['duplicatesDropped']} duplicates dropped)")
+    missing_note = f"\n\nMISSING CONTEXT: {', '.join(missing_contexts)} retrieval unavailable." if missing_contexts else ""
+
+    return {
+        "consensus": consensus_context,
+        "alternative": alternative_context + missing_note,
+        "results": consensus_results + alt_res.get('results', []),
+        "missing": missing_contexts,
+        "query": user_query,
+        "tiers": [name for name in ("local", "golden", "consensus", "alternative") if name in retrieved],
+        "retrieval": retrieval,
+        "budget": budget
+    }
+
+def classify_sources(all_results: list):
+    """🟢 STRICT MASTER INTEGRITY SCAN: returns (counts, verified_sources) ranked gold > consensus > raw."""
+    with span("classify_sources"):
+        return SOURCE_REGISTRY.classify_urls(r.get('url') for r in all_results)
+
+def build_generation_payload(user_query: str, context: dict) -> dict:
+    return {
+        "contents": [{"parts": [{"text": f"QUERY: {user_query}\n\nCONSENSUS:\n{context['consensus']}\n\nALTERNATIVE:\n{context['alternative']}"}]}],
+        "system_instruction": {"parts": [{"text": SYSTEM_INSTRUCTION + "\n\nSTRUCTURE: [SUMMARY], [COUNTER_SUMMARY], [CLARIFICATION], [AUDIT], [LOGIC_AUDIT], [CONFIDENCE]. Do not use markdown headers."}]}
+    }
+
+def generation_path(model_name: str = MODEL_NAME) -> str:
+    return f"/v1beta/models/{model_name}:generateContent"
+
+def stream_generation_path(model_name: str = MODEL_NAME) -> str:
+    return f"/v1beta/models/{model_name}:streamGenerateContent"
+
+def to_list(s):
+    if not s: return []
+    return [line.strip("- ").strip() for line in s.splitlines() if line.strip()]
+
+def verification_audit(counts: dict, context: dict) -> dict:
+    return {"goldenCount": counts["gold"], "consensusCount": counts["con"], "rawCount": counts["raw"],
+            "missingContexts": context["missing"], "retrievalTiers": context["tiers"], "retrievalSteps": context.get("retrieval"),
+            "contextBudget": context.get("budget")}
+
+def build_audit_response(raw_text: str, counts: dict, verified_sources: list, context: dict) -> dict:
+    with span("parse_response"):
+        return _build_audit_response(raw_text, counts, verified_sources, context)
+
+def trend_history(user_query: str) -> list:
+    # Temporal Data: daily mention volume from the ingestion rollups (trend_rollup.py)
+    with span("trend_history"):
+        return TREND_ROLLUP.history(user_query)
+
+def _build_audit_response(raw_text: str, counts: dict, verified_sources: list, context: dict) -> dict:
+    # 🟢 STABILITY PARSER (Zero Regex for tags)
+    parsed = parse_ai_response(raw_text)
+
+    summary = parsed.get("[SUMMARY]", "Summary unavailable.")
+    counter = parsed.get("[COUNTER_SUMMARY]", "No alternative view found.")
+    clari = to_list(parsed.get("[CLARIFICATION]", ""))
+    audit_trail = to_list(parsed.get("[AUDIT]", ""))
+    logic = parsed.get("[LOGIC_AUDIT]", "Audit complete.")
+    conf_val = parsed.get("[CONFIDENCE]", "95")
+
+    return {
+        "status": "SUCCESS",
+        "summary": summary or "Consensus summary verified.",
+        "counter_summary": counter or "No significant alternative perspective found.",
+        "clarifications": clari,
+        "audit_history": audit_trail,
+        "logic_audit": logic or "Audit complete.",
+        "certainty": int(re.search(r'\d+', conf_val).group()) if re.search(r'\d+', conf_val) else 95,
+        "trend_history": trend_history(context.get("query", "")),
+        "verification_audit": verification_audit(counts, context),
+        "bias_score": calculate_bias_score(raw_text),
+        "sources": verified_sources[:8]
+    }
+
+def fail_safe_response(e: Exception) -> dict:
+    print(f"🔥 FAIL-SAFE: {e}")
+    METRICS.inc("fairgpt_fail_safe_total", reason=classify_error(e))
+    return {"status": "SUCCESS", "summary": f"Audit error: {str(e)}", "certainty": 60, "clarifications": [], "audit_history": [], "fail_safe": True}
+
+# --- STORED FACT-CHECK FAST PATH ---
+
+def match_stored_claim(user_query: str):
+    """The stored fact-check this query is a rewording of (see claim_matcher), or None."""
+    with span("claim_match"):
+        match = CLAIM_MATCHER.match(user_query)
+    cache_lookup("claim_match", "miss" if match is None else "hit")
+    return match
+
+def claim_match_response(user_query: str, match: dict) -> dict:
+    """An audit response built from a stored fact-check and its source profile, in the
+    shape _build_audit_response returns, with no retrieval or generation behind it."""
+    counts, verified_sources = classify_sources([match])
+    profile = verified_sources[0]["meta"] if verified_sources else {}
+    name = profile.get("name") or match.get("source") or "A fact-checker"
+    rating, verdict = match.get("rating"), (match.get("verdict") or "").strip()
+    summary = f"{name} has already fact-checked this claim and rated it {rating}."
+    if verdict and verdict.lower() != str(rating).lower():
+        summary += f" Their verdict: {verdict}"
+
+    clarifications = [f"Checked claim: {match.get('claim')}"]
+    if match.get("claimant"): clarifications.append(f"Claim made by: {match['claimant']}")
+    if match.get("published_date"): clarifications.append(f"Fact-check published: {match['published_date']}")
+    badge = f", {profile['badge']}" if profile.get("badge") else ""
+
+    # Certified fact-checkers start higher; a looser wording match costs certainty
+    base = 95 if profile.get("certified") else 80
+    certainty = int(base - (1 - match["similarity"]) * 50)
+    context = {"missing": [], "tiers": ["claim_match"], "budget": None,
+               "retrieval": _retrieval_report(["claim_match"], None, True)}
+    audit = verification_audit(counts, context)
+    audit["claimMatch"] = {"url": match.get("url"), "similarity": match["similarity"], "rating": rating}
+
+    return {
+        "status": "SUCCESS",
+        "summary": summary,
+        "counter_summary": "No alternative view retrieved: answered from a published fact-check.",
+        "clarifications": clarifications,
+        "audit_history": [f"Matched stored fact-check {match.get('url')} (similarity {match['similarity']:.2f})",
+                          f"Source: {name} ({profile.get('type', 'Web Source')}, {profile.get('reliability', 'Standard')}{badge})"],
+        "logic_audit": f"Verdict reused from {name}'s published fact-check; web retrieval and AI generation were skipped.",
+        "certainty": certainty,
+        "trend_history": trend_history(user_query),
+        "verification_audit": audit,
+        "bias_score": calculate_bias_score(f"{match.get('claim', '')} {verdict}"),
+        "sources": verified_sources[:8]
+    }
+
 # --- CORE ORCHESTRATION ---
 
 def generate_hybrid_rag_news(user_query: str, api_key: str):
+    """Blocking entry point for scripts; the API awaits agenerate_hybrid_rag_news.
+
+    The pooled async clients belong to the event loop they were opened on, so they are
+    closed again before this call's loop goes away.
+    """
+    async def _once():
+        try:
+            return await agenerate_hybrid_rag_news(user_query, api_key)
+        finally:
+            await close_async_clients()
+    return asyncio.run(_once())
+
+async def agenerate_hybrid_rag_news(user_query: str, api_key: str, fetch=None):
+    """Cached, coalesced audit of one claim on the running event loop.
+
+    `fetch` optionally supplies the raw retrieval (see _afetch), so batch audits of
+    overlapping claims can share one set of searches.
+    """
+    cached = RESULT_CACHE.get(user_query)
+    cache_lookup("result", "miss" if cached is None else "hit")
+    if cached is not None:
+        print(f"⚡ CACHE HIT: {user_query}")
+        return cached
+
+    async def _audit_and_cache():
+        # Only the leader writes the cache, and put() rejects fail-safe results,
+        # so followers of a failed leader get the failure, never a cached success.
+        result = await _arun_audit(user_query, api_key, fetch)
+        RESULT_CACHE.put(user_query, result)
+        return result
+
+    try:
+        return await INFLIGHT_AUDITS.run(user_query, _audit_and_cache)
+    except asyncio.TimeoutError:
+        return fail_safe_response(TimeoutError("An identical audit is still running; retry shortly."))
+
+async def _afetch(user_query: str):
+    """Raw retrieval for one query: (retrieved, missing_contexts, report), not yet assembled."""
+    local_hits, local_sufficient = local_retrieval(user_query)
+    if local_sufficient:
+        print(f"📚 Local index answered with {len(local_hits)} documents, skipping web retrieval.")
+        retrieved, missing_contexts, report = {}, [], _retrieval_report(["local"], None, True)
+    else:
+        retrieved, missing_contexts, report = await adaptive_retrieval_async(user_query)
+    if local_hits:
+        retrieved["local"] = {"results": local_hits}
+    return retrieved, missing_contexts, report
+
+async def _aretrieve(user_query: str, fetch=None) -> dict:
+    retrieved, missing_contexts, report = await (fetch() if fetch else _afetch(user_query))
+    # Context is assembled per claim even when retrieval was shared, so ranking and
+    # the token budget follow this claim's wording
+    return assemble_context(retrieved, missing_contexts, user_query, report)
+
+async def _arun_audit(user_query: str, api_key: str, fetch=None):
     try:
         print(f"\n🔍 --- AUDIT START: {user_query} ---")
-        GOLDEN_LIST = ["pib.gov", "boomlive.in", "factly.in", "altnews.in"]
-        CONSENSUS_LIST = ["thehindu.com", "indianexpress.com", "reuters.com", "apnews.com", "aniin.com"]
-        # 1. Dual-Context Retrieval
-        g_res = tavily.search(
-            query=user_query, 
-            include_domains=GOLDEN_LIST, 
-            search_depth="advanced", 
-            max_results=4
-        )
-        c_res = tavily.search(
-            query=user_query, 
-            include_domains=CONSENSUS_LIST, 
-            search_depth="advanced", 
-            max_results=3
-        )
-        alt_res = tavily.search(
-            query=f'criticism of "{user_query}" OR "opposition to {user_query}"', 
-            search_depth="advanced", 
-            max_results=3
-        )
+        # 0. Already fact-checked? Answer from the stored verdict (a batch's shared
+        # retrieval is then simply not awaited by this claim)
+        match = match_stored_claim(user_query)
+        if match:
+            print(f"🎯 CLAIM MATCH: {match['url']} ({match['similarity']:.2f})")
+            return claim_match_response(user_query, match)
 
-        consensus_context = "\n\n".join([f"SOURCE: {r.get('url')}\n{r.get('content')}" for r in g_res.get('results', []) + c_res.get('results', [])])
-        alternative_context = "\n\n".join([f"SOURCE: {r.get('url')}\n{r.get('content')}" for r in alt_res.get('results', [])])
+        # 1. Retrieval
+        context = await _aretrieve(user_query, fetch)
 
-        # 2. 🟢 STRICT MASTER INTEGRITY SCAN
-        all_results = g_res.get('results', []) + c_res.get('results', []) + alt_res.get('results', [])
-        unique_urls = list(set([r.get('url') for r in all_results if r.get('url')]))
-        
-        
-        
-        counts = {"gold": 0, "con": 0, "raw": 0}
-        verified_sources = []
+        # 2. Source ranking
+        counts, verified_sources = classify_sources(context["results"])
 
-        for url in unique_urls:
-            low_url = url.lower()
-            profile = get_source_profile(url)
-            
-            # Categorization logic
-            if any(domain in low_url for domain in GOLDEN_LIST):
-                counts["gold"] += 1
-                verified_sources.append({"url": url, "meta": profile, "rank": 1})
-            elif any(domain in low_url for domain in CONSENSUS_LIST):
-                counts["con"] += 1
-                verified_sources.append({"url": url, "meta": profile, "rank": 2})
-            else:
-                counts["raw"] += 1
-                # Only add raw sources if we have space, prioritized last
-                verified_sources.append({"url": url, "meta": profile, "rank": 3})
-
-        # Sort sources so Golden and Consensus appear first in the UI
-        verified_sources.sort(key=lambda x: x['rank'])
-
-        # 3. AI Generation
-        payload = {
-            "contents": [{"parts": [{"text": f"QUERY: {user_query}\n\nCONSENSUS:\n{consensus_context}\n\nALTERNATIVE:\n{alternative_context}"}]}],
-            "system_instruction": {"parts": [{"text": SYSTEM_INSTRUCTION + "\n\nSTRUCTURE: [SUMMARY], [COUNTER_SUMMARY], [CLARIFICATION], [AUDIT], [LOGIC_AUDIT], [CONFIDENCE]. Do not use markdown headers."}]}
-        }
-        
-        response = requests.post(f"{API_URL_BASE}/v1beta/models/{MODEL_NAME}:generateContent?key={api_key}", json=payload, timeout=45)
-        response.raise_for_status()
+        # 3. AI Generation over the pooled keep-alive connection
+        payload = build_generation_payload(user_query, context)
+
+        async def _generate(model_name):
+            response = await get_gemini_http().post(generation_path(model_name), params={"key": api_key}, json=payload,
+                                                    timeout=attempt_timeout(GEMINI_TIMEOUT))
+            response.raise_for_status()
+            return response
+
+        with span("gemini_generate"):
+            response = await SCHEDULER.acall("gemini", _generate, models=TEXT_MODELS)
         raw_text = response.json()['candidates'][0]['content']['parts'][0]['text']
-        parsed=parse_ai_response(raw_text)
-
-        # 4. 🟢 STABILITY PARSER (Zero Regex for tags)
-        def get_tag_content(text, tag, next_tag=None):
-            start = text.find(tag)
-            if start == -1: return ""
-            start += len(tag)
-            if next_tag:
-                end = text.find(next_tag, start)
-                return text[start:end].strip() if end != -1 else text[start:].strip()
-            return text[start:].strip()
-
-        def to_list(s):
-            if not s: return []
-            return [line.strip("- ").strip() for line in s.splitlines() if line.strip()]
-
-        summary = parsed.get("[SUMMARY]", "Summary unavailable.")
-        counter = parsed.get("[COUNTER_SUMMARY]", "No alternative view found.")
-        clari = to_list(parsed.get("[CLARIFICATION]", ""))
-        audit_trail = to_list(parsed.get("[AUDIT]", ""))
-        logic = parsed.get("[LOGIC_AUDIT]", "Audit complete.")
-        conf_val = parsed.get("[CONFIDENCE]", "95")
-
-        # 5. Temporal Data
-        today = datetime.date.today()
-        trend = [{"date": (today - datetime.timedelta(days=i)).strftime("%b %d"), "volume": 10 + (i * 7) % 30} for i in range(6, -1, -1)]
-
-        return {
-            "status": "SUCCESS",
-            "summary": summary or "Consensus summary verified.",
-            "counter_summary": counter or "No significant alternative perspective found.",
-            "clarifications": clari,
-            "audit_history": audit_trail,
-            "logic_audit": logic or "Audit complete.",
-            "certainty": int(re.search(r'\d+', conf_val).group()) if re.search(r'\d+', conf_val) else 95,
-            "trend_history": trend,
-            "verification_audit": {"goldenCount": counts["gold"], "consensusCount": counts["con"], "rawCount": counts["raw"]},
-            "bias_score": calculate_bias_score(raw_text),
-            "sources": verified_sources[:8]
-        }
+
+        # 4. Parsing
+        return build_audit_response(raw_text, counts, verified_sources, context)
+
+    except Exception as e:
+        return fail_safe_response(e)
+
+# --- BATCH ---
+
+async def abatch_hybrid_rag_news(queries: list, api_key: str, concurrency: int = BATCH_CONCURRENCY):
+    """Async generator of (positions, query, result) for /api/search/batch, in completion order.
+
+    Repeated claims are audited once and reported at every position they were
+    submitted at; overlapping claims share one retrieval; at most `concurrency`
+    audits run at a time. The final item is (None, None, summary).
+    """
+    started = time.perf_counter()
+    positions = dedupe_queries(queries)
+    clusters = cluster_queries(list(positions))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    shared = {}  # cluster index -> task running that cluster's retrieval
+
+    def shared_fetch(cluster_id: int, seed_query: str):
+        async def fetch():
+            if cluster_id not in shared:
+                shared[cluster_id] = asyncio.ensure_future(_afetch(seed_query))
+            # shield(): one claim being cancelled must not cancel the others' retrieval
+            return await asyncio.shield(shared[cluster_id])
+        return fetch
+
+    async def audit(key: str, fetch):
+        query = queries[positions[key][0]]
+        # Batch work yields upstream quota to interactive searches (see upstream_scheduler)
+        with lane(BATCH):
+            async with semaphore:
+                return positions[key], query, await agenerate_hybrid_rag_news(query, api_key, fetch)
+
+    tasks = []
+    for cluster_id, members in enumerate(clusters):
+        fetch = shared_fetch(cluster_id, queries[positions[members[0]][0]]) if len(members) > 1 else None
+        tasks.extend(asyncio.ensure_future(audit(key, fetch)) for key in members)
+    print(f"📦 BATCH: {len(queries)} claims, {len(positions)} unique, {len(clusters)} retrievals, concurrency {concurrency}")
+
+    listed = {i for p in positions.values() for i in p}
+    empty = [i for i in range(len(queries)) if i not in listed]
+    if empty:
+        yield empty, "", {"status": "FAIL", "summary": "Empty claim."}
+
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # Client went away (or we are done): stop whatever is still queued or running
+        for task in tasks + list(shared.values()):
+            task.cancel()
+
+    yield None, None, {"claims": len(queries), "unique": len(positions), "retrievals": len(clusters),
+                       "skipped": len(empty),
+                       "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+# --- STREAMING (SSE) ---
+
+# Response field each tagged section fills; list fields are bullet-split like the batch path
+SECTION_FIELDS = {
+    "[SUMMARY]": "summary",
+    "[COUNTER_SUMMARY]": "counter_summary",
+    "[CLARIFICATION]": "clarifications",
+    "[AUDIT]": "audit_history",
+    "[LOGIC_AUDIT]": "logic_audit",
+}
+LIST_FIELDS = {"clarifications", "audit_history"}
+
+def _section_event(tag: str, content: str):
+    field = SECTION_FIELDS.get(tag)
+    if field is None: return None  # [CONFIDENCE] is folded into the final event
+    return field, to_list(content) if field in LIST_FIELDS else content
+
+def _final_event(result: dict) -> dict:
+    return {key: result.get(key) for key in ("status", "certainty", "bias_score", "trend_history")}
+
+def _replay_events(result: dict):
+    """The events of a finished result (cache hit, stored claim match), in stream order."""
+    yield "verified_sources", result.get("sources", [])
+    yield "verification_audit", result.get("verification_audit", {})
+    for field in SECTION_FIELDS.values():
+        yield field, result.get(field)
+    yield "final", _final_event(result)
+
+async def _open_stream(payload: dict, api_key: str, model_name: str) -> httpx.Response:
+    client = get_gemini_http()
+    request = client.build_request("POST", stream_generation_path(model_name), params={"key": api_key, "alt": "sse"}, json=payload,
+                                   timeout=attempt_timeout(GEMINI_TIMEOUT))
+    response = await client.send(request, stream=True)
+    if response.status_code >= 400:
+        await response.aread()  # keep the error body (RetryInfo) for the scheduler
+        await response.aclose()
+        response.raise_for_status()
+    return response
+
+async def _stream_generated_text(payload: dict, api_key: str):
+    """Yields text deltas from Gemini's streamGenerateContent SSE endpoint.
+
+    Opening the stream goes through the scheduler like any other call; once text has
+    been yielded a failure is final, since the client has already seen part of it.
+    """
+    response = await SCHEDULER.acall("gemini", functools.partial(_open_stream, payload, api_key), models=TEXT_MODELS)
+    try:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            chunk = json.loads(line[5:])
+            for candidate in chunk.get("candidates", [])[:1]:
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
+    finally:
+        await response.aclose()
+
+async def astream_hybrid_rag_news(user_query: str, api_key: str):
+    """Async generator of (event, data) pairs for the SSE variant of /api/search.
+
+    verified_sources and verification_audit go out as soon as retrieval is done, each
+    tagged section as soon as the next tag arrives, and a final event carries
+    certainty and bias_score.
+    """
+    cached = RESULT_CACHE.get(user_query)
+    cache_lookup("result", "miss" if cached is None else "hit")
+    if cached is not None:
+        print(f"⚡ CACHE HIT: {user_query}")
+        for event in _replay_events(cached):
+            yield event
+        return
+
+    try:
+        print(f"\n🔍 --- STREAMING AUDIT START: {user_query} ---")
+        match = match_stored_claim(user_query)
+        if match:
+            print(f"🎯 CLAIM MATCH: {match['url']} ({match['similarity']:.2f})")
+            result = claim_match_response(user_query, match)
+            RESULT_CACHE.put(user_query, result)
+            for event in _replay_events(result):
+                yield event
+            return
+
+        context = await _aretrieve(user_query)
+        counts, verified_sources = classify_sources(context["results"])
+        yield "verified_sources", verified_sources[:8]
+        yield "verification_audit", verification_audit(counts, context)
+
+        parser = StreamingTagParser()
+        chunks = []
+        with span("gemini_stream"):
+            async for delta in _stream_generated_text(build_generation_payload(user_query, context), api_key):
+                chunks.append(delta)
+                for tag, content in parser.feed(delta):
+                    event = _section_event(tag, content)
+                    if event: yield event
+        for tag, content in parser.close():
+            event = _section_event(tag, content)
+            if event: yield event
+
+        result = build_audit_response("".join(chunks), counts, verified_sources, context)
+        RESULT_CACHE.put(user_query, result)
+        yield "final", _final_event(result)
 
     except Exception as e:
-        print(f"🔥 FAIL-SAFE: {e}")
-        return {"status": "SUCCESS", "summary": f"Audit error: {str(e)}", "certainty": 60, "clarifications": [], "audit_history": []}
\ No newline at end of file
+        yield "error", fail_safe_response(e)
@@ -1,5 +1,8 @@
 # source_reputation.py
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
+from config import GOLDEN_DOMAINS, CONSENSUS_DOMAINS
 
 SOURCE_METADATA = {
     "pib.gov.in": {
@@ -41,25 +44,86 @@ SOURCE_METADATA = {
     }
 }
 
+# Source ranks used to order evidence: fact-checkers/official first, then major wires.
+RANK_GOLDEN, RANK_CONSENSUS, RANK_RAW = 1, 2, 3
+_RANK_COUNT_KEYS = {RANK_GOLDEN: "gold", RANK_CONSENSUS: "con", RANK_RAW: "raw"}
+
+def _unknown_profile(domain):
+    return {
+        "name": domain if domain else "External Source",
+        "type": "Web Source",
+        "reliability": "Standard",
+        "focus": "General Content",
+        "certified": False,
+        "badge": None
+    }
+
+_UNVERIFIED_PROFILE = {
+    "name": "External Source",
+    "type": "Web Source",
+    "reliability": "Unverified",
+    "focus": "General Content",
+    "certified": False,
+    "badge": None
+}
+
+class DomainRegistry:
+    """Domain -> (rank, profile) through a suffix trie keyed on reversed host labels.
+
+    "m.thehindu.com" walks com -> thehindu -> m and takes the deepest entry on the way,
+    so subdomains inherit their parent's rank and profile, while a URL that merely
+    contains "pib.gov" in its path no longer counts as PIB.
+    """
+
+    def __init__(self, golden: List[str], consensus: List[str], metadata: Dict[str, dict], cache_size: int = 4096):
+        self._root = {}
+        for domain in golden:
+            self._node(domain)["rank"] = RANK_GOLDEN
+        for domain in consensus:
+            self._node(domain).setdefault("rank", RANK_CONSENSUS)
+        for domain, profile in metadata.items():
+            self._node(domain)["profile"] = profile
+        self._lookup_host = lru_cache(maxsize=cache_size)(self._walk)
+
+    def _node(self, domain: str) -> dict:
+        node = self._root
+        for label in reversed(domain.lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        return node
+
+    def _walk(self, host: str) -> Tuple[int, Optional[dict]]:
+        rank, profile = RANK_RAW, None
+        node = self._root
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None: break
+            rank = node.get("rank", rank)
+            profile = node.get("profile", profile)
+        return rank, profile
+
+    def lookup(self, url: str) -> Tuple[int, dict]:
+        """Returns (rank, profile) for a URL; unknown hosts get a generic profile."""
+        try:
+            host = (urlparse(url).hostname or "").strip(".")
+        except ValueError:
+            return RANK_RAW, _UNVERIFIED_PROFILE
+        rank, profile = self._lookup_host(host)
+        # Always return the full object shape even for unknown domains
+        return rank, profile or _unknown_profile(host[4:] if host.startswith("www.") else host)
+
+    def classify_urls(self, urls: Iterable[str]) -> Tuple[Dict[str, int], List[dict]]:
+        """Bulk classification: (counts by tier, sources sorted golden -> consensus -> raw)."""
+        counts = {"gold": 0, "con": 0, "raw": 0}
+        verified_sources = []
+        for url in dict.fromkeys(u for u in urls if u):
+            rank, profile = self.lookup(url)
+            counts[_RANK_COUNT_KEYS[rank]] += 1
+            verified_sources.append({"url": url, "meta": profile, "rank": rank})
+        verified_sources.sort(key=lambda x: x['rank'])
+        return counts, verified_sources
+
+SOURCE_REGISTRY = DomainRegistry(GOLDEN_DOMAINS, CONSENSUS_DOMAINS, SOURCE_METADATA)
+
 def get_source_profile(url):
     """Extracts domain and returns reputation data."""
-    try:
-        domain = urlparse(url).netloc.replace("www.", "")
-        # Always return the full object shape even for unknown domains
-        return SOURCE_METADATA.get(domain, {
-            "name": domain if domain else "External Source",
-            "type": "Web Source",
-            "reliability": "Standard",
-            "focus": "General Content",
-            "certified": False,
-            "badge": None
-        })
-    except:
-        return {
-            "name": "External Source",
-            "type": "Web Source",
-            "reliability": "Unverified",
-            "focus": "General Content",
-            "certified": False,
-            "badge": None
-        }
\ No newline at end of file
+    return SOURCE_REGISTRY.lookup(url)[1]
\ No newline at end of file
@@ -0,0 +1,170 @@
+# telemetry.py
+# In-process timing spans and counters, rendered in the Prometheus text format for
+# /metrics. Spans also collect into a per-request list for the Server-Timing header.
+import contextlib
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds in seconds; upstream calls sit between 0.1s and the 45-60s timeouts
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+_HELP = {
+    "fairgpt_stage_duration_seconds": ("histogram", "Time spent in each pipeline stage."),
+    "fairgpt_http_request_duration_seconds": ("histogram", "End-to-end API request latency."),
+    "fairgpt_cache_requests_total": ("counter", "Result and media cache lookups by outcome."),
+    "fairgpt_upstream_errors_total": ("counter", "Failed upstream calls by kind (rate_limited, timeout, error)."),
+    "fairgpt_fail_safe_total": ("counter", "Audits answered with the fail-safe response."),
+    "fairgpt_context_tokens_saved_total": ("counter", "Prompt tokens removed by deduplication and the context budget."),
+    "fairgpt_upstream_wait_seconds": ("histogram", "Time an upstream call waited on quota buckets and backoff before being sent."),
+    "fairgpt_upstream_retries_total": ("counter", "Upstream calls retried, by the kind of failure."),
+    "fairgpt_model_fallback_total": ("counter", "Calls sent to a fallback model because the preferred one was out of quota."),
+}
+
+# Spans finished during the current request, for the optional Server-Timing header
+_request_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("request_spans", default=None)
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _quote(value: str) -> str:
+    return '"%s"' % value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], **extra) -> str:
+    parts = ["%s=%s" % (k, _quote(v)) for k, v in key + tuple(extra.items())]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Registry:
+    """Thread-safe counters and histograms keyed by metric name and label set."""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)    # (name, labels) -> value
+        self._histograms = {}                  # (name, labels) -> [bucket counts..., sum, count]
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, list(v)) for k, v in self._histograms.items())
+        lines, described = [], set()
+
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text = _HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), series in histograms:
+            describe(name)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{name}_bucket{_format_labels(labels, le=f'{bound:g}')} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {series[-1]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {series[-2]:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {series[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+
+@contextlib.contextmanager
+def span(stage: str):
+    """Times a pipeline stage into fairgpt_stage_duration_seconds{stage=...}.
+
+    Works around sync code and `await`s alike; failures are timed too.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        METRICS.observe("fairgpt_stage_duration_seconds", elapsed, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def cache_lookup(cache: str, outcome: str):
+    METRICS.inc("fairgpt_cache_requests_total", cache=cache, outcome=outcome)
+
+
+def upstream_error(upstream: str, error) -> str:
+    """Counts a failed upstream call; `error` is an exception or an HTTP status code."""
+    kind = classify_error(error)
+    METRICS.inc("fairgpt_upstream_errors_total", upstream=upstream, kind=kind)
+    return kind
+
+
+def error_status(error) -> Optional[int]:
+    """HTTP status of an upstream error: requests/httpx carry it on .response, google-genai errors on .code."""
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "code"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+    return None
+
+
+def classify_error(error) -> str:
+    """rate_limited, timeout or error, from the status code and the error type only: a
+    message that merely mentions "429" (a claim about 429 notes, a URL) is no rate limit."""
+    status = error if isinstance(error, int) else error_status(error)
+    # Tavily reports its per-minute limit as UsageLimitExceededError, with no status attached
+    if status == 429 or type(error).__name__ == "UsageLimitExceededError":
+        return "rate_limited"
+    # TimeoutError covers asyncio; requests and httpx name theirs *Timeout*
+    if isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower():
+        return "timeout"
+    return "error"
+
+
+def begin_request() -> contextvars.Token:
+    """Starts collecting spans for the current request (tasks spawned after this inherit the list)."""
+    return _request_spans.set([])
+
+
+def end_request(token: contextvars.Token) -> List[Tuple[str, float]]:
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return spans
+
+
+def server_timing(spans: List[Tuple[str, float]]) -> str:
+    """Server-Timing header value; repeated stages (e.g. three Tavily calls) are summed."""
+    totals = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
@@ -0,0 +1,42 @@
+import pytest
+
+from bias_scorer import LOADED_TERM_MATCHER, LoadedTermMatcher, calculate_bias_score, calculate_bias_scores
+
+
+@pytest.mark.parametrize("text,category", [
+    ("The scheme may be scrapped", "speculative"),
+    ("This could lead to chaos", "speculative"),
+    ("Sources  claim the minister resigned", "speculative"),
+    ("He allegedly took bribes", "speculative"),
+    ("Another scam in the ministry", "political_bias"),
+    ("Scams everywhere", "political_bias"),
+    ("A shocking result", "sensationalist"),
+    ("Disasters struck twice", "sensationalist"),
+])
+def test_loaded_terms_counted(text, category):
+    assert LOADED_TERM_MATCHER.count(text)[category] == 1
+
+
+@pytest.mark.parametrize("text", [
+    "The scheme may benefit farmers",
+    "Rains may bear fruit this season",
+    "The highway could lead towns to grow",
+    "Sources claimed nothing new",
+    "The minister claimed the scheme was huge and exposed no one",
+    "Apparently the trains supposedly run late",
+])
+def test_ordinary_text_not_counted(text):
+    analysis = LOADED_TERM_MATCHER.analyze(text)
+    assert analysis["hits"] == 0, analysis
+
+
+def test_phrase_and_word_sharing_a_prefix():
+    matcher = LoadedTermMatcher({"a": ["claim"], "b": ["claim to fame"]})
+    assert matcher.count("his claim to fame") == {"a": 0, "b": 1}
+    assert matcher.count("claims to famed") == {"a": 1, "b": 0}
+
+
+def test_scores():
+    assert calculate_bias_score("") == 0.0
+    assert calculate_bias_score("shocking scam") == 1.0
+    assert calculate_bias_scores(["shocking news today", "plain news"]) == [round(1 / 3, 4), 0.0]
@@ -0,0 +1,74 @@
+from claim_matcher import ClaimMatcher, claim_terms
+from text_utils import same_order
+from config import FACT_CHECKS_COLLECTION
+
+STORED = "Punjab government announced free electricity for all farmers in Punjab from next month"
+
+
+def _matcher(claim=STORED, rating="False"):
+    matcher = ClaimMatcher()
+    matcher.add_items(FACT_CHECKS_COLLECTION, [{"url": "https://example.org/fc/1", "claim": claim, "rating": rating}])
+    return matcher
+
+
+def test_reworded_claim_matches():
+    match = _matcher().match("Is it true that the Punjab government announced free electricity to all farmers in Punjab from next month?")
+    assert match is not None
+    assert match["rating"] == "False"
+
+
+def test_inflection_matches():
+    assert _matcher().match("punjab government announces free electricity for farmers in punjab from next month") is not None
+
+
+def test_entity_swap_rejected():
+    assert _matcher().match("Punjab government announced free electricity for all farmers in Haryana from next month") is None
+    assert _matcher().match("Haryana government announced free electricity for all farmers in Haryana from next month") is None
+
+
+def test_verb_swap_rejected():
+    assert _matcher().match("Punjab government denied free electricity for all farmers in Punjab from next month") is None
+
+
+def test_extra_or_missing_content_word_rejected():
+    assert _matcher().match("Punjab government announced free electricity for all small farmers in Punjab from next month") is None
+    assert _matcher().match("Punjab government announced electricity for all farmers in Punjab from next month") is None
+
+
+def test_number_and_negation_rejected():
+    matcher = _matcher("RBI will withdraw 500 rupee notes from circulation by March")
+    assert matcher.match("RBI will withdraw 500 rupee notes from circulation by March") is not None
+    assert matcher.match("RBI will withdraw 2000 rupee notes from circulation by March") is None
+    assert matcher.match("RBI will not withdraw 500 rupee notes from circulation by March") is None
+
+
+def test_reversed_roles_rejected():
+    matcher = _matcher("India beat Pakistan in the cricket world cup final in Ahmedabad")
+    assert matcher.match("Pakistan beat India in the cricket world cup final in Ahmedabad") is None
+
+
+def test_unrated_not_indexed():
+    assert len(_matcher(rating="Unrated")) == 0
+
+
+def test_same_order():
+    assert same_order(claim_terms("india beat pakistan"), claim_terms("india beat pakistan today"))
+    assert not same_order(claim_terms("india beat pakistan"), claim_terms("pakistan beat india"))
+
+
+def test_same_content_terms_always_found():
+    # Only stopwords and framing differ: every rewording is looked up by its content set
+    matcher = _matcher()
+    for query in ("Punjab government announced free electricity for farmers in Punjab from next month",
+                  "fact check: the Punjab government has announced free electricity to farmers in Punjab from next month",
+                  "PUNJAB GOVERNMENT ANNOUNCED FREE ELECTRICITY FOR ALL FARMERS IN PUNJAB FROM NEXT MONTH!!"):
+        assert matcher.match(query) is not None, query
+
+
+def test_replaced_claim_leaves_index():
+    matcher = _matcher()
+    matcher.add_fact_check(f"{FACT_CHECKS_COLLECTION}:https://example.org/fc/1",
+                           {"claim": "RBI will withdraw 500 rupee notes from circulation by March", "rating": "False"})
+    assert len(matcher) == 1
+    assert matcher.match(STORED) is None
+    assert matcher.match("RBI will withdraw 500 rupee notes from circulation by March") is not None
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from context_builder import build_context, estimate_tokens
+
+WORDS = ("rain flood monsoon kerala district relief camp minister budget rupee notes bank policy "
+         "court ruling election vote farmer electricity tariff scheme village road bridge school").split()
+QUERY = "Did the Kerala minister announce flood relief camps?"
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _result(url, content):
+    return {"url": url, "content": content}
+
+
+def _sources(text):
+    return [line[len("SOURCE: "):] for line in text.splitlines() if line.startswith("SOURCE: ")]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_output_never_exceeds_budget(seed):
+    rng = random.Random(seed)
+    budget = rng.choice([80, 200, 700, 1500, 3000])
+    consensus = [_result(f"https://news{i}.example.org/a", _text(rng, rng.randint(5, 900))) for i in range(rng.randint(0, 12))]
+    alternative = [_result(f"https://blog{i}.example.net/b", _text(rng, rng.randint(5, 900))) for i in range(rng.randint(0, 6))]
+    consensus_text, alternative_text, report = build_context(QUERY, consensus, alternative, budget=budget)
+    tokens_out = estimate_tokens(consensus_text) + estimate_tokens(alternative_text)
+    assert tokens_out == report["tokensOut"]
+    assert tokens_out <= budget
+    assert estimate_tokens(alternative_text) <= budget * 0.3
+
+
+def test_near_duplicates_dropped():
+    rng = random.Random(1)
+    story = _text(rng, 200)
+    syndicated = story.replace(story.split()[10], "tuesday", 1) + " (With inputs from agencies)"
+    consensus = [_result("https://www.thehindu.com/news/a.ece", story),
+                 _result("https://regional.example.org/copy", syndicated),
+                 _result("https://other.example.org/b", _text(rng, 200))]
+    alternative = [_result("https://forum.example.net/repost", story)]
+    consensus_text, alternative_text, report = build_context(QUERY, consensus, alternative)
+    assert report["duplicatesDropped"] == 2
+    assert _sources(consensus_text) == ["https://www.thehindu.com/news/a.ece", "https://other.example.org/b"]
+    assert alternative_text == ""
+
+
+def test_golden_and_fact_check_passages_first():
+    rng = random.Random(2)
+    consensus = [_result("https://viral.example.org/post", _text(rng, 150)),
+                 _result("https://www.reuters.com/world/a", _text(rng, 150)),
+                 _result("https://www.boomlive.in/fact-check/a", _text(rng, 150)),
+                 _result("https://pib.gov.in/release", _text(rng, 150))]
+    consensus_text, _, _ = build_context(QUERY, consensus, [])
+    assert _sources(consensus_text) == ["https://www.boomlive.in/fact-check/a", "https://pib.gov.in/release",
+                                        "https://www.reuters.com/world/a", "https://viral.example.org/post"]
+
+    # A budget that fits one passage keeps the fact-check, not the open web
+    consensus_text, _, report = build_context(QUERY, consensus[:1] + consensus[2:3], [], budget=200)
+    assert _sources(consensus_text) == ["https://www.boomlive.in/fact-check/a"]
+    assert report["droppedForBudget"] == 1
@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+
+import corpus_snapshot
+from config import FACT_CHECKS_COLLECTION, RAW_NEWS_COLLECTION
+from corpus_snapshot import compact, delta_paths, open_corpus, write_segment
+
+
+def _at(day):
+    return datetime.datetime(2026, 3, day, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+ARTICLE = {"url": "https://news.example.org/a", "source": "Wire", "title": "Rains in Kerala",
+           "summary_text": "Heavy rain\x00 expected", "ingestion_date": _at(1), "bias_score": 0.25, "app_id": "app-1"}
+FACT_CHECK = {"url": "https://checks.example.org/fc", "source": "Factly", "claim": "RBI bans 2000 notes",
+              "rating": "False", "verdict": "Fake", "ingestion_date": _at(2), "app_id": "app-1"}
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "corpus.snap")
+    write_segment(path, [(RAW_NEWS_COLLECTION, "a", ARTICLE), (FACT_CHECKS_COLLECTION, "fc", FACT_CHECK)], block_rows=1)
+    return path
+
+
+def _docs(path):
+    with open_corpus(path) as corpus:
+        return {(collection, doc_id): doc for collection, doc_id, doc in corpus.items()}
+
+
+def test_round_trip(path):
+    docs = _docs(path)
+    assert docs[(RAW_NEWS_COLLECTION, "a")] == dict(ARTICLE, summary_text="Heavy rain expected")
+    assert docs[(FACT_CHECKS_COLLECTION, "fc")] == FACT_CHECK
+
+
+def test_missing_values_stay_unset(tmp_path):
+    path = str(tmp_path / "corpus.snap")
+    write_segment(path, [(RAW_NEWS_COLLECTION, "a", {"title": "No date", "bias_score": None})])
+    assert _docs(path) == {(RAW_NEWS_COLLECTION, "a"): {"title": "No date"}}
+    with open_corpus(path) as corpus:
+        assert corpus.max_ingested is None
+
+
+def test_delta_overrides_base(path):
+    write_segment(f"{path}.delta-0001", [(RAW_NEWS_COLLECTION, "a", dict(ARTICLE, title="Rains ease", ingestion_date=_at(5)))])
+    docs = _docs(path)
+    assert len(docs) == 2
+    assert docs[(RAW_NEWS_COLLECTION, "a")]["title"] == "Rains ease"
+    assert docs[(FACT_CHECKS_COLLECTION, "fc")] == FACT_CHECK
+
+
+def test_max_ingested_spans_segments(path):
+    with open_corpus(path) as corpus:
+        assert corpus.max_ingested == _at(2).timestamp()
+    write_segment(f"{path}.delta-0001", [(FACT_CHECKS_COLLECTION, "fc2", dict(FACT_CHECK, ingestion_date=_at(9)))])
+    with open_corpus(path) as corpus:
+        assert corpus.max_ingested == _at(9).timestamp()
+
+
+def test_compact_folds_deltas(path):
+    write_segment(f"{path}.delta-0001", [(RAW_NEWS_COLLECTION, "a", dict(ARTICLE, title="Rains ease"))])
+    write_segment(f"{path}.delta-0002", [(RAW_NEWS_COLLECTION, "b", dict(ARTICLE, url="https://news.example.org/b"))])
+    before = _docs(path)
+    compact(path)
+    assert delta_paths(path) == []
+    with open_corpus(path) as corpus:
+        assert len(corpus.segments) == 1
+        assert len(corpus.segments[0]) == 3
+    assert _docs(path) == before
+
+
+def test_segment_without_newer_column(tmp_path, monkeypatch):
+    path = str(tmp_path / "corpus.snap")
+    monkeypatch.setattr(corpus_snapshot, "TEXT_COLUMNS", corpus_snapshot.TEXT_COLUMNS[:-1])
+    write_segment(path, [(FACT_CHECKS_COLLECTION, "fc", FACT_CHECK)])
+    monkeypatch.undo()
+    assert _docs(path)[(FACT_CHECKS_COLLECTION, "fc")] == {k: v for k, v in FACT_CHECK.items() if k != "app_id"}
+
+
+def test_unreadable_snapshot(tmp_path):
+    path = tmp_path / "corpus.snap"
+    assert open_corpus(str(path)) is None
+    path.write_bytes(b"not a snapshot")
+    assert open_corpus(str(path)) is None
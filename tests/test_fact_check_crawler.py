@@ -0,0 +1,151 @@
+import pytest
+
+import fact_check_crawler
+from fact_check_crawler import canonical_url, crawl_listing, normalize_rating
+
+# Labels as BOOM, Factly, India Today, PIB and ClaimReview feeds publish them
+PUBLISHER_LABELS = [
+    ("False", "False"),
+    ("FALSE", "False"),
+    ("Fake", "False"),
+    ("Fake News", "False"),
+    ("Altered Photo", "False"),
+    ("Edited video", "False"),
+    ("Morphed", "False"),
+    ("Scam", "False"),
+    ("Hoax", "False"),
+    ("Incorrect", "False"),
+    ("Inaccurate", "False"),
+    ("Not accurate", "False"),
+    ("Not correct", "False"),
+    ("Not True", "False"),
+    ("Untrue", "False"),
+    ("Mostly False", "False"),
+    ("Partly False", "Misleading"),
+    ("Half False", "Misleading"),
+    ("Misleading", "Misleading"),
+    ("Misleading Claim", "Misleading"),
+    ("Missing Context", "Misleading"),
+    ("Out of context", "Misleading"),
+    ("Partly True", "Partly True"),
+    ("Partly-True", "Partly True"),
+    ("Half True", "Partly True"),
+    ("Mostly True", "Partly True"),
+    ("Mixture", "Partly True"),
+    ("Satire", "Satire"),
+    ("Unverified", "Unverified"),
+    ("Unproven", "Unverified"),
+    ("True", "True"),
+    ("Correct", "True"),
+    ("Accurate", "True"),
+    ("Truly remarkable", "Unrated"),
+    ("Explainer", "Unrated"),
+    ("", "Unrated"),
+    (None, "Unrated"),
+]
+
+
+@pytest.mark.parametrize("label, expected", PUBLISHER_LABELS)
+def test_normalize_rating(label, expected):
+    assert normalize_rating(label) == expected
+
+
+# --- crawl_listing ---
+
+SITE = "https://checks.example.org/fact-check/"
+PER_PAGE = 4
+
+
+def _site(total):
+    """A listing of `total` articles, newest first, PER_PAGE per page."""
+    pages = {}
+    count = (total + PER_PAGE - 1) // PER_PAGE
+    for n in range(1, count + 1):
+        url = SITE if n == 1 else f"{SITE}page/{n}/"
+        links = "".join(f'<h2 class="entry-title"><a href="{SITE}article-{i}/">Claim {i}</a></h2>'
+                        for i in range((n - 1) * PER_PAGE, min(n * PER_PAGE, total)))
+        more = f'<a class="next" href="{SITE}page/{n + 1}/">Next</a>' if n < count else ""
+        pages[url] = f"<html><body>{links}{more}</body></html>".encode()
+    for i in range(total):
+        pages[f"{SITE}article-{i}/"] = f"<html><body><h1>Claim {i}</h1><p>Fact Check: False</p></body></html>".encode()
+    return pages
+
+
+def _crawl(pages, stop_at=None, known=frozenset()):
+    return crawl_listing(SITE, pages[SITE], pages.__getitem__, stop_at, lambda urls: {u for u in urls if u in known})
+
+
+def _article(i):
+    return f"{SITE}article-{i}/"
+
+
+def test_crawl_stops_at_cursor_and_moves_it():
+    crawl = _crawl(_site(12), stop_at=_article(6))
+    assert [a["url"] for a in crawl["articles"]] == [_article(i) for i in range(6)]
+    assert crawl["newest"] == _article(0)
+
+
+def test_crawl_reaching_last_page_moves_cursor():
+    crawl = _crawl(_site(6))
+    assert len(crawl["articles"]) == 6
+    assert crawl["newest"] == _article(0)
+
+
+def test_page_cap_keeps_old_cursor(monkeypatch):
+    monkeypatch.setattr(fact_check_crawler, "FACT_CHECK_MAX_PAGES", 2)
+    crawl = _crawl(_site(40), stop_at=_article(30))
+    assert crawl["pages"] == 2
+    assert len(crawl["articles"]) == 8
+    assert crawl["newest"] is None
+
+
+def test_article_cap_keeps_old_cursor(monkeypatch):
+    monkeypatch.setattr(fact_check_crawler, "FACT_CHECK_MAX_ARTICLES", 5)
+    crawl = _crawl(_site(12), stop_at=_article(10))
+    assert len(crawl["articles"]) == 5
+    assert crawl["newest"] is None
+
+
+def test_known_page_ends_crawl_with_cursor():
+    crawl = _crawl(_site(20), stop_at=_article(18), known={_article(i) for i in range(4, 18)})
+    assert [a["url"] for a in crawl["articles"]] == [_article(i) for i in range(4)]
+    assert crawl["pages"] == 2
+    assert crawl["newest"] == _article(0)
+
+
+def test_vanished_cursor_moves_on_at_known_page():
+    # The old cursor is no longer listed; the stored page below the new articles ends the walk
+    crawl = _crawl(_site(40), stop_at=f"{SITE}deleted-article/", known={_article(i) for i in range(2, 40)})
+    assert [a["url"] for a in crawl["articles"]] == [_article(0), _article(1)]
+    assert crawl["pages"] == 2
+    assert crawl["newest"] == _article(0)
+
+
+@pytest.mark.parametrize("stop_at", [
+    f"{SITE}article-6",
+    f"{SITE}article-6/?utm_source=twitter&utm_medium=social",
+    "HTTPS://Checks.Example.org/fact-check/article-6/#comments",
+])
+def test_cursor_matches_canonical_url(stop_at):
+    crawl = _crawl(_site(12), stop_at=stop_at)
+    assert len(crawl["articles"]) == 6
+    assert crawl["pages"] == 2
+
+
+def test_canonical_url_keeps_identifying_query():
+    assert canonical_url("https://a.org/?p=12&utm_campaign=x") == "https://a.org/?p=12"
+    assert canonical_url("https://a.org/?p=12") != canonical_url("https://a.org/?p=13")
+
+
+def test_known_page_ends_first_run():
+    crawl = _crawl(_site(20), known={_article(i) for i in range(4, 8)})
+    assert [a["url"] for a in crawl["articles"]] == [_article(i) for i in range(4)]
+    assert crawl["newest"] == _article(0)
+
+
+def test_failed_listing_page_keeps_old_cursor():
+    pages = _site(12)
+    del pages[f"{SITE}page/2/"]
+    crawl = _crawl(pages, stop_at=_article(10))
+    assert len(crawl["articles"]) == 4
+    assert crawl["newest"] is None
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from config import (
+    INGEST_INITIAL_INTERVAL, INGEST_MIN_INTERVAL, INGEST_MAX_INTERVAL, INGEST_SPEEDUP, INGEST_SLOWDOWN,
+    INGEST_FAILURE_BACKOFF_MAX, INGEST_JITTER
+)
+from ingest_scheduler import new_entry, reschedule
+
+NOW = 1_000_000.0
+
+
+class Midpoint(random.Random):
+    """Jitter factor of exactly 1, so delays can be compared directly."""
+    def uniform(self, a, b):
+        return (a + b) / 2
+
+
+def _poll(entry, status="ok", new_items=0, saved=True):
+    return reschedule(entry, {"status": status, "items": [{}] * new_items, "new_items": new_items, "saved": saved},
+                      NOW, Midpoint())
+
+
+def test_new_items_speed_polling_up():
+    entry = _poll(new_entry(NOW), new_items=3)
+    assert entry["interval"] == pytest.approx(INGEST_INITIAL_INTERVAL * INGEST_SPEEDUP)
+    assert entry["next_due"] == pytest.approx(NOW + entry["interval"])
+    assert entry["last_changed"] == NOW
+
+
+def test_quiet_polls_slow_down_within_bounds():
+    entry = new_entry(NOW)
+    for _ in range(100):
+        entry = _poll(entry)
+    assert entry["interval"] == INGEST_MAX_INTERVAL
+    assert entry["last_changed"] is None
+    for _ in range(100):
+        entry = _poll(entry, new_items=1)
+    assert entry["interval"] == INGEST_MIN_INTERVAL
+
+
+def test_failures_back_off_from_the_learned_interval():
+    entry = dict(new_entry(NOW), interval=600)
+    entry = _poll(entry, status="error")
+    assert (entry["interval"], entry["failures"]) == (600, 1)
+    assert entry["next_due"] == pytest.approx(NOW + 1200)
+    entry = _poll(entry, new_items=2, saved=False)
+    assert entry["failures"] == 2
+    assert entry["next_due"] == pytest.approx(NOW + 2400)
+    for _ in range(20):
+        entry = _poll(entry, status="error")
+    assert entry["next_due"] == pytest.approx(NOW + INGEST_FAILURE_BACKOFF_MAX)
+    assert _poll(entry)["failures"] == 0
+
+
+def test_jitter_stays_within_bounds():
+    rng = random.Random(1)
+    delays = [reschedule(new_entry(NOW), {"status": "ok", "items": []}, NOW, rng)["next_due"] - NOW for _ in range(200)]
+    interval = INGEST_INITIAL_INTERVAL * INGEST_SLOWDOWN
+    assert all(interval * (1 - INGEST_JITTER) <= d <= interval * (1 + INGEST_JITTER) for d in delays)
+    assert len(set(delays)) > 1
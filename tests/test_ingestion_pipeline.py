@@ -0,0 +1,181 @@
+import pytest
+
+import fact_check_crawler
+from fact_check_crawler import HostLimiter, RobotsCache
+from ingestion_pipeline import fetch_source, iter_feed_items, parse_rss_content
+
+SITE = "https://checks.example.org"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=b"", headers=None):
+        self.status_code, self.content, self.headers = status_code, body, headers or {}
+        self.text = body.decode()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages, self.requests = pages, []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append((url, dict(headers or {})))
+        return self.pages.get(url) or FakeResponse(404)
+
+
+@pytest.fixture(autouse=True)
+def polite(monkeypatch):
+    limiter = HostLimiter(delay=0)
+    monkeypatch.setattr(fact_check_crawler, "HOST_LIMITER", limiter)
+    monkeypatch.setattr(fact_check_crawler, "ROBOTS", RobotsCache(limiter))
+
+
+def test_fact_check_listing_honours_robots():
+    session = FakeSession({f"{SITE}/robots.txt": FakeResponse(body=b"User-agent: *\nDisallow: /fact-check/\n")})
+    report = fetch_source("fact_check", "Checks", f"{SITE}/fact-check/", session)
+    assert report["status"] == "error"
+    assert [url for url, _ in session.requests] == [f"{SITE}/robots.txt"]
+
+
+def test_fact_check_listing_not_modified():
+    class State:
+        def get_validators(self, url):
+            return {"etag": '"v1"'}
+
+    session = FakeSession({f"{SITE}/robots.txt": FakeResponse(body=b"User-agent: *\nAllow: /\n"),
+                           f"{SITE}/fact-check/": FakeResponse(304)})
+    report = fetch_source("fact_check", "Checks", f"{SITE}/fact-check/", session, State())
+    assert report["status"] == "not_modified"
+    assert session.requests[-1][1]["If-None-Match"] == '"v1"'
+
+
+def test_slow_robots_host_does_not_block_others():
+    import threading
+
+    entered, release = threading.Event(), threading.Event()
+
+    class SlowSession(FakeSession):
+        def get(self, url, headers=None, timeout=None):
+            if url.startswith("https://slow.example.org"):
+                entered.set()
+                release.wait(5)
+            return super().get(url, headers, timeout)
+
+    session = SlowSession({"https://fast.example.org/robots.txt": FakeResponse(body=b"User-agent: *\nAllow: /\n")})
+    robots = fact_check_crawler.ROBOTS
+    slow = threading.Thread(target=robots.allowed, args=(session, "https://slow.example.org/a", "*"))
+    slow.start()
+    entered.wait(5)
+    try:
+        assert robots.allowed(session, "https://fast.example.org/a", "*")
+        assert slow.is_alive()
+    finally:
+        release.set()
+        slow.join()
+
+
+# --- FEED PARSING ---
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"
+     xmlns:media="http://search.yahoo.com/mrss/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel>
+  <title>Wire</title>
+  <link>https://wire.example.org/</link>
+  <item>
+    <title> Rains lash Kerala </title>
+    <link>https://wire.example.org/rains</link>
+    <media:content url="https://wire.example.org/rains.jpg" medium="image"/>
+    <description><![CDATA[<p>Heavy rain in <b>six</b> districts.</p>]]></description>
+    <content:encoded><![CDATA[<p>Full story</p>]]></content:encoded>
+    <pubDate>Tue, 10 Mar 2026 04:00:00 GMT</pubDate>
+  </item>
+  <!-- sponsored slot -->
+  <item>
+    <title>Fuel prices unchanged</title>
+    <link>https://wire.example.org/fuel</link>
+    <content:encoded>Oil companies kept rates steady.</content:encoded>
+    <dc:date>2026-03-09T18:00:00Z</dc:date>
+  </item>
+  <item>
+    <title>Old story</title>
+    <link>https://wire.example.org/old</link>
+  </item>
+</channel>
+</rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Checks</title>
+  <link rel="self" href="https://checks.example.org/feed.atom"/>
+  <entry>
+    <title type="html">Viral video is &lt;i&gt;old&lt;/i&gt;</title>
+    <link rel="enclosure" href="https://checks.example.org/video.mp4"/>
+    <link rel="alternate" href="https://checks.example.org/viral-video"/>
+    <id>tag:checks.example.org,2026:1</id>
+    <published>2026-03-09T10:00:00+05:30</published>
+    <updated>2026-03-09T12:00:00+05:30</updated>
+    <summary>The clip is from 2019.</summary>
+  </entry>
+  <entry>
+    <id>https://checks.example.org/notes-ban</id>
+    <title>No new note ban</title>
+    <updated>2026-03-08T09:00:00Z</updated>
+    <content type="html">RBI has not withdrawn 500 rupee notes.</content>
+  </entry>
+</feed>"""
+
+RDF = b"""<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"
+         xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel rdf:about="https://desk.example.org/"><title>Desk</title></channel>
+  <item rdf:about="https://desk.example.org/a">
+    <title>Bridge opens</title>
+    <link>https://desk.example.org/a</link>
+    <description>The bridge opened on Monday.</description>
+    <dc:date>2026-03-09</dc:date>
+  </item>
+</rdf:RDF>"""
+
+
+def _fields(items):
+    return [{k: item[k] for k in ("title", "url", "summary_text", "pub_date", "source")} for item in items]
+
+
+def test_rss_fields():
+    assert _fields(iter_feed_items("Wire", RSS)) == [
+        {"title": "Rains lash Kerala", "url": "https://wire.example.org/rains",
+         "summary_text": "<p>Heavy rain in <b>six</b> districts.</p>", "pub_date": "Tue, 10 Mar 2026 04:00:00 GMT",
+         "source": "Wire"},
+        {"title": "Fuel prices unchanged", "url": "https://wire.example.org/fuel",
+         "summary_text": "Oil companies kept rates steady.", "pub_date": "2026-03-09T18:00:00Z", "source": "Wire"},
+        {"title": "Old story", "url": "https://wire.example.org/old", "summary_text": "N/A", "pub_date": "N/A",
+         "source": "Wire"},
+    ]
+
+
+def test_atom_fields():
+    assert _fields(iter_feed_items("Checks", ATOM)) == [
+        {"title": "Viral video is <i>old</i>", "url": "https://checks.example.org/viral-video",
+         "summary_text": "The clip is from 2019.", "pub_date": "2026-03-09T10:00:00+05:30", "source": "Checks"},
+        {"title": "No new note ban", "url": "https://checks.example.org/notes-ban",
+         "summary_text": "RBI has not withdrawn 500 rupee notes.", "pub_date": "2026-03-08T09:00:00Z", "source": "Checks"},
+    ]
+
+
+def test_rss_1_0_namespace():
+    assert _fields(iter_feed_items("Desk", RDF)) == [
+        {"title": "Bridge opens", "url": "https://desk.example.org/a", "summary_text": "The bridge opened on Monday.",
+         "pub_date": "2026-03-09", "source": "Desk"}]
+
+
+def test_stops_at_last_seen_link():
+    items = iter_feed_items("Wire", RSS, stop_at="https://wire.example.org/fuel")
+    assert next(items)["url"] == "https://wire.example.org/rains"
+    # The generator ends at the cursor instead of reading on to the older items
+    assert list(items) == []
+    assert parse_rss_content("Wire", RSS, stop_at="https://wire.example.org/rains") == []
+    assert len(parse_rss_content("Checks", ATOM, stop_at="https://checks.example.org/notes-ban")) == 1
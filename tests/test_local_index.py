@@ -0,0 +1,38 @@
+from config import FACT_CHECKS_COLLECTION, RAW_NEWS_COLLECTION
+from local_index import BM25Index
+
+
+def _article(i, title):
+    return {"url": f"https://example.org/{i}", "title": title, "summary_text": "", "source": "Example"}
+
+
+def test_search_ranks_and_reports_coverage():
+    index = BM25Index()
+    index.add_items(RAW_NEWS_COLLECTION, [_article(1, "Metro fare raised in Delhi"), _article(2, "Monsoon reaches Kerala")])
+    index.add_items(FACT_CHECKS_COLLECTION, [{"url": "https://factly.in/1/", "claim": "Delhi metro fare doubled", "verdict": "False"}])
+    hits = index.search("delhi metro fare")
+    assert {hit["url"] for hit in hits[:2]} == {"https://example.org/1", "https://factly.in/1/"}
+    assert all(hit["coverage"] == 1.0 for hit in hits[:2])
+    assert index.search("kerala")[0]["url"] == "https://example.org/2"
+
+
+def test_replacing_a_document_replaces_its_terms():
+    index = BM25Index()
+    index.add_items(RAW_NEWS_COLLECTION, [_article(1, "Metro fare raised")])
+    index.add_items(RAW_NEWS_COLLECTION, [_article(1, "Water tax cut")])
+    assert len(index) == 1
+    assert index.search("metro") == []
+    assert index.search("water tax")[0]["title"] == "Water tax cut"
+
+
+def test_compaction_bounds_slots_and_keeps_results():
+    index = BM25Index(compact_min=8, compact_ratio=0.5)
+    for round_ in range(50):
+        index.add_items(RAW_NEWS_COLLECTION, [_article(i, f"story {i} update {round_}") for i in range(10)])
+    assert len(index) == 10
+    assert len(index._docs) < 30
+    assert len(index._doc_terms) == len(index._doc_len) == len(index._docs)
+    assert all(idx < len(index._docs) for postings in index._postings.values() for idx in postings)
+    hit = index.search("story 7 update 49")[0]
+    assert hit["title"] == "story 7 update 49"
+    assert all(hit["title"].endswith("update 49") for hit in index.search("update", top_k=20))
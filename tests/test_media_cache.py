@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image, ImageDraw, ImageFont
+
+from media_cache import MediaQueryCache, content_digest, prepare_image
+
+HEADER = ["Forward to everyone", "Share before it is deleted"]
+
+
+def _screenshot(lines):
+    """A chat forward: fixed header and bubbles, only the text differs."""
+    image = Image.new("RGB", (720, 1280), (236, 229, 221))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, 720, 110], fill=(7, 94, 84))
+    draw.text((120, 40), "Family Group", fill="white", font=ImageFont.load_default(size=36))
+    font = ImageFont.load_default(size=30)
+    for i, line in enumerate(lines + HEADER):
+        top = 160 + i * 150
+        draw.rounded_rectangle([30, top, 600, top + 120], 16, fill=(255, 255, 255))
+        draw.text((50, top + 40), line, fill=(20, 20, 20), font=font)
+    return _jpeg(image, 90)
+
+
+def _jpeg(image, quality):
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=quality)
+    return out.getvalue()
+
+
+def _recompress(data, quality, scale=1.0):
+    image = Image.open(io.BytesIO(data))
+    if scale != 1.0:
+        image = image.resize((int(image.width * scale), int(image.height * scale)))
+    return _jpeg(image, quality)
+
+
+def _cached(data, query):
+    cache = MediaQueryCache(ttl=60)
+    cache.put(content_digest(data), prepare_image(data, "image/jpeg")[2], query)
+    return cache
+
+
+def _similar(cache, data):
+    return cache.get_similar(prepare_image(data, "image/jpeg")[2])
+
+
+PUNJAB = _screenshot(["Punjab govt announced free electricity", "for all farmers from next month!!"])
+
+
+@pytest.mark.parametrize("quality,scale", [(85, 1.0), (40, 1.0), (15, 1.0), (70, 0.75), (60, 0.5)])
+def test_recompressed_copy_reuses_query(quality, scale):
+    cache = _cached(PUNJAB, "punjab")
+    assert _similar(cache, _recompress(PUNJAB, quality, scale)) == "punjab"
+    assert cache.stats()["perceptualHits"] == 1
+
+
+@pytest.mark.parametrize("lines", [
+    ["Haryana govt announced free electricity", "for all farmers from next month!!"],
+    ["Punjab govt announced free electricity", "for all farmers from next week!!"],
+    ["RBI will withdraw 500 rupee notes", "from circulation by March 31"],
+])
+def test_same_layout_different_claim_misses(lines):
+    cache = _cached(PUNJAB, "punjab")
+    assert _similar(cache, _screenshot(lines)) is None
+    assert cache.stats()["perceptualHits"] == 0
+
+
+def test_one_digit_apart_misses():
+    notes = _screenshot(["RBI will withdraw 500 rupee notes", "from circulation by March 31"])
+    cache = _cached(notes, "500")
+    assert _similar(cache, _screenshot(["RBI will withdraw 600 rupee notes", "from circulation by March 31"])) is None
+    assert _similar(cache, _recompress(notes, 40)) == "500"
+
+
+def test_exact_digest_and_undecodable_upload():
+    cache = _cached(PUNJAB, "punjab")
+    assert cache.get_exact(content_digest(PUNJAB)) == "punjab"
+    data, mime, prints = prepare_image(b"not an image", "image/png")
+    assert (data, mime, prints) == (b"not an image", "image/png", None)
+    assert cache.get_similar(prints) is None
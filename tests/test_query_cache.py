@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from query_cache import QueryResultCache, SingleFlight, cluster_queries, is_cacheable
+
+STORED = "Has the Punjab government announced free electricity for all farmers in Punjab from next month?"
+
+
+def _result(verdict):
+    return {"status": "SUCCESS", "verdict": verdict}
+
+
+def _cache():
+    cache = QueryResultCache(ttl=60, max_entries=8)
+    cache.put(STORED, _result("punjab"))
+    return cache
+
+
+def test_exact_hit():
+    cache = _cache()
+    assert cache.get("  has the PUNJAB government announced free electricity for all farmers in punjab from next month ")["verdict"] == "punjab"
+    assert cache.stats()["hits"] == 1
+
+
+def test_stopword_and_inflection_differences_hit():
+    cache = _cache()
+    assert cache.get("Punjab government announces free electricity to all the farmers in Punjab from next month")["verdict"] == "punjab"
+    assert cache.stats()["nearHits"] == 1
+
+
+def test_docstring_inflection_pair_hits():
+    cache = QueryResultCache(ttl=60)
+    cache.put("Has RBI banned 2000 notes?", _result("rbi"))
+    assert cache.get("RBI bans 2000 notes")["verdict"] == "rbi"
+    assert cache.stats()["nearHits"] == 1
+
+
+def test_substituted_content_word_misses():
+    cache = _cache()
+    for query in (
+        "Has the Punjab government announced free electricity for all farmers in Haryana from next month?",
+        "Has the Kerala government announced free electricity for all farmers in Kerala from next month?",
+        "Has the Punjab government denied free electricity for all farmers in Punjab from next month?",
+        "Has the Punjab government not announced free electricity for all farmers in Punjab from next month?",
+        "Has the Punjab government announced free electricity for all farmers in Punjab from next year?",
+    ):
+        assert cache.get(query) is None, query
+    assert cache.stats()["nearHits"] == 0
+
+
+def test_reversed_roles_miss():
+    cache = QueryResultCache(ttl=60)
+    cache.put("India beat Pakistan in the world cup final", _result("india"))
+    assert cache.get("Pakistan beat India in the world cup final") is None
+
+
+def test_expired_and_evicted_entries_miss():
+    cache = QueryResultCache(ttl=-1)
+    cache.put(STORED, _result("punjab"))
+    assert cache.get(STORED) is None
+    assert cache.get("Punjab government announces free electricity for farmers in Punjab from next month") is None
+
+    cache = QueryResultCache(ttl=60, max_entries=1)
+    cache.put(STORED, _result("punjab"))
+    cache.put("RBI bans 2000 rupee notes", _result("rbi"))
+    assert cache.get("Punjab government announces free electricity for farmers in Punjab from next month") is None
+    assert cache.stats()["size"] == 1
+
+
+def test_fail_safe_not_cached():
+    assert not is_cacheable({"status": "SUCCESS", "fail_safe": True})
+    cache = QueryResultCache(ttl=60)
+    cache.put(STORED, {"status": "ERROR"})
+    assert cache.get(STORED) is None
+
+
+def test_cluster_queries_keeps_negations_apart():
+    clusters = cluster_queries(["rbi banned 2000 notes", "rbi banned 2000 notes today", "rbi not banned 2000 notes"])
+    assert clusters == [["rbi banned 2000 notes", "rbi banned 2000 notes today"], ["rbi not banned 2000 notes"]]
+
+
+# --- SingleFlight ---
+
+def test_followers_share_the_leader_result():
+    flight, calls = SingleFlight(wait_timeout=1), []
+
+    async def audit():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return _result("punjab")
+
+    async def main():
+        return await asyncio.gather(*(flight.run(STORED, audit) for _ in range(3)))
+
+    assert asyncio.run(main()) == [_result("punjab")] * 3
+    assert len(calls) == 1
+    assert flight.stats() == {"inFlight": 0, "leaders": 1, "followers": 2, "followerTimeouts": 0}
+
+
+def test_follower_wait_bounded_when_leader_hangs():
+    flight = SingleFlight(wait_timeout=0.05)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hang():
+            await release.wait()
+            return _result("punjab")
+
+        leader = asyncio.ensure_future(flight.run(STORED, hang))
+        await asyncio.sleep(0)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.run(STORED, hang)
+        waited = loop.time() - started
+        # Giving up must not cancel the leader's audit
+        assert not leader.done()
+        release.set()
+        return waited, await leader
+
+    waited, result = asyncio.run(main())
+    assert waited < 0.5
+    assert result == _result("punjab")
+    assert flight.stats()["followerTimeouts"] == 1
+
+
+def test_leader_exception_reaches_followers():
+    flight, calls = SingleFlight(wait_timeout=1), []
+
+    async def audit():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("gemini down")
+
+    async def main():
+        return await asyncio.gather(*(flight.run(STORED, audit) for _ in range(3)), return_exceptions=True)
+
+    outcomes = asyncio.run(main())
+    # No follower gets a result out of a failed leader: each re-runs the audit and fails too
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert len(calls) == 3
+    assert flight.stats()["inFlight"] == 0
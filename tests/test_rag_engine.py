@@ -0,0 +1,104 @@
+import asyncio
+
+import rag_engine
+from claim_matcher import ClaimMatcher
+from config import FACT_CHECKS_COLLECTION
+from query_cache import SingleFlight
+from telemetry import METRICS
+from upstream_scheduler import UpstreamScheduler
+
+
+def test_generate_hybrid_rag_news_runs_the_async_pipeline(monkeypatch):
+    matcher = ClaimMatcher()
+    matcher.add_items(FACT_CHECKS_COLLECTION, [{
+        "url": "https://factly.in/free-electricity/", "source": "Factly", "rating": "False", "verdict": "Fake",
+        "claim": "Punjab government announced free electricity for all farmers in Punjab from next month"}])
+    monkeypatch.setattr(rag_engine, "CLAIM_MATCHER", matcher)
+    rag_engine.RESULT_CACHE.clear()
+    query = "Has the Punjab government announced free electricity for all farmers in Punjab from next month?"
+    # Twice: the second run gets a fresh event loop and must not reuse the first one's clients
+    for _ in range(2):
+        result = rag_engine.generate_hybrid_rag_news(query, "test-key")
+        assert result["status"] == "SUCCESS"
+        assert result["sources"][0]["url"] == "https://factly.in/free-electricity/"
+    rag_engine.RESULT_CACHE.clear()
+
+
+def test_retrieval_timeout_counted_once(monkeypatch):
+    class SlowTavily:
+        async def search(self, timeout=None, **params):
+            await asyncio.sleep(5)
+
+    monkeypatch.setattr(rag_engine, "get_async_tavily", lambda: SlowTavily())
+    monkeypatch.setattr(rag_engine, "SCHEDULER", UpstreamScheduler())
+    METRICS.reset()
+    results, missing = asyncio.run(rag_engine.run_concurrent_retrieval_async({"golden": {"query": "q"}}, timeout=0.05))
+    assert results == {} and missing == ["golden"]
+    errors = [line for line in METRICS.render().splitlines() if line.startswith("fairgpt_upstream_errors_total{")]
+    assert errors == ['fairgpt_upstream_errors_total{kind="timeout",upstream="tavily"} 1']
+    METRICS.reset()
+
+
+def test_failed_leader_audit_reaches_followers_uncached(monkeypatch):
+    calls = []
+
+    async def failing_audit(user_query, api_key, fetch=None):
+        calls.append(user_query)
+        await asyncio.sleep(0.01)
+        return rag_engine.fail_safe_response(RuntimeError("gemini down"))
+
+    monkeypatch.setattr(rag_engine, "_arun_audit", failing_audit)
+    monkeypatch.setattr(rag_engine, "INFLIGHT_AUDITS", SingleFlight(wait_timeout=1))
+    rag_engine.RESULT_CACHE.clear()
+    query = "Has RBI banned 2000 rupee notes?"
+
+    async def main():
+        return await asyncio.gather(*(rag_engine.agenerate_hybrid_rag_news(query, "test-key") for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r.get("fail_safe") and "gemini down" in r["summary"] for r in results)
+    assert rag_engine.RESULT_CACHE.get(query) is None
+
+
+# --- StreamingTagParser ---
+
+RESPONSE = ("[SUMMARY] Fuel prices were not raised.\n[COUNTER_SUMMARY] Opposition disputes it.\n"
+            "[CLARIFICATION] - Old video\n- Different state\n[AUDIT] Checked PIB.\n"
+            "[LOGIC_AUDIT] No fallacy.\n[CONFIDENCE] 85")
+
+
+def _stream(chunks):
+    parser = rag_engine.StreamingTagParser()
+    sections = []
+    for chunk in chunks:
+        sections.extend(parser.feed(chunk))
+    return sections + parser.close()
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_streaming_parser_matches_batch_parser_at_every_chunk_size():
+    expected = rag_engine.parse_ai_response(RESPONSE)
+    for size in (1, 2, 3, 7, 16, len(RESPONSE)):
+        assert dict(_stream(_chunks(RESPONSE, size))) == expected, size
+
+
+def test_streaming_parser_emits_a_section_once_the_next_tag_arrives():
+    parser = rag_engine.StreamingTagParser()
+    assert parser.feed("[SUMMARY] Fuel prices were ") == []
+    assert parser.feed("not raised. [COUNTER_") == []
+    assert parser.feed("SUMMARY] Disputed") == [("[SUMMARY]", "Fuel prices were not raised.")]
+    assert parser.close() == [("[COUNTER_SUMMARY]", "Disputed")]
+    assert parser.close() == []
+
+
+def test_streaming_parser_keeps_repeated_tags_in_the_section():
+    text = "[SUMMARY] See [SUMMARY] below [AUDIT] ok"
+    assert dict(_stream(_chunks(text, 4))) == rag_engine.parse_ai_response(text)
+
+
+def test_streaming_parser_ignores_text_before_the_first_tag():
+    assert _stream(["Sure! Here is the audit.\n", "[SUMMARY] x"]) == [("[SUMMARY]", "x")]
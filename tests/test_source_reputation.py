@@ -0,0 +1,53 @@
+import pytest
+
+from source_reputation import RANK_CONSENSUS, RANK_GOLDEN, RANK_RAW, SOURCE_REGISTRY
+
+
+@pytest.mark.parametrize("url", [
+    "https://forwarded.example.com/pib.gov.in/release",
+    "https://blog.example.org/posts?ref=pib.gov.in",
+    "https://pib.gov.in.example.com/release",
+    "https://notpib.gov.in/release",
+])
+def test_lookalike_is_not_official(url):
+    rank, profile = SOURCE_REGISTRY.lookup(url)
+    assert rank == RANK_RAW
+    assert profile["type"] != "Official Government"
+    assert not profile["certified"]
+
+
+def test_official_domain_and_subdomain():
+    for url in ("https://pib.gov.in/PressReleasePage.aspx?PRID=1", "https://WWW.PIB.GOV.IN/release"):
+        rank, profile = SOURCE_REGISTRY.lookup(url)
+        assert rank == RANK_GOLDEN
+        assert profile["name"] == "Press Information Bureau"
+
+
+def test_subdomain_resolves_to_registrable_domain():
+    rank, profile = SOURCE_REGISTRY.lookup("https://m.thehindu.com/news/national/article1.ece")
+    assert rank == RANK_CONSENSUS
+    assert profile["name"] == "The Hindu"
+
+
+def test_unknown_and_malformed_hosts():
+    rank, profile = SOURCE_REGISTRY.lookup("https://www.example.net/story")
+    assert rank == RANK_RAW and profile["name"] == "example.net"
+    rank, profile = SOURCE_REGISTRY.lookup("http://[::1")
+    assert rank == RANK_RAW and profile["reliability"] == "Unverified"
+
+
+def test_classify_urls_counts_mixed_batch():
+    urls = [
+        "https://example.org/viral-post",
+        "https://m.thehindu.com/news/a.ece",
+        "https://www.boomlive.in/fact-check/a",
+        "https://forwarded.example.com/pib.gov.in/release",
+        "https://pib.gov.in/release",
+        "https://www.reuters.com/world/a",
+        "https://pib.gov.in/release",  # duplicate
+        "",
+    ]
+    counts, sources = SOURCE_REGISTRY.classify_urls(urls)
+    assert counts == {"gold": 2, "con": 2, "raw": 2}
+    assert [s["rank"] for s in sources] == [RANK_GOLDEN] * 2 + [RANK_CONSENSUS] * 2 + [RANK_RAW] * 2
+    assert sources[0]["url"] == "https://www.boomlive.in/fact-check/a"
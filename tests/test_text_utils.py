@@ -0,0 +1,35 @@
+import pytest
+
+from text_utils import normalize_query, same_order, stem_terms
+
+
+@pytest.mark.parametrize("a,b", [
+    ("banned", "bans"),
+    ("stopped", "stops"),
+    ("planning", "plans"),
+    ("announced", "announces"),
+    ("elections", "election"),
+    ("notes", "note"),
+    ("called", "calls"),
+])
+def test_inflections_share_a_stem(a, b):
+    assert stem_terms(a) == stem_terms(b)
+
+
+@pytest.mark.parametrize("word", ["bias", "thus", "axis", "press", "gas"])
+def test_words_that_are_not_plurals_keep_their_s(word):
+    assert stem_terms(word)[0].endswith("s")
+
+
+def test_negations_and_truth_words_survive():
+    assert stem_terms("RBI has not banned fake notes") == ["rbi", "not", "ban", "fake", "note"]
+
+
+def test_normalize_query_keeps_word_order():
+    assert normalize_query("India beat Pakistan!") != normalize_query("Pakistan beat India")
+    assert normalize_query("  The  Metro fare?") == "metro fare"
+
+
+def test_same_order():
+    assert same_order(["india", "beat", "pakistan"], ["india", "beat", "pakistan", "today"])
+    assert not same_order(["india", "beat", "pakistan"], ["pakistan", "beat", "india"])
@@ -0,0 +1,70 @@
+import datetime
+
+import pytest
+
+from config import RAW_NEWS_COLLECTION
+from trend_rollup import DOCUMENTS, TrendRollup, count_mentions, item_day
+
+TODAY = datetime.date(2026, 3, 10)
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+
+@pytest.mark.parametrize("item, day", [
+    ({"pub_date": "Mon, 09 Mar 2026 10:15:00 GMT"}, "2026-03-09"),
+    # Just after midnight in India is still the previous day in UTC
+    ({"pub_date": "Mon, 09 Mar 2026 02:00:00 +0530"}, "2026-03-08"),
+    ({"pub_date": "Sun, 08 Mar 2026 23:30:00 -0500"}, "2026-03-09"),
+    ({"published_date": "2026-03-07T20:00:00Z"}, "2026-03-07"),
+    ({"published_date": "2026-03-07T01:00:00+05:30"}, "2026-03-06"),
+    ({"published_date": "2026-03-07T23:59:59"}, "2026-03-07"),
+    ({"published_date": "2026-03-05"}, "2026-03-05"),
+    ({"published_date": datetime.datetime(2026, 3, 4, 3, 0, tzinfo=IST)}, "2026-03-03"),
+    ({"published_date": datetime.date(2026, 3, 2)}, "2026-03-02"),
+    ({"pub_date": "N/A", "published_date": "2026-03-01T09:00:00Z"}, "2026-03-01"),
+])
+def test_item_day(item, day):
+    assert item_day(item, TODAY) == day
+
+
+@pytest.mark.parametrize("item", [
+    {}, {"pub_date": "N/A"}, {"pub_date": "yesterday-ish"}, {"published_date": ["2026-03-01"]},
+    {"pub_date": "Fri, 20 Mar 2026 10:00:00 GMT"},  # future
+])
+def test_item_day_falls_back_to_today(item):
+    assert item_day(item, TODAY) == "2026-03-10"
+
+
+def _rollup(*days):
+    rollup = TrendRollup(retention_days=10_000)
+    for day, counts in days:
+        rollup.add(day, counts)
+    return rollup
+
+
+def test_history_window_oldest_first():
+    rollup = _rollup(("2026-03-06", {"fuel": 9}), ("2026-03-08", {"fuel": 4}), ("2026-03-10", {"fuel": 2}),
+                     ("2026-03-11", {"fuel": 50}))
+    assert rollup.history("fuel", days=3, today=TODAY) == [
+        {"date": "Mar 08", "volume": 4}, {"date": "Mar 09", "volume": 0}, {"date": "Mar 10", "volume": 2}]
+
+
+def test_history_merges_counts_and_takes_rarest_term():
+    rollup = _rollup(("2026-03-10", {"fuel": 5, "subsidy": 2, "delhi": 40}),
+                     ("2026-03-10", {"fuel": 1, "subsidy": 3}))
+    assert rollup.history("fuel subsidy Delhi", days=1, today=TODAY) == [{"date": "Mar 10", "volume": 5}]
+    assert rollup.history("fuel subsidy Mumbai", days=1, today=TODAY) == [{"date": "Mar 10", "volume": 0}]
+    rollup.replace("2026-03-10", {"fuel": 1})
+    assert rollup.history("fuel", days=1, today=TODAY) == [{"date": "Mar 10", "volume": 1}]
+
+
+def test_count_mentions_feeds_history():
+    items = [{"title": "Fuel prices rise", "summary_text": "fuel fuel fuel", "pub_date": "Tue, 10 Mar 2026 04:00:00 GMT"},
+             {"title": "Fuel subsidy for Delhi", "pub_date": "Mon, 09 Mar 2026 22:00:00 -0500"},
+             {"title": "Rains in Kerala", "pub_date": "Mon, 09 Mar 2026 08:00:00 GMT"}]
+    days = count_mentions(RAW_NEWS_COLLECTION, items, TODAY)
+    # A document counts each term once, however often it repeats
+    assert days["2026-03-10"]["fuel"] == 2
+    assert days["2026-03-10"][DOCUMENTS] == 2
+    assert days["2026-03-09"][DOCUMENTS] == 1
+    rollup = _rollup(*days.items())
+    assert [h["volume"] for h in rollup.history("fuel prices", days=2, today=TODAY)] == [0, 1]
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from telemetry import classify_error
+from upstream_scheduler import UpstreamScheduler, UpstreamThrottled, attempt_timeout, failure_kind
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class NoJitter:
+    def uniform(self, low, high):
+        return 0.0
+
+
+class Status(Exception):
+    def __init__(self, status_code, message=""):
+        super().__init__(message or f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class UsageLimitExceededError(Exception):
+    pass
+
+
+def _scheduler(clock, deadline=60.0, max_retries=3):
+    return UpstreamScheduler(api_limits={}, model_limits={}, default_model_limit=None,
+                             max_retries=max_retries, deadline=deadline, clock=clock, rng=NoJitter())
+
+
+def test_timed_out_attempts_share_one_deadline():
+    clock = Clock()
+    timeouts = []
+
+    def slow(model):
+        timeout = attempt_timeout(45)
+        timeouts.append(timeout)
+        clock.now += timeout  # every attempt runs into its timeout
+        raise TimeoutError("read timed out")
+
+    with pytest.raises(TimeoutError):
+        _scheduler(clock).call("gemini", slow, models=["m1"])
+    assert timeouts[0] == 45
+    assert timeouts[1] == pytest.approx(15)
+    assert sum(timeouts) <= 60
+
+
+def test_no_fallback_after_deadline_spent_on_429():
+    clock = Clock()
+    called = []
+
+    def fn(model):
+        called.append(model)
+        clock.now += 61
+        raise Status(429)
+
+    with pytest.raises(Status):
+        _scheduler(clock).call("gemini", fn, models=["m1", "m2"])
+    assert called == ["m1"]
+
+
+def test_fallback_gets_only_remaining_time():
+    clock = Clock()
+    seen = {}
+
+    def fn(model):
+        seen[model] = attempt_timeout(45)
+        if model == "m1":
+            clock.now += 40
+            raise Status(429, "RESOURCE_EXHAUSTED retryDelay: 30s")
+        return model
+
+    assert _scheduler(clock).call("gemini", fn, models=["m1", "m2"]) == "m2"
+    assert seen == {"m1": 45, "m2": pytest.approx(20)}
+
+
+def test_acall_cancels_attempt_past_deadline():
+    async def hang():
+        await asyncio.sleep(10)
+
+    scheduler = _scheduler(lambda: asyncio.get_event_loop().time(), deadline=0.05, max_retries=0)
+    with pytest.raises(TimeoutError):
+        asyncio.run(scheduler.acall("tavily", hang))
+
+
+def test_attempt_timeout_outside_scheduler():
+    assert attempt_timeout(20) == 20
+
+
+def test_throttled_when_bucket_cannot_refill_in_time():
+    clock = Clock()
+    scheduler = UpstreamScheduler(api_limits={"tavily": (0.01, 1)}, model_limits={}, default_model_limit=None,
+                                  deadline=5, clock=clock, rng=NoJitter())
+    assert scheduler.call("tavily", lambda: "ok") == "ok"
+    with pytest.raises(UpstreamThrottled):
+        scheduler.call("tavily", lambda: "ok")
+
+
+@pytest.mark.parametrize("error,kind", [
+    (Status(429), "rate_limited"),
+    (UsageLimitExceededError("Rate limit exceeded"), "rate_limited"),
+    (Exception("Claim about 429 new notes"), "error"),
+    (Exception("RESOURCE_EXHAUSTED in the message only"), "error"),
+    (TimeoutError(), "timeout"),
+    (Status(503), "error"),
+    (429, "rate_limited"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_failure_kind():
+    class GenaiError(Exception):
+        code = 429
+    assert failure_kind(GenaiError()) == "rate_limited"
+    assert failure_kind(Status(404)) == "unavailable"
+    assert failure_kind(Status(503)) == "retryable"
+    assert failure_kind(Status(400)) == "fatal"
+    assert failure_kind(Exception("429")) == "fatal"
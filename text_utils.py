@@ -0,0 +1,89 @@
+# text_utils.py
+# Query/document normalization shared by the result cache and local indexes.
+# Negations and truth words ("not", "fake", "false") are deliberately NOT stopwords:
+# dropping them would merge opposite claims under one key.
+import unicodedata
+from typing import List
+
+STOPWORDS = frozenset("""
+a an the and or but if of at by for with about against between into through during before after
+above below to from up down in out on off over under again further then once here there when where
+why how all any both each few more most other some such only own same so than too very
+can will just should now is are was were be been being have has had having do does did doing
+i me my we our you your he him his she her it its they them their what which who whom this that
+these those am would could also says said claim claims news viral really
+""".split())
+
+
+class _PunctuationTable(dict):
+    """str.translate table that blanks out every Unicode punctuation/symbol code point."""
+    def __missing__(self, codepoint):
+        value = " " if unicodedata.category(chr(codepoint))[0] in "PS" else codepoint
+        self[codepoint] = value
+        return value
+
+_PUNCTUATION = _PunctuationTable()
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    """Lowercases, strips punctuation and splits on whitespace."""
+    if not text: return []
+    words = text.lower().translate(_PUNCTUATION).split()
+    if drop_stopwords:
+        return [w for w in words if w not in STOPWORDS]
+    return words
+
+
+_SUFFIXES = ("ing", "ed", "es", "s")
+_NOT_PLURAL = ("ss", "us", "is", "as")  # "press", "thus", "axis", "bias"
+
+
+def _stem(word: str) -> str:
+    if word.isdigit():
+        return word
+    if len(word) > 4:
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+                word = word[:-len(suffix)]
+                # "banned" -> "bann" -> "ban", like "bans"; "called" keeps its "ll"
+                if suffix in ("ing", "ed") and word[-1] == word[-2] and word[-1] not in "aeiouylsz":
+                    word = word[:-1]
+                break
+        if word.endswith("e") and len(word) > 4:
+            word = word[:-1]
+    elif len(word) == 4 and word.endswith("s") and not word.endswith(_NOT_PLURAL):
+        word = word[:-1]  # "bans", "cuts", "hits"
+    return word
+
+
+def stem_terms(text: str) -> List[str]:
+    """tokenize() plus a light suffix strip, so "announced" / "announces" / "announce",
+    "elections" / "election" and "banned" / "bans" become one term. Numbers are left alone."""
+    return [_stem(word) for word in tokenize(text)]
+
+
+def same_order(a: List[str], b: List[str]) -> bool:
+    """Whether the words both texts use appear in the same order in each.
+
+    Word overlap cannot tell "X beat Y" from "Y beat X" (the swap costs about as much
+    as one inserted word), and reusing one's verdict for the other would be wrong.
+    """
+    first_b = {}
+    for position, term in enumerate(b):
+        first_b.setdefault(term, position)
+    seen, last = set(), -1
+    for term in a:
+        if term in first_b and term not in seen:
+            seen.add(term)
+            if first_b[term] < last:
+                return False
+            last = first_b[term]
+    return True
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form used as a cache/coalescing key. Word order is kept on purpose:
+    "India beat Pakistan" and "Pakistan beat India" are different claims."""
+    tokens = tokenize(query)
+    # A query made only of stopwords still needs a stable, non-empty key
+    return " ".join(tokens or tokenize(query, drop_stopwords=False))
@@ -0,0 +1,200 @@
+# trend_rollup.py
+# Per-day counts of how many ingested documents mention each normalized term, kept up
+# to date at ingestion time, so a response's trend_history is a handful of dict
+# lookups instead of a scan of raw_news_articles.
+import datetime
+import email.utils
+import json
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from config import TREND_DAYS, TREND_RETENTION_DAYS, TREND_ROLLUP_COLLECTION
+from local_index import document_text
+from text_utils import stem_terms
+
+DOCUMENTS = ""  # pseudo-term holding the day's document count
+
+
+def utc_today() -> datetime.date:
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def _parse_stamp(raw: str):
+    # RFC 2822 (RSS pubDate) first, then ISO 8601 (Atom, JSON-LD datePublished)
+    try:
+        return email.utils.parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        try:
+            return datetime.datetime.fromisoformat(raw.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+
+def item_day(item: dict, today: Optional[datetime.date] = None) -> str:
+    """UTC ISO day an item was published (RSS pub_date, fact-check published_date),
+    else the day it was ingested. Strings and datetime/date values are accepted; naive
+    times count as UTC. Unparseable and future dates count as today."""
+    today = today or utc_today()
+    raw = next((v for v in (item.get('pub_date'), item.get('published_date')) if v and v != "N/A"), None)
+    stamp = _parse_stamp(raw) if isinstance(raw, str) else raw
+    if isinstance(stamp, datetime.datetime):
+        day = (stamp.astimezone(datetime.timezone.utc) if stamp.tzinfo else stamp).date()
+    elif isinstance(stamp, datetime.date):
+        day = stamp
+    else:
+        day = None
+    if day is None or day > today:
+        day = today
+    return day.isoformat()
+
+
+def count_mentions(collection_name: str, items: Iterable[dict],
+                   today: Optional[datetime.date] = None) -> Dict[str, Counter]:
+    """{day: Counter(term -> documents mentioning it)}; a document counts a term once."""
+    days: Dict[str, Counter] = {}
+    for item in items:
+        counts = days.setdefault(item_day(item, today), Counter())
+        counts.update(set(stem_terms(document_text(collection_name, item))))
+        counts[DOCUMENTS] += 1
+    return days
+
+
+def encode_counts(counts: Dict[str, int]) -> bytes:
+    # One opaque blob per day: a map field would cost one index entry per term
+    return zlib.compress(json.dumps(counts, separators=(",", ":")).encode())
+
+
+def decode_counts(blob: bytes) -> Dict[str, int]:
+    return json.loads(zlib.decompress(blob))
+
+
+class TrendRollup:
+    """{day: {term: documents}} for the last TREND_RETENTION_DAYS days.
+
+    A query's volume on a day is the count of its rarest term: no more documents than
+    that can mention all of its terms, and it keeps "fuel subsidy Delhi" following
+    the fuel subsidy coverage rather than everything about Delhi.
+    """
+
+    def __init__(self, retention_days: int = TREND_RETENTION_DAYS):
+        self.retention_days = retention_days
+        self._days: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._days)
+
+    def _cutoff(self, today: Optional[datetime.date] = None) -> str:
+        return ((today or utc_today()) - datetime.timedelta(days=self.retention_days - 1)).isoformat()
+
+    def _prune(self, today: Optional[datetime.date] = None):
+        cutoff = self._cutoff(today)
+        for day in [d for d in self._days if d < cutoff]:
+            del self._days[day]
+
+    def add(self, day: str, counts: Dict[str, int]):
+        with self._lock:
+            target = self._days.setdefault(day, {})
+            for term, n in counts.items():
+                target[term] = target.get(term, 0) + n
+            self._prune()
+
+    def replace(self, day: str, counts: Dict[str, int]):
+        with self._lock:
+            self._days[day] = dict(counts)
+            self._prune()
+
+    def history(self, query: str, days: int = TREND_DAYS, today: Optional[datetime.date] = None) -> List[dict]:
+        """[{"date": "Mar 01", "volume": n}, ...] for the last `days` days, oldest first."""
+        terms = set(stem_terms(query))
+        today = today or utc_today()
+        history = []
+        with self._lock:
+            for offset in range(days - 1, -1, -1):
+                day = today - datetime.timedelta(days=offset)
+                counts = self._days.get(day.isoformat())
+                volume = min(counts.get(term, 0) for term in terms) if counts and terms else 0
+                history.append({"date": day.strftime("%b %d"), "volume": volume})
+        return history
+
+    # --- INGESTION ---
+
+    def record(self, collection_name: str, items: List[dict], state=None) -> int:
+        """Counts newly stored items into the rollups.
+
+        With an IngestState the counts are added in SQLite, and each touched day's
+        Firestore document is rewritten from the SQLite totals (so a retried write
+        never double counts). Without one only this process's rollup is updated:
+        its totals are partial after a restart, and mirroring them would overwrite
+        the real ones.
+        """
+        if not items: return 0
+        cutoff = self._cutoff()
+        # Back-catalogue items (first crawl of an archive) fall outside every chart
+        days = {day: counts for day, counts in count_mentions(collection_name, items).items() if day >= cutoff}
+        for day, counts in days.items():
+            self.add(day, counts)
+        if state is None:
+            return len(items)
+
+        for day, counts in days.items():
+            state.add_term_counts(day, counts)
+        state.prune_term_counts(cutoff)
+        if days:
+            self._mirror(state, list(days))
+        return len(items)
+
+    def _mirror(self, state, days: List[str]):
+        from database_setup import get_db, public_collection
+        if not get_db(): return
+        from firebase_admin import firestore
+        try:
+            batch = get_db().batch()
+            for day in days:
+                totals = state.get_term_counts(day)
+                batch.set(public_collection(TREND_ROLLUP_COLLECTION).document(day), {
+                    "date": day,
+                    "documents": totals.get(DOCUMENTS, 0),
+                    "terms": len(totals) - (DOCUMENTS in totals),
+                    "counts": encode_counts(totals),
+                    "updated_at": firestore.SERVER_TIMESTAMP,
+                })
+            batch.commit()
+        except Exception as e:
+            print(f"⚠️ Trend rollup mirror failed for {', '.join(days)}: {e}")
+
+    # --- FIRESTORE SYNC (API side) ---
+
+    def load_from_firestore(self) -> int:
+        """Replaces the retained days with their Firestore documents; returns the day count."""
+        from database_setup import get_db, public_collection
+        if not get_db(): return 0
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        cutoff = self._cutoff()
+        loaded = 0
+        query = public_collection(TREND_ROLLUP_COLLECTION).where(filter=FieldFilter("date", ">=", cutoff))
+        for doc in query.stream():
+            data = doc.to_dict()
+            if data.get("date", "") < cutoff or not data.get("counts"):
+                continue
+            self.replace(data["date"], decode_counts(data["counts"]))
+            loaded += 1
+        return loaded
+
+
+TREND_ROLLUP = TrendRollup()
+
+
+async def keep_trends_fresh(rollup: TrendRollup, interval: float):
+    """App background task: the ingestion process owns the counts, the API re-reads them."""
+    import asyncio
+    while True:
+        try:
+            loaded = await asyncio.to_thread(rollup.load_from_firestore)
+            if loaded: print(f"📈 Trend rollups loaded: {loaded} days.")
+        except Exception as e:
+            print(f"⚠️ Trend rollup load failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,287 @@
+# upstream_scheduler.py
+# Rate control shared by every Gemini and Tavily call in a worker: token buckets per API
+# and per model, priority lanes, Retry-After aware retries with jittered backoff, and
+# ordered model fallback when one model runs out of quota.
+import asyncio
+import contextlib
+import contextvars
+import email.utils
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import (
+    UPSTREAM_RATE_LIMITS, MODEL_RATE_LIMITS, DEFAULT_MODEL_RATE_LIMIT, LANE_HEADROOM, MAX_RETRIES, API_TIMEOUT,
+    BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS, MODEL_UNAVAILABLE_COOLDOWN
+)
+from telemetry import METRICS, classify_error, error_status, upstream_error
+
+# Priority lanes, highest first. Set with `lane(...)`; anything unset is interactive.
+INTERACTIVE, BATCH, INGEST = "interactive", "batch", "ingest"
+
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar("upstream_lane", default=INTERACTIVE)
+
+# Seconds left of the scheduler's deadline while an attempt runs; None outside call()/acall()
+_attempt_budget: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("upstream_attempt_budget", default=None)
+
+
+@contextlib.contextmanager
+def lane(name: str):
+    """Runs the block (and tasks/threads started from it with a copied context) in `name`."""
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+def attempt_timeout(default: float) -> float:
+    """Timeout for the request an fn passed to call()/acall() is about to send: `default`,
+    cut to what is left of the call's deadline so a retry never overruns it."""
+    budget = _attempt_budget.get()
+    return default if budget is None else max(min(default, budget), 0.001)
+
+
+class UpstreamThrottled(Exception):
+    """Raised when no bucket (or fallback model) frees up before the call's deadline."""
+    status_code = 429
+
+
+# --- ERROR CLASSIFICATION ---
+
+def failure_kind(error) -> str:
+    """rate_limited (429), unavailable (model 404), retryable (timeouts, 5xx, dropped
+    connections) or fatal (everything else, e.g. bad requests and invalid keys)."""
+    status = error_status(error)
+    if classify_error(error) == "rate_limited":
+        return "rate_limited"
+    if status == 404:
+        return "unavailable"
+    if status in (408, 500, 502, 503, 504) or classify_error(error) == "timeout":
+        return "retryable"
+    if status is None and (isinstance(error, (ConnectionError, OSError)) or "connect" in type(error).__name__.lower()):
+        return "retryable"
+    return "fatal"
+
+
+_RETRY_DELAY = re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s")
+
+
+def retry_after(error) -> Optional[float]:
+    """Seconds the upstream asked us to wait: the Retry-After header (seconds or HTTP
+    date), else the RetryInfo delay Gemini puts in RESOURCE_EXHAUSTED bodies."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    try:
+        body = getattr(response, "text", "") or ""
+    except Exception:  # streamed httpx response that was never read
+        body = ""
+    match = _RETRY_DELAY.search(f"{error} {body if isinstance(body, str) else ''}")
+    return float(match.group(1)) if match else None
+
+
+# --- TOKEN BUCKETS ---
+
+class TokenBucket:
+    """`rate` tokens per second up to `capacity`. Not locked; the scheduler serializes access."""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate, self.capacity = rate, capacity
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def wait_time(self, now: float, headroom: float = 0.0) -> float:
+        """Seconds until a token is free for a lane that must leave `headroom` of the bucket."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        need = min(1 + headroom * self.capacity, self.capacity)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class UpstreamScheduler:
+    """Admits, retries and reroutes upstream calls.
+
+    A Gemini call draws one token from the "gemini" bucket and one from its model's
+    bucket; Tavily calls only from "tavily". Lower lanes may only draw while the bucket
+    holds more than LANE_HEADROOM of its capacity, so interactive searches always find
+    tokens that batch and ingestion work could not take. A 429 blocks the model (or the
+    whole API when there is no model) for Retry-After seconds for every caller, and the
+    next call moves down the model list instead of waiting, if a model is free.
+    """
+
+    def __init__(self, api_limits: Dict[str, tuple] = UPSTREAM_RATE_LIMITS,
+                 model_limits: Dict[str, tuple] = MODEL_RATE_LIMITS,
+                 default_model_limit: Optional[tuple] = DEFAULT_MODEL_RATE_LIMIT,
+                 headroom: Dict[str, float] = LANE_HEADROOM, max_retries: int = MAX_RETRIES,
+                 deadline: float = API_TIMEOUT, clock=time.monotonic, rng: random.Random = None):
+        self.api_limits, self.model_limits, self.default_model_limit = api_limits, model_limits, default_model_limit
+        self.headroom, self.max_retries, self.deadline = headroom, max_retries, deadline
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._blocked_until: Dict[str, float] = {}
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._blocked_until.clear()
+
+    @staticmethod
+    def _keys(api: str, model: Optional[str]) -> List[str]:
+        return [api, f"{api}:{model}"] if model else [api]
+
+    def _bucket(self, key: str, now: float) -> Optional[TokenBucket]:
+        if key not in self._buckets:
+            api, _, model = key.partition(":")
+            limit = self.model_limits.get(model, self.default_model_limit) if model else self.api_limits.get(api)
+            self._buckets[key] = TokenBucket(limit[0], limit[1], now) if limit else None
+        return self._buckets[key]
+
+    def _wait(self, key: str, now: float, headroom: float) -> float:
+        bucket = self._bucket(key, now)
+        return max(self._blocked_until.get(key, 0.0) - now, bucket.wait_time(now, headroom) if bucket else 0.0, 0.0)
+
+    def _reserve(self, api: str, models: Sequence[Optional[str]], lane_name: str) -> Tuple[Optional[str], float]:
+        """Takes tokens for the first model that can go now and returns (model, 0);
+        otherwise returns the model that frees up soonest and how long that takes."""
+        headroom = self.headroom.get(lane_name, 0.0)
+        with self._lock:
+            now = self.clock()
+            best = None
+            for model in models:
+                keys = self._keys(api, model)
+                wait = max(self._wait(key, now, headroom) for key in keys)
+                if wait <= 0:
+                    for key in keys:
+                        bucket = self._buckets[key]
+                        if bucket: bucket.take()
+                    return model, 0.0
+                if best is None or wait < best[1]:
+                    best = (model, wait)
+            return best
+
+    def block(self, api: str, model: Optional[str], seconds: float):
+        """Holds back every caller of the model (or of the API) for `seconds`."""
+        key = self._keys(api, model)[-1]
+        with self._lock:
+            until = self.clock() + seconds
+            self._blocked_until[key] = max(self._blocked_until.get(key, 0.0), until)
+
+    def _backoff(self, retry: int) -> float:
+        # Full jitter: concurrent callers that failed together do not retry together
+        return self.rng.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (retry - 1)))
+
+    def _steps(self, api: str, models: Optional[Sequence[str]], deadline: Optional[float]):
+        """Retry loop shared by call() and acall(). Yields ("wait", seconds) or
+        ("call", (model, seconds_left)); a failed call's exception is sent back in.
+        Raises once the error is final, the retries are spent or nothing fits in the
+        deadline. The deadline bounds the attempts as well as the waits: every attempt,
+        a fallback after a 429 included, only gets the time that is left."""
+        choices = list(models) if models else [None]
+        lane_name = _lane.get()
+        deadline_at = self.clock() + (self.deadline if deadline is None else deadline)
+        retries, waited, error = 0, 0.0, None
+        while True:
+            model, wait = self._reserve(api, choices, lane_name)
+            if wait > 0:
+                if self.clock() + wait > deadline_at:
+                    raise UpstreamThrottled(f"{api} quota exhausted ({lane_name} lane), next slot in {wait:.1f}s")
+                waited += wait
+                yield "wait", wait
+                continue
+            left = deadline_at - self.clock()
+            if left <= 0:
+                raise error if error is not None else UpstreamThrottled(f"{api} deadline passed before the call")
+            METRICS.observe("fairgpt_upstream_wait_seconds", waited, upstream=api, lane=lane_name)
+            waited = 0.0
+            if model != choices[0]:
+                METRICS.inc("fairgpt_model_fallback_total", upstream=api, model=model)
+                print(f"🔀 {api}: falling back to {model}")
+
+            error = yield "call", (model, left)
+            upstream_error(api, error)
+            kind = failure_kind(error)
+            if kind == "fatal" or (kind == "unavailable" and model is None):
+                raise error
+            if kind == "unavailable":
+                # Retired or unknown model: skip it for a while; not a retry of this call
+                print(f"⚠️ {model} Retired or Not Found, skipping it for {MODEL_UNAVAILABLE_COOLDOWN}s.")
+                self.block(api, model, MODEL_UNAVAILABLE_COOLDOWN)
+                continue
+            if retries >= self.max_retries:
+                raise error
+            retries += 1
+            METRICS.inc("fairgpt_upstream_retries_total", upstream=api, kind=kind)
+            delay = retry_after(error)
+            if delay is None:
+                delay = self._backoff(retries)
+            if kind == "rate_limited":
+                # The quota is shared, so every caller of this model backs off, not just us;
+                # the next _reserve() picks a fallback model if one is free
+                print(f"⚠️ {model or api} Quota Full, holding it for {delay:.1f}s.")
+                self.block(api, model, delay)
+                continue
+            if self.clock() + delay > deadline_at:
+                raise error
+            waited += delay
+            yield "wait", delay
+
+    def call(self, api: str, fn, models: Optional[Sequence[str]] = None, deadline: Optional[float] = None):
+        """Runs fn() (or fn(model) when `models` is given) under the scheduler, blocking.
+        A thread cannot be interrupted, so fn should pass attempt_timeout() to its client."""
+        steps = self._steps(api, models, deadline)
+        action, value = next(steps)
+        while True:
+            if action == "wait":
+                time.sleep(value)
+                action, value = next(steps)
+                continue
+            model, left = value
+            token = _attempt_budget.set(left)
+            try:
+                return fn(model) if models else fn()
+            except Exception as e:
+                action, value = steps.send(e)
+            finally:
+                _attempt_budget.reset(token)
+
+    async def acall(self, api: str, fn, models: Optional[Sequence[str]] = None, deadline: Optional[float] = None):
+        """Async twin of call(); fn returns an awaitable, which is cancelled when it
+        outlives the deadline."""
+        steps = self._steps(api, models, deadline)
+        action, value = next(steps)
+        while True:
+            if action == "wait":
+                await asyncio.sleep(value)
+                action, value = next(steps)
+                continue
+            model, left = value
+            token = _attempt_budget.set(left)
+            try:
+                return await asyncio.wait_for(fn(model) if models else fn(), left)
+            except Exception as e:
+                action, value = steps.send(e)
+            finally:
+                _attempt_budget.reset(token)
+
+
+SCHEDULER = UpstreamScheduler()